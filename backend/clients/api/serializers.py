@@ -56,6 +56,7 @@ class FavorisSerializer(serializers.ModelSerializer):
         model = Favoris
         fields = ('id', 'client', 'produit', 'produit_detail')
         read_only_fields = ('id',)
+        expandable_fields = {'client': ClientSerializer}
 
 class AvisSerializer(serializers.ModelSerializer):
     """Serializer pour le modèle Avis"""
@@ -66,4 +67,6 @@ class AvisSerializer(serializers.ModelSerializer):
     class Meta:
         model = Avis
         fields = ('id', 'client', 'client_nom', 'client_prenom', 'produit', 'produit_nom', 'commentaire', 'note', 'date_creation')
-        read_only_fields = ('id', 'date_creation') 
\ No newline at end of file
+        read_only_fields = ('id', 'date_creation')
+        # pas de ?expand=client : les avis sont publics , le profil client (e-mail , téléphone , points) ne l'est pas
+        expandable_fields = {'produit': ProduitListSerializer}
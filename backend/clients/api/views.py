@@ -4,13 +4,17 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth.models import User
 from django.db.models import Count, Q
+from config.fastpath import FastListMixin
+from config.pagination import KeysetPagination
+from config.prefetch import PrefetchPlannerMixin, plan_queryset
+from config.sparse import SparseFieldsetsMixin
 from ..models import Client, Favoris, Avis
 from .serializers import (
     UserSerializer, ClientSerializer, ClientCreateSerializer,
     FavorisSerializer, AvisSerializer
 )
 
-class ClientViewSet(viewsets.ModelViewSet):
+class ClientViewSet(SparseFieldsetsMixin, PrefetchPlannerMixin, viewsets.ModelViewSet):
     """API pour gérer les clients"""
     queryset = Client.objects.all()
     filter_backends = [filters.SearchFilter, DjangoFilterBackend]
@@ -95,7 +99,7 @@ class ClientViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class FavorisViewSet(viewsets.ModelViewSet):
+class FavorisViewSet(SparseFieldsetsMixin, PrefetchPlannerMixin, viewsets.ModelViewSet):
     """API pour gérer les favoris des clients"""
     queryset = Favoris.objects.all()
     serializer_class = FavorisSerializer
@@ -116,21 +120,22 @@ class FavorisViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Filtre les favoris pour n'afficher que ceux de l'utilisateur connecté"""
+        queryset = super().get_queryset()
         if self.request.user.is_staff:
-            return Favoris.objects.all()
+            return queryset
         
         try:
             client = Client.objects.get(user=self.request.user)
-            return Favoris.objects.filter(client=client)
+            return queryset.filter(client=client)
         except Client.DoesNotExist:
-            return Favoris.objects.none()
+            return queryset.none()
     
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def mes_favoris(self, request):
         """Point de terminaison pour récupérer les favoris de l'utilisateur connecté"""
         try:
             client = Client.objects.get(user=request.user)
-            favoris = Favoris.objects.filter(client=client)
+            favoris = plan_queryset(Favoris.objects.filter(client=client), FavorisSerializer())
             serializer = FavorisSerializer(favoris, many=True)
             return Response(serializer.data)
         except Client.DoesNotExist:
@@ -139,7 +144,7 @@ class FavorisViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-class AvisViewSet(viewsets.ModelViewSet):
+class AvisViewSet(FastListMixin, SparseFieldsetsMixin, PrefetchPlannerMixin, viewsets.ModelViewSet):
     """API pour gérer les avis des clients"""
     queryset = Avis.objects.all()
     serializer_class = AvisSerializer
@@ -147,6 +152,7 @@ class AvisViewSet(viewsets.ModelViewSet):
     filterset_fields = ['client', 'produit', 'note']
     search_fields = ['commentaire', 'client__nom', 'client__prenom', 'produit__nom']
     ordering_fields = ['date_creation', 'note']
+    pagination_class = KeysetPagination
     
     def get_permissions(self):
         """
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_favoris_date_ajout'),
+        ('products', '0004_produit_produit_prix_id_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='avis',
+            index=models.Index(fields=['date_creation', 'id'], name='avis_creation_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='avis',
+            index=models.Index(fields=['note', 'id'], name='avis_note_id_idx'),
+        ),
+    ]
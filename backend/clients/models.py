@@ -64,6 +64,11 @@ class Avis(models.Model):
         verbose_name = _("Avis")
         verbose_name_plural = _("Avis")
         unique_together = ('client', 'produit')
+        # Index pour la pagination par curseur sur les tris de l'API (clé + id)
+        indexes = [
+            models.Index(fields=['date_creation', 'id'], name='avis_creation_id_idx'),
+            models.Index(fields=['note', 'id'], name='avis_note_id_idx'),
+        ]
     
     def __str__(self):
         return f"Avis de {self.client} - {self.produit.nom} ({self.note}/5)" # pour afficher l'avis du client sur le produit car il ne peut pas noter un produit en dehors de 1 et 5
@@ -1,3 +1,60 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from config.testing import FastPathParityMixin
+from products.models import Produit
+from .models import Avis, Client
+
+
+class AvisFastPathTests(FastPathParityMixin, TestCase):
+    """
+    Parité du chemin rapide (config.fastpath) : la liste des avis lue en .values()
+    doit produire les mêmes octets que AvisSerializer et le JSONRenderer de DRF.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        produit = Produit.objects.create(nom="Babouche", prix=Decimal('120.00'))
+        for index, commentaire in enumerate(("Très confortable ✓", None)):
+            client = Client.objects.create(user=User.objects.create_user(f'client{index}'), nom="Nom", prenom="Prénom")
+            Avis.objects.create(client=client, produit=produit, note=5 - index, commentaire=commentaire)
+
+    def test_list_parity(self):
+        self.assertSameAsSerializer('/api/clients/avis/', queries=1)
+        self.assertSameAsSerializer('/api/clients/avis/?ordering=note', queries=1)
+        # Relation développée : chemin normal du serializer , produits annotés préchargés en une requête
+        self.assertSameAsSerializer('/api/clients/avis/?expand=produit', queries=2)
+
+    def test_expand_client_not_exposed(self):
+        """Lecture anonyme : ?expand=client laisse l'id du client , sans ses données personnelles"""
+        Client.objects.filter(user__username='client0').update(phone="0611223344", point_de_fidelite=42)
+        User.objects.update(email="client@example.com")
+        response = self.client.get('/api/clients/avis/?expand=client')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.data['results'][0]['client'], int)
+        for secret in (b'client@example.com', b'0611223344', b'point_de_fidelite', b'"user"'):
+            self.assertNotIn(secret, response.content)
+
+
+class AvisQueryBudgetTests(TestCase):
+    """?expand=produit : le produit est préchargé avec son prix effectif , sans requête par avis"""
+
+    def setUp(self):
+        self.client = APIClient()
+        for index in range(5):
+            produit = Produit.objects.create(nom=f"Babouche {index}", prix=Decimal('120.00'))
+            client = Client.objects.create(user=User.objects.create_user(f'client{index}'), nom="Nom", prenom="Prenom")
+            Avis.objects.create(client=client, produit=produit, note=5, commentaire="Confortable")
 
-# Create your tests here.
+    def test_expand_produit(self):
+        # avis avec leurs clients (jointure) , puis les produits annotés (Prefetch)
+        with self.assertNumQueries(2), self.assertNoLogs('products.api.serializers', 'ERROR'):
+            response = self.client.get('/api/clients/avis/?expand=produit')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 5)
+        avis = response.data['results'][0]
+        self.assertEqual(avis['produit_nom'], avis['produit']['nom'])
+        self.assertEqual(avis['produit']['prix_effectif'], '120.00')
@@ -2,10 +2,12 @@ from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 from .models import (
     EtatCommande, Commande, Panier, Retour, 
-    Remise, CodePromo, LigneCommande
+    Remise, CodePromo, LigneCommande, EvenementCommande
 )
 from django.contrib import messages
 
+from .orders import place_order, resolve_lines
+
 class LigneCommandeInline(admin.TabularInline):
     """Inline pour les lignes de commande"""
     model = LigneCommande
@@ -32,16 +34,19 @@ class RetourInline(admin.TabularInline):
 @admin.register(EtatCommande)
 class EtatCommandeAdmin(admin.ModelAdmin):
     """Admin pour les états de commande"""
-    list_display = ('libelle_etat',)
-    search_fields = ('libelle_etat',)
+    list_display = ('libelle_etat', 'code')
+    search_fields = ('libelle_etat', 'code')
 
 @admin.register(Commande)
 class CommandeAdmin(admin.ModelAdmin):
     """Admin pour les commandes"""
-    list_display = ('id', 'client', 'date_commande', 'etat_commande', 'adresse', 'region')
+    list_display = ('id', 'client', 'date_commande', 'etat_commande', 'adresse', 'region', 'nb_articles', 'total_net')
     list_filter = ('etat_commande', 'date_commande')
     search_fields = ('client__nom', 'client__prenom', 'client__email', 'adresse', 'region')
-    readonly_fields = ('date_creation', 'date_modification')
+    # l'état change par les transitions de l'API (commandes.workflow) , qui écrivent aussi l'événement
+    readonly_fields = (
+        'etat_commande', 'date_creation', 'date_modification', 'total_brut', 'total_remise', 'total_net', 'nb_articles'
+    )
     inlines = [LigneCommandeInline, RemiseInline, CodePromoInline, RetourInline]
     
     fieldsets = (
@@ -51,6 +56,9 @@ class CommandeAdmin(admin.ModelAdmin):
         (_('Livraison'), {
             'fields': ('adresse', 'region')
         }),
+        (_('Totaux'), {
+            'fields': ('nb_articles', 'total_brut', 'total_remise', 'total_net')
+        }),
         (_('Informations système'), {
             'fields': ('date_creation', 'date_modification'),
             'classes': ('collapse',)
@@ -83,26 +91,14 @@ class PanierAdmin(admin.ModelAdmin):
         # Créer une commande pour chaque client
         commandes_creees = 0
         for client, paniers in paniers_par_client.items():
-            # Obtenir l'état "En attente" ou créer si inexistant
-            etat_en_attente, _ = EtatCommande.objects.get_or_create(
-                libelle_etat=_("En attente"),
-                defaults={'libelle_etat': _("En attente")}
-            )
-            
-            # Créer la commande
-            commande = Commande.objects.create(
-                client=client,
-                etat_commande=etat_en_attente
-            )
-            
-            # Ajouter les produits du panier comme lignes de commande
-            for panier in paniers:
-                LigneCommande.objects.create(
-                    commande=commande,
-                    produit=panier.produit,
-                    quantite=panier.quantite,
-                    prix_unitaire=panier.produit.prix
-                )
+            # Créer la commande comme l'API : état initial , prix figés et événement de création (commandes.orders)
+            lignes = [
+                {'produit_id': panier.produit_id, 'article_id': None, 'quantite': panier.quantite}
+                for panier in paniers
+            ]
+            # les produits des paniers existent (clé étrangère) : seuls les prix effectifs sont utiles ici
+            produits = resolve_lines(lignes)[0]
+            place_order(lignes, produits, client=client)
             
             commandes_creees += 1
         
@@ -138,11 +134,11 @@ class RemiseAdmin(admin.ModelAdmin):
     list_filter = ('date_creation', 'taux_de_reduction')
     search_fields = ('commande__client__nom', 'commande__client__prenom')
     readonly_fields = ('montant_economise',)
+    list_select_related = ('commande',)
     
     def montant_economise(self, obj):
-        """Calcule le montant économisé grâce à la remise"""
-        total_commande = sum(ligne.prix_unitaire * ligne.quantite for ligne in obj.commande.lignes.all())
-        return (total_commande * obj.taux_de_reduction) / 100
+        """Calcule le montant économisé grâce à la remise , à partir du total brut enregistré sur la commande"""
+        return (obj.commande.total_brut * obj.taux_de_reduction) / 100
     montant_economise.short_description = _("Montant économisé")
 
 @admin.register(CodePromo)
@@ -198,3 +194,21 @@ class LigneCommandeAdmin(admin.ModelAdmin):
         """Optimise les requêtes en préchargeant les relations"""
         queryset = super().get_queryset(request)
         return queryset.select_related('commande', 'produit', 'article')
+
+
+@admin.register(EvenementCommande)
+class EvenementCommandeAdmin(admin.ModelAdmin):
+    """Admin pour la boîte d'envoi des commandes (consultation et relance des événements en échec)"""
+    list_display = ('id', 'type', 'commande', 'date_creation', 'date_traitement', 'tentatives')
+    list_filter = ('type', ('date_traitement', admin.EmptyFieldListFilter))
+    search_fields = ('commande__id',)
+    readonly_fields = [field.name for field in EvenementCommande._meta.fields]
+    actions = ['relancer']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description=_("Relancer les événements sélectionnés"))
+    def relancer(self, request, queryset):
+        total = queryset.filter(date_traitement__isnull=True).update(tentatives=0, prochain_essai=None)
+        self.message_user(request, _("%(count)d événement(s) relancé(s).") % {'count': total}, messages.SUCCESS)
@@ -5,6 +5,8 @@ from ..models import (
 )
 from clients.api.serializers import ClientSerializer
 from products.api.serializers import ProduitListSerializer
+from ..orders import place_order, resolve_lines
+from ..workflow import ETATS
 
 class EtatCommandeSerializer(serializers.ModelSerializer):
     """Serializer pour le modèle EtatCommande"""
@@ -20,6 +22,7 @@ class LigneCommandeSerializer(serializers.ModelSerializer):
         model = LigneCommande
         fields = ('id', 'commande', 'produit', 'produit_detail', 'article', 'quantite', 'prix_unitaire')
         read_only_fields = ('id', 'prix_unitaire')
+        expandable_fields = {'article': 'products.api.serializers.ArticleSerializer'}
 
 class RemiseSerializer(serializers.ModelSerializer):
     """Serializer pour le modèle Remise"""
@@ -34,6 +37,7 @@ class CodePromoSerializer(serializers.ModelSerializer):
         model = CodePromo
         fields = ('id', 'numero_promo', 'taux', 'commande', 'date_debut', 'date_fin', 'est_actif')
         read_only_fields = ('id',)
+        # pas de ?expand=commande : les codes promo sont lisibles par tout utilisateur connecté , les commandes non
 
 class RetourSerializer(serializers.ModelSerializer):
     """Serializer pour le modèle Retour"""
@@ -41,6 +45,8 @@ class RetourSerializer(serializers.ModelSerializer):
         model = Retour
         fields = ('id', 'commande', 'motif', 'date_retour', 'date_creation')
         read_only_fields = ('id', 'date_creation', 'date_retour')
+        # ?expand=commande : RetourViewSet ne liste que les retours des commandes du client connecté
+        expandable_fields = {'commande': 'commandes.api.serializers.CommandeListSerializer'}
 
 class CommandeListSerializer(serializers.ModelSerializer):
     """Serializer pour la liste des commandes"""
@@ -50,8 +56,12 @@ class CommandeListSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Commande
-        fields = ('id', 'client', 'client_nom', 'client_prenom', 'date_commande', 'etat_commande', 'etat', 'adresse', 'region')
-        read_only_fields = ('id', 'date_commande')
+        fields = (
+            'id', 'client', 'client_nom', 'client_prenom', 'date_commande', 'etat_commande', 'etat', 'adresse', 'region',
+            'total_brut', 'total_remise', 'total_net', 'nb_articles'
+        )
+        read_only_fields = ('id', 'date_commande', 'total_brut', 'total_remise', 'total_net', 'nb_articles')
+        expandable_fields = {'client': ClientSerializer, 'etat_commande': EtatCommandeSerializer}
 
 class CommandeDetailSerializer(serializers.ModelSerializer):
     """Serializer détaillé pour une commande avec ses relations"""
@@ -67,27 +77,54 @@ class CommandeDetailSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'client', 'date_commande', 'adresse', 'region', 
             'etat_commande', 'date_creation', 'date_modification',
+            'total_brut', 'total_remise', 'total_net', 'nb_articles',
             'lignes', 'remises', 'codes_promo', 'retours'
         )
         read_only_fields = ('id', 'date_commande', 'date_creation', 'date_modification')
 
+class LigneCommandeCreateSerializer(serializers.ModelSerializer):
+    """
+    Serializer pour les lignes d'une nouvelle commande : produit et article sont reçus comme identifiants ,
+    vérifiés ensemble par resolve_lines (une requête pour toutes les lignes) ; le prix unitaire est fixé à la création.
+    """
+    produit = serializers.IntegerField(source='produit_id')
+    article = serializers.IntegerField(source='article_id', required=False, allow_null=True)
+    quantite = serializers.IntegerField(min_value=1, default=1)
+
+    class Meta:
+        model = LigneCommande
+        fields = ('id', 'commande', 'produit', 'article', 'quantite', 'prix_unitaire')
+        read_only_fields = ('id', 'commande', 'prix_unitaire')
+
 class CommandeCreateSerializer(serializers.ModelSerializer):
     """Serializer pour la création d'une commande"""
-    lignes = LigneCommandeSerializer(many=True, required=False)
+    lignes = LigneCommandeCreateSerializer(many=True, required=False)
     
     class Meta:
         model = Commande
-        fields = ('id', 'client', 'adresse', 'region', 'etat_commande', 'lignes')
-        read_only_fields = ('id',)
+        fields = (
+            'id', 'client', 'adresse', 'region', 'etat_commande', 'lignes',
+            'total_brut', 'total_remise', 'total_net', 'nb_articles'
+        )
+        # l'état initial est fixé par le graphe des transitions (commandes.workflow)
+        read_only_fields = ('id', 'etat_commande', 'total_brut', 'total_remise', 'total_net', 'nb_articles')
+
+    def validate(self, attrs):
+        produits, errors = resolve_lines(attrs.get('lignes', []))
+        if any(errors):
+            raise serializers.ValidationError({'lignes': errors})
+        attrs['produits'] = produits
+        return attrs
     
     def create(self, validated_data):
+        # la commande et ses lignes sont écrites dans une transaction , les prix sont figés à la commande
         lignes_data = validated_data.pop('lignes', [])
-        commande = Commande.objects.create(**validated_data)
-        
-        for ligne_data in lignes_data:
-            LigneCommande.objects.create(commande=commande, **ligne_data)
-            
-        return commande
+        produits = validated_data.pop('produits')
+        return place_order(lignes_data, produits, **validated_data)
+
+class TransitionSerializer(serializers.Serializer):
+    """Serializer pour un changement d'état : le code de l'état visé , vérifié contre le graphe des transitions"""
+    etat = serializers.ChoiceField(choices=list(ETATS.items()))
 
 class PanierSerializer(serializers.ModelSerializer):
     """Serializer pour le modèle Panier"""
@@ -96,4 +133,5 @@ class PanierSerializer(serializers.ModelSerializer):
     class Meta:
         model = Panier
         fields = ('id', 'client', 'produit', 'produit_detail', 'quantite', 'date_ajout')
-        read_only_fields = ('id', 'date_ajout') 
\ No newline at end of file
+        read_only_fields = ('id', 'date_ajout')
+        expandable_fields = {'client': ClientSerializer} 
\ No newline at end of file
@@ -3,8 +3,14 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q
+from config.fastpath import FastListMixin
+from config.pagination import KeysetPagination
+from config.prefetch import PrefetchPlannerMixin, plan_queryset
+from config.sparse import SparseFieldsetsMixin
 
 from clients.models import Client
+from ..idempotency import IdempotencyMixin
+from ..workflow import TransitionInterdite, TransitionReservee, transition
 from ..models import (
     EtatCommande, Commande, Panier, Retour, 
     Remise, CodePromo, LigneCommande
@@ -12,7 +18,7 @@ from ..models import (
 from .serializers import (
     EtatCommandeSerializer, CommandeListSerializer, CommandeDetailSerializer,
     CommandeCreateSerializer, PanierSerializer, RetourSerializer,
-    RemiseSerializer, CodePromoSerializer, LigneCommandeSerializer
+    RemiseSerializer, CodePromoSerializer, LigneCommandeSerializer, TransitionSerializer
 )
 
 class IsOwnerOrAdmin(permissions.BasePermission):
@@ -37,7 +43,7 @@ class IsOwnerOrAdmin(permissions.BasePermission):
             # En cas d'erreur, seuls les administrateurs ont accès
             return request.user.is_staff
 
-class EtatCommandeViewSet(viewsets.ModelViewSet):
+class EtatCommandeViewSet(SparseFieldsetsMixin, PrefetchPlannerMixin, viewsets.ModelViewSet):
     """API pour gérer les états de commande"""
     queryset = EtatCommande.objects.all()
     serializer_class = EtatCommandeSerializer
@@ -49,16 +55,19 @@ class EtatCommandeViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.IsAdminUser]
         return [permission() for permission in permission_classes]
 
-class CommandeViewSet(viewsets.ModelViewSet):
+class CommandeViewSet(IdempotencyMixin, FastListMixin, SparseFieldsetsMixin, PrefetchPlannerMixin, viewsets.ModelViewSet):
     """API pour gérer les commandes"""
     queryset = Commande.objects.all()
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['client', 'etat_commande', 'date_commande']
     ordering_fields = ['date_commande', 'date_creation', 'date_modification']
+    pagination_class = KeysetPagination
     
     def get_serializer_class(self):
         if self.action == 'create':
             return CommandeCreateSerializer
+        elif self.action == 'transition':
+            return TransitionSerializer
         elif self.action == 'list':
             return CommandeListSerializer
         return CommandeDetailSerializer
@@ -73,22 +82,25 @@ class CommandeViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permission_classes]
     
     def get_queryset(self):
-        """Filtre les commandes pour n'afficher que celles de l'utilisateur connecté (sauf pour les admins)"""
+        """
+        Filtre les commandes pour n'afficher que celles de l'utilisateur connecté (sauf pour les admins).
+        Le queryset de base est planifié pour le serializer de l'action (PrefetchPlannerMixin) :
+        jointures pour le client et l'état , préchargements pour les lignes et leurs produits , remises ,
+        codes promo et retours du détail ; le nombre de requêtes ne dépend pas du nombre de commandes.
+        """
+        queryset = super().get_queryset()
         if self.request.user.is_staff:
-            return Commande.objects.all()
-        
-        try:
-            client = Client.objects.get(user=self.request.user)
-            return Commande.objects.filter(client=client)
-        except Client.DoesNotExist:
-            return Commande.objects.none()
+            return queryset
+        # un utilisateur sans profil client ne voit aucune commande , sans requête supplémentaire
+        return queryset.filter(client__user=self.request.user)
     
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def mes_commandes(self, request):
         """Point de terminaison pour récupérer les commandes de l'utilisateur connecté"""
         try:
             client = Client.objects.get(user=request.user)
-            commandes = Commande.objects.filter(client=client)
+            # relations et annotations préchargées d'après le serializer : nombre de requêtes constant
+            commandes = plan_queryset(Commande.objects.filter(client=client), CommandeListSerializer())
             serializer = CommandeListSerializer(commandes, many=True)
             return Response(serializer.data)
         except Client.DoesNotExist:
@@ -96,8 +108,30 @@ class CommandeViewSet(viewsets.ModelViewSet):
                 {"detail": "Profil client non trouvé pour cet utilisateur."},
                 status=status.HTTP_404_NOT_FOUND
             )
+    
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def transition(self, request, pk=None):
+        """
+        Change l'état de la commande selon le graphe des transitions (commandes.workflow).
+        Le client ne peut qu'annuler une commande en attente ; les autres transitions sont réservées au personnel.
+        Les effets de bord (e-mail , fidélité , statistiques) sont traités plus tard par le worker traiter_outbox.
+        """
+        commande = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            commande = transition(commande.pk, serializer.validated_data['etat'], staff=request.user.is_staff)
+        except TransitionReservee as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_403_FORBIDDEN)
+        except TransitionInterdite as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_409_CONFLICT)
+        return Response({
+            'id': commande.pk,
+            'etat_commande': commande.etat_commande_id,
+            'etat': commande.etat_commande.libelle_etat,
+        })
 
-class PanierViewSet(viewsets.ModelViewSet):
+class PanierViewSet(IdempotencyMixin, SparseFieldsetsMixin, PrefetchPlannerMixin, viewsets.ModelViewSet):
     """API pour gérer les paniers"""
     queryset = Panier.objects.all()
     serializer_class = PanierSerializer
@@ -110,21 +144,22 @@ class PanierViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Filtre les paniers pour n'afficher que ceux de l'utilisateur connecté (sauf pour les admins)"""
+        queryset = super().get_queryset()
         if self.request.user.is_staff:
-            return Panier.objects.all()
+            return queryset
         
         try:
             client = Client.objects.get(user=self.request.user)
-            return Panier.objects.filter(client=client)
+            return queryset.filter(client=client)
         except Client.DoesNotExist:
-            return Panier.objects.none()
+            return queryset.none()
     
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def mon_panier(self, request):
         """Point de terminaison pour récupérer le panier de l'utilisateur connecté"""
         try:
             client = Client.objects.get(user=request.user)
-            panier = Panier.objects.filter(client=client)
+            panier = plan_queryset(Panier.objects.filter(client=client), PanierSerializer())
             serializer = PanierSerializer(panier, many=True)
             return Response(serializer.data)
         except Client.DoesNotExist:
@@ -133,7 +168,7 @@ class PanierViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-class RetourViewSet(viewsets.ModelViewSet):
+class RetourViewSet(SparseFieldsetsMixin, PrefetchPlannerMixin, viewsets.ModelViewSet):
     """API pour gérer les retours"""
     queryset = Retour.objects.all()
     serializer_class = RetourSerializer
@@ -150,16 +185,17 @@ class RetourViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Filtre les retours pour n'afficher que ceux de l'utilisateur connecté (sauf pour les admins)"""
+        queryset = super().get_queryset()
         if self.request.user.is_staff:
-            return Retour.objects.all()
+            return queryset
         
         try:
             client = Client.objects.get(user=self.request.user)
-            return Retour.objects.filter(commande__client=client)
+            return queryset.filter(commande__client=client)
         except Client.DoesNotExist:
-            return Retour.objects.none()
+            return queryset.none()
 
-class CodePromoViewSet(viewsets.ModelViewSet):
+class CodePromoViewSet(SparseFieldsetsMixin, PrefetchPlannerMixin, viewsets.ModelViewSet):
     """API pour gérer les codes promo"""
     queryset = CodePromo.objects.all()
     serializer_class = CodePromoSerializer
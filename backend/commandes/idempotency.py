@@ -0,0 +1,93 @@
+# Ce fichier idempotency.py gère l'en-tête Idempotency-Key des créations (commandes , paniers).
+# Un client qui renvoie une requête après une coupure réseau , avec la même clé , reçoit la réponse
+# enregistrée lors du premier envoi au lieu de créer un doublon.
+# La clé est insérée (contrainte unique utilisateur + clé) dans la même transaction que la création :
+# une requête concurrente avec la même clé attend sur l'index unique la fin de la première ,
+# puis lit sa réponse ; aucun verrou applicatif n'est nécessaire.
+# pour plus d'informations : https://datatracker.ietf.org/doc/draft-ietf-httpapi-idempotency-key-header/
+
+import datetime
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import RequeteIdempotente
+
+HEADER = 'Idempotency-Key'
+
+# En-tête ajouté aux réponses rejouées
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+def request_fingerprint(request):
+    """Empreinte de la requête (méthode , chemin , corps) : une clé réutilisée pour une autre requête est refusée"""
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    body = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(f'{request.method} {request.path}\n{body}'.encode('utf-8')).hexdigest()
+
+
+def purge_expired(ttl=None):
+    """Supprime les clés plus anciennes que leur durée de validité ; retourne le nombre de lignes supprimées"""
+    limit = timezone.now() - datetime.timedelta(hours=ttl or settings.IDEMPOTENCY_KEY_TTL)
+    return RequeteIdempotente.objects.filter(date_creation__lt=limit).delete()[0]
+
+
+class IdempotencyMixin:
+    """
+    Rend create() idempotent pour les requêtes portant l'en-tête Idempotency-Key :
+    la réponse de la première création réussie est enregistrée avec l'empreinte de la requête
+    et rejouée telle quelle pour la même clé , sans toucher aux tables de la vue.
+    Une requête rejetée (validation , erreur serveur) annule la transaction et libère la clé.
+    Sans en-tête , create() est inchangé.
+    """
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return super().create(request, *args, **kwargs)
+        if not key or len(key) > 255:
+            return Response(
+                {"detail": f"En-tête {HEADER} invalide (1 à 255 caractères)."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fingerprint = request_fingerprint(request)
+        lookup = {'utilisateur': request.user, 'cle': key}
+        limit = timezone.now() - datetime.timedelta(hours=settings.IDEMPOTENCY_KEY_TTL)
+        with transaction.atomic():
+            # Clé expirée : la requête est traitée comme une nouvelle requête
+            RequeteIdempotente.objects.filter(**lookup, date_creation__lt=limit).delete()
+            try:
+                with transaction.atomic():
+                    entry = RequeteIdempotente.objects.create(**lookup, empreinte=fingerprint)
+            except IntegrityError:
+                entry = None
+            if entry is not None:
+                response = super().create(request, *args, **kwargs)
+                if response.status_code >= 500:
+                    # Erreur serveur : la clé est libérée , le client pourra réessayer
+                    entry.delete()
+                else:
+                    entry.code_statut, entry.reponse = response.status_code, response.data
+                    entry.save(update_fields=['code_statut', 'reponse'])
+                return response
+
+        # La clé en conflit a été validée avec sa réponse (l'insertion attend la fin de la première requête)
+        entry = RequeteIdempotente.objects.filter(**lookup).first()
+        if entry is None:
+            # Clé supprimée entre le conflit et la lecture (clé expirée remplacée puis libérée) : nouvel essai
+            return self.create(request, *args, **kwargs)
+        if entry.empreinte != fingerprint:
+            return Response(
+                {"detail": f"Cette clé {HEADER} a déjà été utilisée pour une autre requête."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        return Response(entry.reponse, status=entry.code_statut, headers={REPLAYED_HEADER: 'true'})
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from commandes.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    """
+    Supprime les clés Idempotency-Key expirées (RequeteIdempotente).
+    Une clé expirée est déjà ignorée par l'API ; cette commande , à planifier chaque jour , vide la table.
+    """
+    help = "Supprime les clés Idempotency-Key plus anciennes que IDEMPOTENCY_KEY_TTL"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ttl', type=int, default=settings.IDEMPOTENCY_KEY_TTL, help="Durée de validité des clés (en heures)"
+        )
+
+    def handle(self, *args, **options):
+        total = purge_expired(options['ttl'])
+        self.stdout.write(self.style.SUCCESS(f"{total} clé(s) expirée(s) supprimée(s)."))
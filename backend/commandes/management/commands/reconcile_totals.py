@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from commandes.totals import CHUNK_SIZE, reconcile_totals
+
+
+class Command(BaseCommand):
+    """
+    Recalcule les totaux dénormalisés des commandes qui ont divergé.
+    Les signaux et la prise de commande maintiennent les totaux ; cette commande rattrape les écritures
+    faites hors de l'ORM (SQL, scripts) , par paquets de commandes consécutives.
+    """
+    help = "Corrige par paquets les totaux des commandes (total brut, remises, net, nombre d'articles)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Nombre de commandes par paquet")
+
+    def handle(self, *args, **options):
+        total = reconcile_totals(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Totaux corrigés pour {total} commande(s)."))
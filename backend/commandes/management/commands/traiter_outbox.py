@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from commandes.outbox import drain
+
+
+class Command(BaseCommand):
+    """
+    Worker de la boîte d'envoi des commandes : traite les événements (création , changements d'état)
+    par paquets , hors des requêtes HTTP. Tourne en continu ; --once traite ce qui est en attente et s'arrête.
+    Plusieurs workers peuvent tourner en parallèle (lignes verrouillées avec SKIP LOCKED).
+    """
+    help = "Traite les événements de commande en attente (notifications, fidélité, statistiques)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE, help="Événements par paquet")
+        parser.add_argument(
+            '--interval', type=float, default=settings.OUTBOX_POLL_INTERVAL,
+            help="Attente (en secondes) quand la boîte d'envoi est vide"
+        )
+        parser.add_argument('--once', action='store_true', help="Vide la boîte d'envoi puis s'arrête")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total, echecs = 0, 0
+        try:
+            while True:
+                close_old_connections()
+                lus, en_echec = drain(batch_size)
+                total, echecs = total + lus, echecs + en_echec
+                if lus < batch_size:
+                    # boîte vide (ou seulement des événements en attente d'un nouvel essai)
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"{total} événement(s) traité(s) , {echecs} échec(s)."))
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0003_avis_avis_creation_id_idx_avis_avis_note_id_idx'),
+        ('commandes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='commande',
+            index=models.Index(fields=['date_commande', 'id'], name='commande_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commande',
+            index=models.Index(fields=['date_creation', 'id'], name='commande_creation_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commande',
+            index=models.Index(fields=['date_modification', 'id'], name='commande_modif_id_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:44
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Least, Round
+
+MONTANT = models.DecimalField(max_digits=12, decimal_places=2)
+TAUX = models.DecimalField(max_digits=7, decimal_places=2)
+
+
+def calculer_totaux(apps, schema_editor):
+    """
+    Remplit les totaux des commandes existantes : copie du calcul de commandes.totals au moment
+    de la migration (une migration ne dépend pas du code courant) , en une requête UPDATE
+    """
+    db = schema_editor.connection.alias
+    Commande = apps.get_model('commandes', 'Commande')
+    LigneCommande = apps.get_model('commandes', 'LigneCommande')
+    Remise = apps.get_model('commandes', 'Remise')
+    CodePromo = apps.get_model('commandes', 'CodePromo')
+
+    def somme(queryset, expression, output_field):
+        total = queryset.filter(commande=OuterRef('pk')).values('commande').annotate(total=Sum(expression)).values('total')
+        return Coalesce(Subquery(total, output_field=output_field), Value(0), output_field=output_field)
+
+    codes_actifs = CodePromo.objects.filter(
+        Q(date_debut__isnull=True) | Q(date_debut__lte=OuterRef('date_commande')),
+        Q(date_fin__isnull=True) | Q(date_fin__gte=OuterRef('date_commande')),
+        est_actif=True,
+    )
+    brut = somme(LigneCommande.objects, F('prix_unitaire') * F('quantite'), MONTANT)
+    taux = Least(
+        somme(Remise.objects, 'taux_de_reduction', TAUX) + somme(codes_actifs, 'taux', TAUX),
+        Value(Decimal(100)),
+        output_field=TAUX,
+    )
+    remise = Round(brut * taux / Value(Decimal(100)), 2, output_field=MONTANT)
+    Commande.objects.using(db).update(
+        total_brut=brut,
+        total_remise=remise,
+        total_net=brut - remise,
+        nb_articles=somme(LigneCommande.objects, 'quantite', models.PositiveIntegerField()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commandes', '0002_commande_commande_date_id_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commande',
+            name='nb_articles',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name="Nombre d'articles"),
+        ),
+        migrations.AddField(
+            model_name='commande',
+            name='total_brut',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Total brut'),
+        ),
+        migrations.AddField(
+            model_name='commande',
+            name='total_net',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Total net'),
+        ),
+        migrations.AddField(
+            model_name='commande',
+            name='total_remise',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Total des remises'),
+        ),
+        migrations.RunPython(calculer_totaux, migrations.RunPython.noop),
+    ]
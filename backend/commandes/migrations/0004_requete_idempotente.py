@@ -0,0 +1,35 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:48
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commandes', '0003_totaux'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequeteIdempotente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cle', models.CharField(max_length=255, verbose_name='Clé')),
+                ('empreinte', models.CharField(max_length=64, verbose_name='Empreinte de la requête')),
+                ('code_statut', models.PositiveSmallIntegerField(null=True, verbose_name='Code de statut')),
+                ('reponse', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Réponse')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('utilisateur', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Requête idempotente',
+                'verbose_name_plural': 'Requêtes idempotentes',
+                'indexes': [models.Index(fields=['date_creation'], name='requete_idempotente_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('utilisateur', 'cle'), name='requete_idempotente_cle_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:52
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# États du graphe des transitions (commandes.workflow) : code -> libellé
+ETATS = {
+    'en_attente': "En attente",
+    'confirmee': "Confirmée",
+    'expediee': "Expédiée",
+    'livree': "Livrée",
+    'annulee': "Annulée",
+    'retournee': "Retournée",
+}
+
+
+def creer_etats(apps, schema_editor):
+    """Associe les états existants de même libellé à leur code , et crée les états manquants"""
+    EtatCommande = apps.get_model('commandes', 'EtatCommande')
+    for code, libelle in ETATS.items():
+        existant = EtatCommande.objects.filter(libelle_etat__iexact=libelle, code__isnull=True).order_by('pk').first()
+        if existant is not None:
+            existant.code = code
+            existant.save(update_fields=['code'])
+        else:
+            EtatCommande.objects.get_or_create(code=code, defaults={'libelle_etat': libelle})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commandes', '0004_requete_idempotente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='etatcommande',
+            name='code',
+            field=models.SlugField(blank=True, null=True, unique=True, verbose_name='Code'),
+        ),
+        migrations.CreateModel(
+            name='EvenementCommande',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(max_length=50, verbose_name='Type')),
+                ('donnees', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Données')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('date_traitement', models.DateTimeField(blank=True, null=True, verbose_name='Date de traitement')),
+                ('tentatives', models.PositiveSmallIntegerField(default=0, verbose_name='Tentatives')),
+                ('prochain_essai', models.DateTimeField(blank=True, null=True, verbose_name='Prochain essai')),
+                ('erreur', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('commande', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='evenements', to='commandes.commande', verbose_name='Commande')),
+            ],
+            options={
+                'verbose_name': 'Événement de commande',
+                'verbose_name_plural': 'Événements de commande',
+                'ordering': ['id'],
+                'indexes': [models.Index(condition=models.Q(('date_traitement__isnull', True)), fields=['id'], name='evenement_a_traiter_idx')],
+            },
+        ),
+        migrations.RunPython(creer_etats, migrations.RunPython.noop),
+    ]
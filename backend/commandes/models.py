@@ -11,12 +11,16 @@
 # pour plus d'informations sur les relations : https://docs.djangoproject.com/en/4.2/topics/db/models/#relations
 
 from django.db import models
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils.translation import gettext_lazy as _ # pour les traductions de textes car on a des textes dans les models
 
 # Cette classe EtatCommande permet de gerer les états possibles d'une commande
 class EtatCommande(models.Model):
     """Modèle pour les états possibles d'une commande"""
     libelle_etat = models.CharField(_("Libellé"), max_length=255)
+    # Code stable de l'état dans le graphe des transitions (commandes.workflow) ; vide pour un état hors graphe
+    code = models.SlugField(_("Code"), max_length=50, unique=True, null=True, blank=True)
     
     
     class Meta:
@@ -48,12 +52,23 @@ class Commande(models.Model):
     )
     date_creation = models.DateTimeField(_("Date de création"), auto_now_add=True)
     date_modification = models.DateTimeField(_("Date de modification"), auto_now=True)
+    # Totaux dénormalisés , maintenus par commandes.totals à chaque écriture d'une ligne , remise ou code promo
+    total_brut = models.DecimalField(_("Total brut"), max_digits=12, decimal_places=2, default=0, editable=False)
+    total_remise = models.DecimalField(_("Total des remises"), max_digits=12, decimal_places=2, default=0, editable=False)
+    total_net = models.DecimalField(_("Total net"), max_digits=12, decimal_places=2, default=0, editable=False)
+    nb_articles = models.PositiveIntegerField(_("Nombre d'articles"), default=0, editable=False)
     
     # Cette classe Meta permet de gerer les métadonnées de la classe Commande
     class Meta:
         verbose_name = _("Commande")
         verbose_name_plural = _("Commandes")
         ordering = ['-date_creation']
+        # Index pour la pagination par curseur sur les tris de l'API (clé + id)
+        indexes = [
+            models.Index(fields=['date_commande', 'id'], name='commande_date_id_idx'),
+            models.Index(fields=['date_creation', 'id'], name='commande_creation_id_idx'),
+            models.Index(fields=['date_modification', 'id'], name='commande_modif_id_idx'),
+        ]
     
     def __str__(self):
         return f"Commande #{self.id} - {self.client}"
@@ -174,3 +189,67 @@ class LigneCommande(models.Model):
     
     def __str__(self):
         return f"Ligne {self.produit.nom} (x{self.quantite}) - Commande #{self.commande.id}"
+
+class RequeteIdempotente(models.Model):
+    """Réponse enregistrée d'une création envoyée avec un en-tête Idempotency-Key (maintenue par commandes.idempotency)"""
+    utilisateur = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name=_("Utilisateur")
+    )
+    cle = models.CharField(_("Clé"), max_length=255)
+    empreinte = models.CharField(_("Empreinte de la requête"), max_length=64) # sha256 de la méthode , du chemin et du corps
+    code_statut = models.PositiveSmallIntegerField(_("Code de statut"), null=True)
+    reponse = models.JSONField(_("Réponse"), null=True, encoder=DjangoJSONEncoder)
+    date_creation = models.DateTimeField(_("Date de création"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Requête idempotente")
+        verbose_name_plural = _("Requêtes idempotentes")
+        # Deux requêtes concurrentes avec la même clé sont sérialisées par cette contrainte
+        constraints = [
+            models.UniqueConstraint(fields=['utilisateur', 'cle'], name='requete_idempotente_cle_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['date_creation'], name='requete_idempotente_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.cle} ({self.code_statut})"
+
+
+# Cette classe EvenementCommande est la boîte d'envoi (outbox) des commandes :
+# chaque changement d'état écrit un événement dans la même transaction , traité ensuite par
+# le worker `traiter_outbox` (notifications , fidélité , statistiques) hors de la requête HTTP
+class EvenementCommande(models.Model):
+    """Événement d'une commande à traiter en arrière-plan (boîte d'envoi transactionnelle)"""
+    type = models.CharField(_("Type"), max_length=50)
+    commande = models.ForeignKey(
+        Commande,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="evenements",
+        verbose_name=_("Commande")
+    )
+    donnees = models.JSONField(_("Données"), default=dict, encoder=DjangoJSONEncoder)
+    date_creation = models.DateTimeField(_("Date de création"), auto_now_add=True)
+    date_traitement = models.DateTimeField(_("Date de traitement"), null=True, blank=True)
+    tentatives = models.PositiveSmallIntegerField(_("Tentatives"), default=0)
+    # Après un échec , l'événement n'est repris qu'à partir de cette date (attente croissante)
+    prochain_essai = models.DateTimeField(_("Prochain essai"), null=True, blank=True)
+    erreur = models.TextField(_("Dernière erreur"), blank=True)
+
+    class Meta:
+        verbose_name = _("Événement de commande")
+        verbose_name_plural = _("Événements de commande")
+        ordering = ['id']
+        indexes = [
+            # Index partiel : le worker ne parcourt que les événements en attente
+            models.Index(
+                fields=['id'], name='evenement_a_traiter_idx', condition=models.Q(date_traitement__isnull=True)
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.type} - commande #{self.commande_id}"
@@ -0,0 +1,68 @@
+# Ce fichier orders.py contient la prise de commande : une commande et toutes ses lignes
+# sont écrites dans une seule transaction, avec un nombre de requêtes indépendant du nombre de lignes.
+#   - resolve_lines : produits et articles de toutes les lignes lus en une requête , avec le prix effectif du jour ;
+#   - place_order : la commande puis ses lignes (bulk_create) , le prix unitaire de chaque ligne étant
+#     le prix effectif du produit au moment de la commande (il ne suit plus les changements de prix) ,
+#     et les totaux de la commande (commandes.totals) calculés dans la même transaction ;
+#     la commande démarre à l'état initial du graphe (commandes.workflow) et l'événement de création
+#     est écrit dans la boîte d'envoi avec elle.
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import transaction
+from django.db.models import Q
+
+from products.availability import schedule_availability_refresh
+from products.models import Produit
+from products.pricing import with_prix_effectif
+
+from .models import Commande, LigneCommande
+from .totals import TOTAL_FIELDS, update_totals
+from .workflow import COMMANDE_CREEE, ETAT_INITIAL, etat, record_event
+
+
+def resolve_lines(lignes):
+    """
+    Lit en une requête les produits des lignes (prix effectif et articles demandés) ;
+    retourne ({id produit: Produit}, erreurs par ligne) , une erreur vide ({}) pour une ligne valide.
+    """
+    produit_ids = {ligne['produit_id'] for ligne in lignes}
+    article_ids = {ligne['article_id'] for ligne in lignes if ligne.get('article_id') is not None}
+    produits = with_prix_effectif(Produit.objects.filter(pk__in=produit_ids)).annotate(
+        articles_ids=ArrayAgg('articles', filter=Q(articles__in=article_ids), default=[])
+    ).in_bulk()
+
+    errors = []
+    for ligne in lignes:
+        produit = produits.get(ligne['produit_id'])
+        if produit is None:
+            errors.append({'produit': ["Produit non trouvé."]})
+        elif ligne.get('article_id') is not None and ligne['article_id'] not in produit.articles_ids:
+            errors.append({'article': ["Article non trouvé pour ce produit."]})
+        else:
+            errors.append({})
+    return produits, errors
+
+
+def place_order(lignes, produits, **fields):
+    """
+    Crée la commande et ses lignes dans une transaction : une requête pour la commande , une pour les lignes.
+    Les lignes doivent avoir été vérifiées par resolve_lines , qui fournit `produits`.
+    """
+    with transaction.atomic():
+        commande = Commande.objects.create(etat_commande=etat(ETAT_INITIAL), **fields)
+        LigneCommande.objects.bulk_create([
+            LigneCommande(
+                commande=commande,
+                produit_id=ligne['produit_id'],
+                article_id=ligne.get('article_id'),
+                quantite=ligne['quantite'],
+                prix_unitaire=produits[ligne['produit_id']].prix_effectif,
+            )
+            for ligne in lignes
+        ])
+        # bulk_create n'envoie pas post_save : totaux et index de disponibilité sont mis à jour ici
+        update_totals([commande.pk])
+        commande.refresh_from_db(fields=TOTAL_FIELDS)
+        schedule_availability_refresh({ligne['produit_id'] for ligne in lignes if ligne.get('article_id') is not None})
+        record_event(commande, COMMANDE_CREEE, None, ETAT_INITIAL)
+    return commande
@@ -0,0 +1,131 @@
+# Ce fichier outbox.py traite la boîte d'envoi des commandes (EvenementCommande) en arrière-plan.
+# Le worker (`python manage.py traiter_outbox`) lit les événements en attente par paquets , dans l'ordre ,
+# et exécute pour chacun les traitements enregistrés (fidélité , statistiques , notification).
+# Chaque événement est traité dans sa propre transaction , qui ne verrouille que sa ligne
+# (SKIP LOCKED : plusieurs workers se partagent la boîte sans doublon) : ses écritures en base et sa date
+# de traitement sont validées ensemble , sans garder les autres événements du paquet verrouillés pendant
+# l'envoi d'un e-mail. Un événement en échec est annulé seul et repris plus tard (attente croissante)
+# jusqu'à OUTBOX_MAX_ATTEMPTS tentatives. Les e-mails sont envoyés au moins une fois.
+
+import datetime
+import logging
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from clients.models import Client
+
+from .models import EvenementCommande
+from .workflow import COMMANDE_CREEE, COMMANDE_TRANSITION, ETATS
+
+logger = logging.getLogger(__name__)
+analytics = logging.getLogger('commandes.analytics')
+
+# Traitements : (types d'événements, fonction) , exécutés dans l'ordre d'enregistrement
+HANDLERS = []
+
+
+def handler(*types):
+    """Enregistre une fonction (evenement, client) pour les types d'événements donnés"""
+    def register(fonction):
+        HANDLERS.append((types, fonction))
+        return fonction
+    return register
+
+
+@handler(COMMANDE_TRANSITION)
+def fidelite(evenement, client):
+    """Points de fidélité : crédités à la livraison , retirés au retour de la commande"""
+    donnees = evenement.donnees
+    if client is None or donnees['vers'] not in ('livree', 'retournee'):
+        return
+    points = int(Decimal(str(donnees['total_net'])) // settings.FIDELITE_MONTANT_PAR_POINT)
+    if donnees['vers'] == 'retournee':
+        points = -points
+    if points:
+        Client.objects.filter(pk=client.pk).update(point_de_fidelite=F('point_de_fidelite') + points)
+
+
+@handler(COMMANDE_CREEE, COMMANDE_TRANSITION)
+def statistiques(evenement, client):
+    """Trace des changements d'état pour les statistiques (logger commandes.analytics)"""
+    donnees = evenement.donnees
+    analytics.info(
+        "%s commande=%s client=%s de=%s vers=%s total_net=%s",
+        evenement.type, donnees['commande'], donnees['client'], donnees['de'], donnees['vers'], donnees['total_net'],
+        extra={'evenement': evenement.type, **donnees},
+    )
+
+
+# La notification est enregistrée en dernier : un e-mail n'est envoyé que si les traitements précédents ont réussi
+@handler(COMMANDE_CREEE, COMMANDE_TRANSITION)
+def notification(evenement, client):
+    """E-mail de suivi au client"""
+    email = client.user.email if client is not None else ''
+    if not email:
+        return
+    donnees = evenement.donnees
+    libelle = ETATS[donnees['vers']]
+    send_mail(
+        subject=f"Votre commande #{donnees['commande']} : {libelle}",
+        message=(
+            f"Bonjour {client.prenom},\n\n"
+            f"Votre commande #{donnees['commande']} ({donnees['total_net']}) est maintenant : {libelle}.\n\n"
+            "L'équipe Yoozak"
+        ),
+        from_email=None,
+        recipient_list=[email],
+    )
+
+
+def process(evenement, client):
+    for types, fonction in HANDLERS:
+        if evenement.type in types:
+            fonction(evenement, client)
+
+
+def pending(now=None):
+    """Événements à traiter : non traités , sous le nombre maximal de tentatives , attente écoulée"""
+    now = now or timezone.now()
+    return EvenementCommande.objects.filter(
+        Q(prochain_essai__isnull=True) | Q(prochain_essai__lte=now),
+        date_traitement__isnull=True,
+        tentatives__lt=settings.OUTBOX_MAX_ATTEMPTS,
+    )
+
+
+def drain(batch_size=None):
+    """Traite un paquet d'événements en attente ; retourne (nombre lu , nombre en échec)"""
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    now = timezone.now()
+    # paquet lu sans verrou : chaque événement est verrouillé , traité et validé seul
+    evenements = list(pending(now).order_by('pk')[:batch_size])
+    # clients (et leurs comptes) de tout le paquet lus en une requête
+    client_ids = {evenement.donnees.get('client') for evenement in evenements} - {None}
+    clients = Client.objects.select_related('user').in_bulk(client_ids)
+    echecs = 0
+    for lu in evenements:
+        with transaction.atomic():
+            # déjà traité ou pris par un autre worker depuis la lecture du paquet : ignoré
+            evenement = pending(now).select_for_update(skip_locked=True).filter(pk=lu.pk).first()
+            if evenement is None:
+                continue
+            try:
+                with transaction.atomic():
+                    process(evenement, clients.get(evenement.donnees.get('client')))
+            except Exception as exc:
+                echecs += 1
+                logger.exception("Échec de l'événement %s (%s)", evenement.pk, evenement.type)
+                evenement.tentatives += 1
+                evenement.erreur = f"{type(exc).__name__}: {exc}"
+                delai = settings.OUTBOX_POLL_INTERVAL * 2 ** evenement.tentatives
+                evenement.prochain_essai = now + datetime.timedelta(seconds=delai)
+            else:
+                evenement.date_traitement = now
+                evenement.erreur = ''
+            evenement.save(update_fields=['date_traitement', 'tentatives', 'erreur', 'prochain_essai'])
+    return len(evenements), echecs
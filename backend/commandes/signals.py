@@ -0,0 +1,54 @@
+# Ce fichier signals.py contient les signaux de l'application commandes
+# il permet de maintenir les totaux dénormalisés des commandes (commandes.totals) à chaque écriture
+# pour plus d'informations sur les signaux : https://docs.djangoproject.com/en/5.1/topics/signals/
+
+import weakref
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import CodePromo, Commande, LigneCommande, Remise
+from .totals import update_totals
+
+
+@receiver(pre_save, sender=LigneCommande)
+@receiver(pre_save, sender=Remise)
+@receiver(pre_save, sender=CodePromo)
+def commande_avant(sender, instance, **kwargs):
+    """Commande de la version enregistrée : ses totaux changent aussi si la ligne change de commande"""
+    instance._commande_avant = None
+    if instance.pk is not None:
+        instance._commande_avant = sender.objects.filter(pk=instance.pk).values_list('commande_id', flat=True).first()
+
+
+@receiver(post_save, sender=LigneCommande)
+@receiver(post_save, sender=Remise)
+@receiver(post_save, sender=CodePromo)
+def commande_totaux(sender, instance, **kwargs):
+    update_totals([instance.commande_id, getattr(instance, '_commande_avant', None)])
+
+
+# Suppression en cours (origine) -> commandes à recalculer ; l'entrée disparaît avec l'origine
+_suppressions = weakref.WeakKeyDictionary()
+
+
+@receiver(post_delete, sender=LigneCommande)
+@receiver(post_delete, sender=Remise)
+@receiver(post_delete, sender=CodePromo)
+def commande_totaux_suppression(sender, instance, origin=None, **kwargs):
+    """
+    Les lignes d'une suppression sont toutes effacées avant les signaux : une mise à jour par suppression
+    après la validation , pour toutes ses commandes , aucune si la commande elle-même est supprimée (cascade)
+    """
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if model is Commande:
+        return
+    commandes = _suppressions.get(origin) if origin is not None else None
+    if commandes is None:
+        commandes = set()
+        if origin is not None:
+            _suppressions[origin] = commandes
+        transaction.on_commit(lambda: update_totals(commandes))
+    commandes.add(instance.commande_id)
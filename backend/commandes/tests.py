@@ -1,3 +1,503 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from clients.models import Client
+from config.testing import FastPathParityMixin
+from products.models import Article, Produit, Promotion
+from .models import (
+    CodePromo, Commande, EtatCommande, EvenementCommande, LigneCommande, Remise, RequeteIdempotente, Retour
+)
+from .idempotency import purge_expired
+from .orders import place_order, resolve_lines
+from .outbox import drain, pending
+from .totals import reconcile_totals
+from .workflow import (
+    COMMANDE_TRANSITION, TRANSITIONS, TransitionInterdite, TransitionReservee, etat, transition
+)
+
+
+class CommandeFastPathTests(FastPathParityMixin, TestCase):
+    """
+    Parité du chemin rapide (config.fastpath) : la liste des commandes lue en .values()
+    doit produire les mêmes octets que CommandeListSerializer et le JSONRenderer de DRF.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', is_staff=True))
+        client = Client.objects.create(user=User.objects.create_user('client'), nom="Élodie", prenom="Zoé")
+        etat = EtatCommande.objects.create(libelle_etat="Expédiée")
+        Commande.objects.create(client=client, etat_commande=etat, adresse="12 rue des Orangers", region="Fès")
+        # Sans état : le champ etat est absent de la réponse , comme avec le serializer
+        Commande.objects.create(client=client, etat_commande=None)
+
+    def test_list_parity(self):
+        self.assertSameAsSerializer('/api/commandes/commandes/', queries=1)
+        self.assertSameAsSerializer('/api/commandes/commandes/?ordering=date_commande', queries=1)
+        self.assertSameAsSerializer('/api/commandes/commandes/?fields=id,etat,client_nom', queries=1)
+
+
+class CommandeQueryBudgetTests(TestCase):
+    """
+    Budget de requêtes des commandes : pour chaque action , le nombre de requêtes ne doit pas
+    dépendre du nombre de commandes de la page ni du nombre de lignes , remises et retours d'une commande.
+    """
+
+    def setUp(self):
+        self.api = APIClient()
+        self.admin = User.objects.create_user('admin', is_staff=True)
+        self.user = User.objects.create_user('client')
+        self.client_profile = Client.objects.create(user=self.user, nom="Benali", prenom="Sara")
+        self.etat = EtatCommande.objects.create(libelle_etat="En attente")
+        self.produits = [Produit.objects.create(nom=f"Produit {i}", prix=Decimal('100.00')) for i in range(20)]
+
+    def create_commande(self, nb_lignes=1):
+        commande = Commande.objects.create(client=self.client_profile, etat_commande=self.etat)
+        for index, produit in enumerate(self.produits[:nb_lignes]):
+            LigneCommande.objects.create(commande=commande, produit=produit, quantite=2, prix_unitaire=produit.prix)
+            Remise.objects.create(commande=commande, taux_de_reduction=Decimal('1.00'))
+            Retour.objects.create(commande=commande, motif="Taille")
+            CodePromo.objects.create(numero_promo=f"C{commande.pk}-{index}", taux=Decimal('1.00'), commande=commande)
+        return commande
+
+    def count_queries(self, user, url):
+        self.api.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.api.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assertConstantQueries(self, user, small_url, large_url):
+        self.assertEqual(self.count_queries(user, small_url), self.count_queries(user, large_url))
+
+    def test_list_budget(self):
+        for _ in range(12):
+            self.create_commande(nb_lignes=3)
+        for fast_path in (True, False):
+            with self.subTest(fast_path=fast_path), override_settings(FAST_PATH_LISTS=fast_path):
+                for user in (self.admin, self.user):
+                    self.assertConstantQueries(
+                        user, '/api/commandes/commandes/?page_size=2', '/api/commandes/commandes/?page_size=10'
+                    )
+
+    def test_detail_budget(self):
+        small, large = self.create_commande(nb_lignes=1), self.create_commande(nb_lignes=20)
+        for user in (self.admin, self.user):
+            self.assertConstantQueries(
+                user, f'/api/commandes/commandes/{small.pk}/', f'/api/commandes/commandes/{large.pk}/'
+            )
+
+    def test_mes_commandes_budget(self):
+        self.create_commande()
+        small = self.count_queries(self.user, '/api/commandes/commandes/mes_commandes/')
+        for _ in range(9):
+            self.create_commande(nb_lignes=2)
+        self.assertEqual(small, self.count_queries(self.user, '/api/commandes/commandes/mes_commandes/'))
+
+
+class PlaceOrderTests(TestCase):
+    """Prise de commande (commandes.orders) : requêtes constantes , transaction , prix figés et erreurs par ligne"""
+    URL = '/api/commandes/commandes/'
+
+    def setUp(self):
+        self.api = APIClient()
+        self.user = User.objects.create_user('client')
+        self.api.force_authenticate(self.user)
+        self.client_profile = Client.objects.create(user=self.user, nom="Benali", prenom="Sara")
+        self.produits = [Produit.objects.create(nom=f"Produit {i}", prix=Decimal('100.00')) for i in range(50)]
+        self.articles = [
+            Article.objects.create(produit=produit, couleur="Noir", pointure="40", code_bar=f"A{produit.pk}")
+            for produit in self.produits
+        ]
+
+    def lignes(self, nombre):
+        return [
+            {'produit': article.produit_id, 'article': article.pk, 'quantite': 2}
+            for article in self.articles[:nombre]
+        ]
+
+    def post(self, lignes):
+        return self.api.post(self.URL, {'client': self.client_profile.pk, 'lignes': lignes}, format='json')
+
+    def test_constant_queries(self):
+        counts = []
+        for nombre in (1, 50):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post(self.lignes(nombre))
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.data['nb_articles'], 2 * nombre)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_prix_figes(self):
+        """Le prix unitaire est le prix effectif (promotion comprise) au moment de la commande"""
+        produit = self.produits[0]
+        Promotion.objects.create(
+            produit=produit, type_promo="Soldes", reduction=Decimal('10.00'),
+            date_debut=date.today() - timedelta(days=1), date_fin=date.today() + timedelta(days=1)
+        )
+        response = self.post(self.lignes(1))
+        self.assertEqual(response.data['total_net'], '180.00')
+        Produit.objects.filter(pk=produit.pk).update(prix=Decimal('150.00'))
+        ligne = LigneCommande.objects.get(commande_id=response.data['id'])
+        self.assertEqual(ligne.prix_unitaire, Decimal('90.00'))
+
+    def test_errors_per_line(self):
+        autre = self.articles[1]
+        response = self.post([
+            {'produit': self.produits[0].pk, 'article': self.articles[0].pk},
+            {'produit': self.produits[0].pk, 'article': autre.pk},  # article d'un autre produit
+            {'produit': 999999},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['lignes'][0], {})
+        self.assertIn('article', response.data['lignes'][1])
+        self.assertIn('produit', response.data['lignes'][2])
+        self.assertFalse(Commande.objects.exists())
+
+    def test_rollback(self):
+        """Une écriture en échec annule la commande , ses lignes et son événement"""
+        lignes = [{'produit_id': self.produits[0].pk, 'article_id': self.articles[0].pk, 'quantite': 1}]
+        produits, errors = resolve_lines(lignes)
+        self.assertEqual(errors, [{}])
+        with mock.patch('commandes.orders.update_totals', side_effect=DatabaseError), self.assertRaises(DatabaseError):
+            place_order(lignes, produits, client=self.client_profile)
+        self.assertFalse(Commande.objects.exists())
+        self.assertFalse(LigneCommande.objects.exists())
+        self.assertFalse(EvenementCommande.objects.exists())
+
+
+class TotalsTests(TestCase):
+    """Totaux dénormalisés des commandes (commandes.totals) : maintenus par les signaux et réconciliés"""
+
+    def setUp(self):
+        self.client_profile = Client.objects.create(user=User.objects.create_user('client'), nom="Benali", prenom="Sara")
+        self.produit = Produit.objects.create(nom="Babouche", prix=Decimal('100.00'))
+        self.commande = Commande.objects.create(client=self.client_profile)
+
+    def ligne(self, commande=None, quantite=1, prix=Decimal('100.00')):
+        return LigneCommande.objects.create(
+            commande=commande or self.commande, produit=self.produit, quantite=quantite, prix_unitaire=prix
+        )
+
+    def totaux(self, commande=None):
+        commande = commande or self.commande
+        return tuple(
+            Commande.objects.filter(pk=commande.pk).values_list('total_brut', 'total_remise', 'total_net', 'nb_articles').get()
+        )
+
+    def test_lignes(self):
+        ligne = self.ligne(quantite=2)
+        self.ligne(prix=Decimal('50.00'))
+        self.assertEqual(self.totaux(), (Decimal('250.00'), Decimal('0.00'), Decimal('250.00'), 3))
+        ligne.quantite = 1
+        ligne.save()
+        self.assertEqual(self.totaux()[0], Decimal('150.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            ligne.delete()
+        self.assertEqual(self.totaux(), (Decimal('50.00'), Decimal('0.00'), Decimal('50.00'), 1))
+
+    def test_changement_de_commande(self):
+        autre = Commande.objects.create(client=self.client_profile)
+        ligne = self.ligne()
+        ligne.commande = autre
+        ligne.save()
+        self.assertEqual(self.totaux()[0], Decimal('0.00'))
+        self.assertEqual(self.totaux(autre)[0], Decimal('100.00'))
+
+    def test_remises_et_codes_actifs(self):
+        self.ligne(quantite=2)
+        Remise.objects.create(commande=self.commande, taux_de_reduction=Decimal('5.00'))
+        CodePromo.objects.create(numero_promo="ACTIF", taux=Decimal('10.00'), commande=self.commande)
+        # inactif , expiré ou pas encore commencé : sans effet
+        CodePromo.objects.create(numero_promo="INACTIF", taux=Decimal('20.00'), commande=self.commande, est_actif=False)
+        CodePromo.objects.create(
+            numero_promo="EXPIRE", taux=Decimal('20.00'), commande=self.commande, date_fin=date.today() - timedelta(days=1)
+        )
+        CodePromo.objects.create(
+            numero_promo="FUTUR", taux=Decimal('20.00'), commande=self.commande, date_debut=date.today() + timedelta(days=1)
+        )
+        self.assertEqual(self.totaux(), (Decimal('200.00'), Decimal('30.00'), Decimal('170.00'), 2))
+        # réactivé : compté , le taux total est plafonné à 100 %
+        code = CodePromo.objects.get(numero_promo="INACTIF")
+        code.est_actif, code.taux = True, Decimal('99.00')
+        code.save()
+        self.assertEqual(self.totaux(), (Decimal('200.00'), Decimal('200.00'), Decimal('0.00'), 2))
+
+    def test_cascade(self):
+        """Suppression de la commande : aucun recalcul ; suppression de lignes en masse : un recalcul par commande"""
+        autre = Commande.objects.create(client=self.client_profile)
+        for commande in (self.commande, self.commande, autre):
+            self.ligne(commande)
+        with mock.patch('commandes.signals.update_totals') as update, self.captureOnCommitCallbacks(execute=True):
+            LigneCommande.objects.all().delete()
+        update.assert_called_once_with({self.commande.pk, autre.pk})
+        # suppression suivante : recalcul propre , sans reprendre les commandes de la précédente
+        ligne = self.ligne()
+        with mock.patch('commandes.signals.update_totals') as update, self.captureOnCommitCallbacks(execute=True):
+            ligne.delete()
+        update.assert_called_once_with({self.commande.pk})
+        for _ in range(3):
+            self.ligne()
+        Remise.objects.create(commande=self.commande, taux_de_reduction=Decimal('5.00'))
+        with mock.patch('commandes.signals.update_totals') as update, self.captureOnCommitCallbacks(execute=True):
+            self.commande.delete()
+        update.assert_not_called()
+
+    def test_reconcile(self):
+        self.ligne(quantite=3)
+        autre = Commande.objects.create(client=self.client_profile)
+        self.ligne(autre)
+        expected = self.totaux()
+        Commande.objects.filter(pk=self.commande.pk).update(total_brut=0, total_net=0, nb_articles=0)
+        self.assertEqual(reconcile_totals(chunk_size=1), 1)
+        self.assertEqual(self.totaux(), expected)
+        self.assertEqual(reconcile_totals(), 0)
+
+
+class IdempotencyTests(TestCase):
+    """En-tête Idempotency-Key (commandes.idempotency) : rejeu , empreinte , clé libérée et expiration"""
+    URL = '/api/commandes/commandes/'
+
+    def setUp(self):
+        self.api = APIClient()
+        self.user = User.objects.create_user('client')
+        self.api.force_authenticate(self.user)
+        self.client_profile = Client.objects.create(user=self.user, nom="Benali", prenom="Sara")
+        self.produit = Produit.objects.create(nom="Babouche", prix=Decimal('100.00'))
+
+    def post(self, key='cle-1', quantite=1, **body):
+        data = {'client': self.client_profile.pk, 'lignes': [{'produit': self.produit.pk, 'quantite': quantite}], **body}
+        return self.api.post(self.URL, data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_replay(self):
+        first = self.post()
+        second = self.post()
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertNotIn('Idempotent-Replayed', first)
+        self.assertEqual(Commande.objects.count(), 1)
+        # clé propre à chaque utilisateur
+        autre = User.objects.create_user('autre')
+        self.api.force_authenticate(autre)
+        self.assertNotIn('Idempotent-Replayed', self.post(client=Client.objects.create(user=autre, nom="A", prenom="B").pk))
+        self.assertEqual(Commande.objects.count(), 2)
+
+    def test_fingerprint_mismatch(self):
+        self.post()
+        response = self.post(quantite=2)
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Commande.objects.count(), 1)
+
+    def test_rejected_request_frees_key(self):
+        response = self.post(lignes=[{'produit': 999999}])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(RequeteIdempotente.objects.exists())
+        self.assertEqual(self.post().status_code, 201)
+
+    def test_server_error_frees_key(self):
+        with mock.patch('commandes.api.serializers.place_order', side_effect=DatabaseError), self.assertRaises(DatabaseError):
+            self.post()
+        self.assertFalse(RequeteIdempotente.objects.exists())
+        self.assertEqual(self.post().status_code, 201)
+
+    def test_ttl(self):
+        self.post()
+        expired = timezone.now() - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL + 1)
+        RequeteIdempotente.objects.update(date_creation=expired)
+        # clé expirée : nouvelle création , même avec un autre corps
+        response = self.post(quantite=2)
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Commande.objects.count(), 2)
+        RequeteIdempotente.objects.update(date_creation=expired)
+        self.assertEqual(purge_expired(), 1)
+
+    def test_invalid_key(self):
+        for key in ('', 'x' * 256):
+            self.assertEqual(self.post(key=key).status_code, 400)
+        self.assertFalse(Commande.objects.exists())
+
+
+class WorkflowTests(TestCase):
+    """Graphe des transitions (commandes.workflow) : transitions autorisées , permissions , événements et états hors graphe"""
+
+    def setUp(self):
+        self.api = APIClient()
+        self.admin = User.objects.create_user('admin', is_staff=True)
+        self.user = User.objects.create_user('client')
+        self.client_profile = Client.objects.create(user=self.user, nom="Benali", prenom="Sara")
+        self.commande = Commande.objects.create(client=self.client_profile, etat_commande=etat('en_attente'))
+
+    def post(self, user, vers, commande=None):
+        self.api.force_authenticate(user)
+        return self.api.post(
+            f'/api/commandes/commandes/{(commande or self.commande).pk}/transition/', {'etat': vers}, format='json'
+        )
+
+    def test_graph(self):
+        for de, suivants in TRANSITIONS.items():
+            for vers in TRANSITIONS:
+                with self.subTest(de=de, vers=vers):
+                    Commande.objects.filter(pk=self.commande.pk).update(etat_commande=etat(de))
+                    if vers in suivants:
+                        self.assertEqual(transition(self.commande.pk, vers).etat_commande.code, vers)
+                    else:
+                        with self.assertRaises(TransitionInterdite):
+                            transition(self.commande.pk, vers)
+
+    def test_api_status(self):
+        self.assertEqual(self.post(self.user, 'confirmee').status_code, 403)  # réservée au personnel
+        self.assertEqual(self.post(self.admin, 'livree').status_code, 409)  # absente du graphe
+        self.assertEqual(self.post(self.admin, 'confirmee').status_code, 200)
+        self.assertEqual(self.post(self.user, 'annulee').status_code, 403)  # annulation client : en attente seulement
+        response = self.post(self.admin, 'annulee')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['etat'], "Annulée")
+
+    def test_client_cancel(self):
+        self.assertEqual(self.post(self.user, 'annulee').status_code, 200)
+        self.assertEqual(Commande.objects.get(pk=self.commande.pk).etat_commande.code, 'annulee')
+
+    def test_event_same_transaction(self):
+        transition(self.commande.pk, 'confirmee')
+        evenement = EvenementCommande.objects.get(type=COMMANDE_TRANSITION)
+        self.assertEqual(evenement.commande_id, self.commande.pk)
+        self.assertEqual(evenement.donnees['de'], 'en_attente')
+        self.assertEqual(evenement.donnees['vers'], 'confirmee')
+        # événement en échec : l'état n'est pas changé non plus
+        with mock.patch('commandes.workflow.record_event', side_effect=DatabaseError), self.assertRaises(DatabaseError):
+            transition(self.commande.pk, 'expediee')
+        self.assertEqual(Commande.objects.get(pk=self.commande.pk).etat_commande.code, 'confirmee')
+        self.assertEqual(EvenementCommande.objects.filter(type=COMMANDE_TRANSITION).count(), 1)
+
+    def test_etat_hors_graphe(self):
+        """Un état sans code : le personnel replace la commande dans le graphe , le client ne peut rien"""
+        ancien = EtatCommande.objects.create(libelle_etat="Payée")
+        commande = Commande.objects.create(client=self.client_profile, etat_commande=ancien)
+        self.assertEqual(self.post(self.user, 'annulee', commande).status_code, 403)
+        with self.assertRaises(TransitionInterdite):
+            transition(commande.pk, 'inconnu')
+        self.assertEqual(self.post(self.admin, 'expediee', commande).status_code, 200)
+        self.assertEqual(EvenementCommande.objects.get(commande=commande, type=COMMANDE_TRANSITION).donnees['de'], None)
+        # ensuite , le graphe s'applique
+        self.assertEqual(self.post(self.admin, 'confirmee', commande).status_code, 409)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend', FIDELITE_MONTANT_PAR_POINT=10, OUTBOX_POLL_INTERVAL=5
+)
+class OutboxTests(TestCase):
+    """Boîte d'envoi (commandes.outbox) : traitement , reprise avec attente croissante , fidélité et e-mails"""
+
+    def setUp(self):
+        user = User.objects.create_user('client', email="sara@example.com")
+        self.client_profile = Client.objects.create(user=user, nom="Benali", prenom="Sara")
+        produit = Produit.objects.create(nom="Babouche", prix=Decimal('125.00'))
+        lignes = [{'produit_id': produit.pk, 'quantite': 2}]
+        self.commande = place_order(lignes, resolve_lines(lignes)[0], client=self.client_profile)
+
+    def points(self):
+        return Client.objects.get(pk=self.client_profile.pk).point_de_fidelite
+
+    def test_drain(self):
+        for vers in ('confirmee', 'expediee', 'livree'):
+            transition(self.commande.pk, vers)
+        self.assertEqual(drain(), (4, 0))
+        self.assertFalse(pending().exists())
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertIn("Livrée", mail.outbox[-1].subject)
+        # 250 DH à la livraison : 25 points
+        self.assertEqual(self.points(), 25)
+        self.assertEqual(drain(), (0, 0))
+
+    def test_retour(self):
+        for vers in ('confirmee', 'expediee', 'livree', 'retournee'):
+            transition(self.commande.pk, vers)
+        drain()
+        self.assertEqual(self.points(), 0)
+
+    def test_retry_backoff(self):
+        """Un e-mail en échec annule l'événement (points compris) , repris après une attente croissante"""
+        for vers in ('confirmee', 'expediee', 'livree'):
+            transition(self.commande.pk, vers)
+        livraison = EvenementCommande.objects.get(donnees__vers='livree')
+
+        def send_mail(**kwargs):
+            if "Livrée" in kwargs['subject']:
+                raise ConnectionError("SMTP indisponible")
+
+        with mock.patch('commandes.outbox.send_mail', side_effect=send_mail):
+            self.assertEqual(drain(), (4, 1))
+        livraison.refresh_from_db()
+        self.assertIsNone(livraison.date_traitement)
+        self.assertEqual(livraison.tentatives, 1)
+        self.assertIn("SMTP indisponible", livraison.erreur)
+        self.assertEqual(self.points(), 0)
+        self.assertFalse(pending().exists())
+        self.assertEqual(list(pending(livraison.prochain_essai)), [livraison])
+        self.assertAlmostEqual(
+            (livraison.prochain_essai - timezone.now()).total_seconds(), 10, delta=2  # 5 s × 2¹
+        )
+
+        EvenementCommande.objects.filter(pk=livraison.pk).update(prochain_essai=None)
+        self.assertEqual(drain(), (1, 0))
+        self.assertEqual(self.points(), 25)
+
+    def test_max_attempts(self):
+        EvenementCommande.objects.update(tentatives=settings.OUTBOX_MAX_ATTEMPTS)
+        self.assertEqual(drain(), (0, 0))
+
+    def test_one_transaction_per_event(self):
+        """Chaque événement est validé dans sa propre transaction , e-mail compris"""
+        transition(self.commande.pk, 'confirmee')
+        depths = []
+        base = len(connection.savepoint_ids)  # transaction du test
+        with mock.patch('commandes.outbox.send_mail', side_effect=lambda **kwargs: depths.append(len(connection.savepoint_ids) - base)):
+            drain()
+        # un niveau pour la transaction de l'événement et un pour ses traitements , aucun pour le paquet
+        self.assertEqual(depths, [2, 2])
+
+
+class ExpandCommandeTests(TestCase):
+    """?expand=commande ne doit pas exposer la commande d'un autre client"""
+
+    def setUp(self):
+        self.api = APIClient()
+        victime = Client.objects.create(
+            user=User.objects.create_user('victime', email="victime@example.com"), nom="Benali", prenom="Sara",
+            phone="0611223344",
+        )
+        self.commande = Commande.objects.create(client=victime, adresse="12 rue des Orangers", region="Fes")
+        CodePromo.objects.create(numero_promo="PROMO10", taux=Decimal('10.00'), commande=self.commande)
+        Retour.objects.create(commande=self.commande, motif="Taille")
+        autre = User.objects.create_user('autre')
+        Client.objects.create(user=autre, nom="Alaoui", prenom="Omar")
+        self.api.force_authenticate(autre)
+
+    def assertNotExposed(self, response):
+        self.assertEqual(response.status_code, 200)
+        for secret in (b'victime@example.com', b'0611223344', b'12 rue des Orangers', b'client_nom'):
+            self.assertNotIn(secret, response.content)
+
+    def test_codes_promo(self):
+        response = self.api.get('/api/commandes/codes-promo/?expand=commande.client')
+        self.assertNotExposed(response)
+        self.assertEqual(response.data['results'][0]['commande'], self.commande.pk)
+
+    def test_retours(self):
+        response = self.api.get('/api/commandes/retours/?expand=commande.client')
+        self.assertNotExposed(response)
+        self.assertEqual(response.data['results'], [])
@@ -0,0 +1,94 @@
+# Ce fichier totals.py maintient les totaux dénormalisés de Commande :
+#   total_brut = somme des prix_unitaire × quantite des lignes , nb_articles = somme des quantités ,
+#   total_remise = total_brut × (taux des remises + taux des codes promo actifs) / 100 , plafonné au total brut ,
+#     un code promo étant actif s'il est marqué est_actif et que la date de la commande est dans sa période ;
+#   total_net = total_brut - total_remise.
+# Les totaux sont recalculés en SQL (une requête UPDATE à sous-requêtes corrélées) dans la transaction
+# de l'écriture qui les change (signaux sur LigneCommande , Remise et CodePromo , prise de commande) ;
+# une suppression les recalcule une fois après sa validation , pour toutes les commandes touchées.
+# La commande reconcile_totals recalcule par paquets les totaux qui auraient divergé (écritures en SQL...).
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, PositiveIntegerField, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Least, Round
+
+from .models import CodePromo, Commande, LigneCommande, Remise
+
+TOTAL_FIELDS = ('total_brut', 'total_remise', 'total_net', 'nb_articles')
+
+# Nombre de commandes vérifiées par requête lors de la réconciliation
+CHUNK_SIZE = 1000
+
+MONTANT = DecimalField(max_digits=12, decimal_places=2)
+TAUX = DecimalField(max_digits=7, decimal_places=2)
+
+
+def sum_subquery(queryset, expression, output_field):
+    """Somme d'une expression sur les lignes de la commande courante (OuterRef) , 0 si aucune ligne"""
+    total = queryset.filter(commande=OuterRef('pk')).values('commande').annotate(total=Sum(expression)).values('total')
+    return Coalesce(Subquery(total, output_field=output_field), Value(0), output_field=output_field)
+
+
+def codes_actifs():
+    """Codes promo actifs à la date de la commande courante (OuterRef)"""
+    return CodePromo.objects.filter(
+        Q(date_debut__isnull=True) | Q(date_debut__lte=OuterRef('date_commande')),
+        Q(date_fin__isnull=True) | Q(date_fin__gte=OuterRef('date_commande')),
+        est_actif=True,
+    )
+
+
+def total_expressions():
+    """Expressions SQL des totaux d'une commande , utilisables dans annotate() et update()"""
+    brut = sum_subquery(LigneCommande.objects, F('prix_unitaire') * F('quantite'), MONTANT)
+    taux = Least(
+        sum_subquery(Remise.objects, 'taux_de_reduction', TAUX) + sum_subquery(codes_actifs(), 'taux', TAUX),
+        Value(Decimal(100)),
+        output_field=TAUX,
+    )
+    remise = Round(brut * taux / Value(Decimal(100)), 2, output_field=MONTANT)
+    return {
+        'total_brut': brut,
+        'total_remise': remise,
+        'total_net': brut - remise,
+        'nb_articles': sum_subquery(LigneCommande.objects, 'quantite', PositiveIntegerField()),
+    }
+
+
+def update_totals(commande_ids):
+    """
+    Recalcule les totaux des commandes données dans la transaction en cours.
+    Les commandes sont d'abord verrouillées (dans l'ordre des ids) : l'UPDATE qui suit voit alors
+    les lignes validées par une transaction concurrente sur la même commande.
+    """
+    commande_ids = sorted({pk for pk in commande_ids if pk is not None})
+    if not commande_ids:
+        return
+    with transaction.atomic():
+        list(Commande.objects.select_for_update().filter(pk__in=commande_ids).order_by('pk').values_list('pk'))
+        Commande.objects.filter(pk__in=commande_ids).update(**total_expressions())
+
+
+def drifted(commande_ids):
+    """Ids des commandes dont les totaux enregistrés diffèrent du calcul"""
+    expected = {f'attendu_{name}': expression for name, expression in total_expressions().items()}
+    return list(
+        Commande.objects.filter(pk__in=commande_ids).annotate(**expected).exclude(
+            **{name: F(f'attendu_{name}') for name in TOTAL_FIELDS}
+        ).values_list('pk', flat=True)
+    )
+
+
+def reconcile_totals(chunk_size=CHUNK_SIZE):
+    """Parcourt les commandes par paquets (par clé) et corrige les totaux divergents ; retourne le nombre corrigé"""
+    last, total = 0, 0
+    while True:
+        ids = list(Commande.objects.filter(pk__gt=last).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return total
+        ids_drifted = drifted(ids)
+        update_totals(ids_drifted)
+        total += len(ids_drifted)
+        last = ids[-1]
@@ -0,0 +1,98 @@
+# Ce fichier workflow.py décrit le cycle de vie d'une commande : les états (EtatCommande.code)
+# et le graphe des transitions autorisées entre eux.
+# Chaque changement d'état (et la création d'une commande) écrit un EvenementCommande dans la même
+# transaction : les effets de bord (e-mails , fidélité , statistiques) sont exécutés plus tard par
+# le worker `traiter_outbox` (commandes.outbox) , la requête HTTP n'attend jamais sur eux.
+# pour plus d'informations : https://microservices.io/patterns/data/transactional-outbox.html
+
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+
+from .models import Commande, EtatCommande, EvenementCommande
+
+# États du graphe : code -> libellé (les lignes EtatCommande sont créées par la migration 0005)
+ETATS = {
+    'en_attente': _("En attente"),
+    'confirmee': _("Confirmée"),
+    'expediee': _("Expédiée"),
+    'livree': _("Livrée"),
+    'annulee': _("Annulée"),
+    'retournee': _("Retournée"),
+}
+
+ETAT_INITIAL = 'en_attente'
+
+# Transitions autorisées : état courant -> états suivants possibles
+TRANSITIONS = {
+    'en_attente': ('confirmee', 'annulee'),
+    'confirmee': ('expediee', 'annulee'),
+    'expediee': ('livree',),
+    'livree': ('retournee',),
+    'annulee': (),
+    'retournee': (),
+}
+
+# Transitions qu'un client peut demander sur ses propres commandes (les autres sont réservées au personnel)
+TRANSITIONS_CLIENT = {('en_attente', 'annulee')}
+
+# Une commande dans un état hors graphe (EtatCommande sans code , non reconnu par la migration 0005)
+# n'a pas de transition dans le graphe : le personnel la replace dans l'état du graphe de son choix ,
+# ensuite elle suit le graphe. Le client ne peut rien demander sur une telle commande.
+
+# Types d'événements écrits dans la boîte d'envoi
+COMMANDE_CREEE = 'commande.creee'
+COMMANDE_TRANSITION = 'commande.transition'
+
+
+class TransitionInterdite(Exception):
+    """Transition absente du graphe depuis l'état courant de la commande"""
+
+
+class TransitionReservee(TransitionInterdite):
+    """Transition du graphe que seul le personnel peut demander"""
+
+
+def etat(code):
+    return EtatCommande.objects.get(code=code)
+
+
+def record_event(commande, type, de, vers):
+    """Écrit l'événement dans la transaction en cours ; les données suffisent au worker sans relire la commande"""
+    return EvenementCommande.objects.create(
+        type=type,
+        commande=commande,
+        donnees={
+            'commande': commande.pk,
+            'client': commande.client_id,
+            'de': de,
+            'vers': vers,
+            'total_net': commande.total_net,
+        },
+    )
+
+
+def transition(commande_id, vers, staff=True):
+    """
+    Fait passer la commande à l'état `vers` et écrit l'événement dans la même transaction.
+    La commande est verrouillée pendant la vérification : deux transitions concurrentes
+    partent chacune de l'état validé par l'autre. Lève TransitionInterdite si le graphe ne l'autorise pas.
+    Une commande dans un état hors graphe (sans code) peut être placée par le personnel dans tout état du graphe.
+    """
+    with transaction.atomic():
+        commande = Commande.objects.select_for_update(of=('self',)).select_related('etat_commande').get(pk=commande_id)
+        de = commande.etat_commande.code if commande.etat_commande else ETAT_INITIAL
+        if de is None:
+            if vers not in ETATS:
+                raise TransitionInterdite(f"État inconnu : « {vers} ».")
+            if not staff:
+                raise TransitionReservee(
+                    f"Commande dans un état hors graphe (« {commande.etat_commande.libelle_etat} ») : réservée au personnel."
+                )
+        elif vers not in TRANSITIONS.get(de, ()):
+            raise TransitionInterdite(f"Transition impossible de « {de} » vers « {vers} ».")
+        elif not staff and (de, vers) not in TRANSITIONS_CLIENT:
+            raise TransitionReservee(f"Transition « {de} » vers « {vers} » réservée au personnel.")
+        commande.etat_commande = etat(vers)
+        commande.save(update_fields=['etat_commande', 'date_modification'])
+        record_event(commande, COMMANDE_TRANSITION, de, vers)
+    return commande
@@ -0,0 +1,125 @@
+# Ce fichier conditional.py permet de répondre aux requêtes GET conditionnelles
+# (If-None-Match / If-Modified-Since) sans exécuter le queryset ni le serializer.
+# Chaque modèle suivi a un numéro de version dans le cache Django, incrémenté à chaque écriture
+# (voir les signaux des applications). Les ETag faibles sont calculés à partir de ces versions :
+# une réponse change dès qu'un des modèles dont elle dépend est modifié.
+# Une réponse qui dépend aussi du jour (ex: le prix effectif , selon les promotions actives) change à minuit
+# sans écriture : la date locale entre alors dans l'ETag et Last-Modified ne précède jamais minuit.
+# Les versions doivent être partagées entre processus : en production, le cache est Redis (REDIS_URL).
+# pour plus d'informations : https://docs.djangoproject.com/en/5.1/topics/conditional-view-processing/
+
+import datetime
+import hashlib
+import math
+import time
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+VERSION_KEY = 'version:{}'
+MODIFIED_KEY = 'version-modified:{}'
+
+
+def model_label(model):
+    """Libellé d'un modèle (ex: 'products.produit'), accepte une classe ou un libellé"""
+    return model.lower() if isinstance(model, str) else model._meta.label_lower
+
+
+def initial_version():
+    """
+    Version de départ d'un modèle absent du cache : l'horodatage en millisecondes,
+    pour qu'un cache vidé ne redonne jamais une version (et donc un ETag) déjà utilisée
+    """
+    return int(time.time() * 1000)
+
+
+def bump_version(*models):
+    """Incrémente la version des modèles donnés (à appeler après chaque écriture)"""
+    now = time.time()
+    for model in models:
+        label = model_label(model)
+        try:
+            cache.incr(VERSION_KEY.format(label))
+        except ValueError:
+            cache.set(VERSION_KEY.format(label), initial_version(), None)
+        cache.set(MODIFIED_KEY.format(label), now, None)
+
+
+def get_versions(models):
+    """Retourne ({libellé: version}, date de dernière modification) pour les modèles donnés"""
+    labels = sorted({model_label(model) for model in models})
+    keys = [VERSION_KEY.format(label) for label in labels] + [MODIFIED_KEY.format(label) for label in labels]
+    values = cache.get_many(keys)
+    versions, modified = {}, []
+    for label in labels:
+        version = values.get(VERSION_KEY.format(label))
+        if version is None:
+            version = initial_version()
+            cache.add(VERSION_KEY.format(label), version, None)
+            version = cache.get(VERSION_KEY.format(label), version)
+        versions[label] = version
+        if values.get(MODIFIED_KEY.format(label)) is None:
+            cache.add(MODIFIED_KEY.format(label), time.time(), None)
+            values[MODIFIED_KEY.format(label)] = cache.get(MODIFIED_KEY.format(label), time.time())
+        modified.append(values[MODIFIED_KEY.format(label)])
+    return versions, max(modified, default=time.time())
+
+
+def versions_key(versions):
+    return ','.join(f'{label}={version}' for label, version in versions.items())
+
+
+def versions_token(models):
+    """Chaîne courte identifiant l'état des modèles donnés (pour les clés de cache)"""
+    versions, _ = get_versions(models)
+    return versions_key(versions)
+
+
+class ConditionalGetMixin:
+    """
+    Mixin pour les ViewSets : ajoute ETag (faible) et Last-Modified aux réponses de liste et de détail,
+    et répond 304 Not Modified avant tout accès aux données quand le client a déjà la bonne version.
+    Les modèles dont dépendent les réponses sont déclarés dans `version_models` ; `depends_on_date`
+    indique une réponse qui change aussi avec la date du jour.
+    """
+    version_models = ()
+    depends_on_date = False
+
+    def get_validators(self, request):
+        """
+        Retourne (ETag, Last-Modified) : l'ETag dépend de l'URL complète, du format demandé et des versions.
+        Last-Modified est en secondes entières , arrondi à la seconde supérieure ; il est omis (None)
+        tant que cette seconde n'est pas écoulée : une écriture dans la même seconde aurait la même date
+        et un client qui n'envoie que If-Modified-Since recevrait un 304 périmé.
+        """
+        versions, last_modified = get_versions(self.version_models)
+        parts = [request.get_full_path(), request.META.get('HTTP_ACCEPT', ''), versions_key(versions)]
+        if self.depends_on_date:
+            today = timezone.localdate()
+            parts.append(today.isoformat())
+            midnight = timezone.make_aware(datetime.datetime.combine(today, datetime.time()))
+            last_modified = max(last_modified, midnight.timestamp())
+        source = '|'.join(parts)
+        last_modified = math.ceil(last_modified)
+        if last_modified > time.time():
+            last_modified = None
+        return f'W/"{hashlib.md5(source.encode("utf-8")).hexdigest()}"', last_modified
+
+    def conditional(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,198 @@
+# Ce fichier fastpath.py contient le chemin rapide des listes en lecture seule.
+# Au lieu d'instancier un modèle par ligne puis de parcourir les champs du serializer,
+# la liste lit des dictionnaires avec .values() et les convertit par un "mapper" compilé
+# une fois par serializer : pour chaque champ, la colonne à lire et la conversion à appliquer
+# (aucune pour le texte et les entiers, to_representation du champ pour les décimaux et les dates).
+# La réponse est identique octet pour octet à celle du serializer (voir les tests de parité).
+# Un serializer qui ne s'y prête pas (méthode, objet imbriqué, propriété...) garde le chemin normal.
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.response import Response
+
+# Nombre de mappers gardés en mémoire (un par serializer et combinaison de ?fields=)
+MAPPER_CACHE_SIZE = 128
+
+# Champs lus tels quels quand la colonne a déjà le bon type Python
+IDENTITY_FIELDS = {
+    serializers.CharField: ('CharField', 'TextField', 'EmailField', 'SlugField', 'URLField'),
+    serializers.EmailField: ('CharField', 'EmailField'),
+    serializers.IntegerField: (
+        'AutoField', 'BigAutoField', 'SmallAutoField', 'IntegerField', 'BigIntegerField',
+        'SmallIntegerField', 'PositiveIntegerField', 'PositiveBigIntegerField', 'PositiveSmallIntegerField',
+    ),
+    serializers.BooleanField: ('BooleanField',),
+}
+
+# Champs convertis par leur to_representation (indépendant du contexte de la requête)
+CONVERTED_FIELDS = (
+    serializers.CharField, serializers.EmailField, serializers.IntegerField, serializers.BooleanField,
+    serializers.FloatField, serializers.DecimalField, serializers.DateField, serializers.DateTimeField,
+    serializers.TimeField, serializers.UUIDField, serializers.ChoiceField,
+)
+# Champ des clés BigAutoField , ajouté dans DRF 3.15
+if hasattr(serializers, 'BigIntegerField'):
+    CONVERTED_FIELDS += (serializers.BigIntegerField,)
+
+# Le champ est absent de la réponse quand une relation traversée est nulle (comportement de DRF)
+SKIP = object()
+
+
+class RowMapper:
+    """Convertit des lignes .values() en dictionnaires identiques à ceux du serializer"""
+
+    def __init__(self, columns):
+        # columns : [(nom du champ, colonne, colonnes des relations nullables, conversion, valeur si relation nulle)]
+        self.columns = columns
+        self.values_fields = list(dict.fromkeys(
+            name for _, column, nullable, _, _ in columns for name in (*nullable, column)
+        ))
+
+    def get_values(self, queryset):
+        """Queryset .values() des colonnes du mapper et des clés de tri (utilisées par la pagination)"""
+        model = queryset.model
+        names = [model._meta.pk.name]
+        for name in queryset.query.order_by or model._meta.ordering:
+            if not isinstance(name, str):
+                continue
+            name = name.lstrip('-')
+            if name == 'pk':
+                continue
+            if name in queryset.query.annotation_select:
+                names.append(name)
+                continue
+            try:
+                if model._meta.get_field(name).concrete:
+                    names.append(name)
+            except FieldDoesNotExist:
+                pass
+        return queryset.prefetch_related(None).values(*dict.fromkeys(self.values_fields + names))
+
+    def map_row(self, row):
+        data = {}
+        for name, column, nullable, convert, missing in self.columns:
+            if nullable and any(row[key] is None for key in nullable):
+                if missing is not SKIP:
+                    data[name] = missing
+                continue
+            value = row[column]
+            data[name] = value if value is None or convert is None else convert(value)
+        return data
+
+    def map_rows(self, rows):
+        return [self.map_row(row) for row in rows]
+
+
+def compile_field(field, model):
+    """Retourne (colonne, relations nullables, conversion, valeur si relation nulle) ou None"""
+    if hasattr(field, 'get_annotation'):
+        # Champ annoté en SQL (config.prefetch) : la colonne est l'annotation
+        return field.source, (), field.to_representation, None
+
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        if type(field) is not serializers.PrimaryKeyRelatedField or field.pk_field is not None:
+            return None
+    elif type(field) not in CONVERTED_FIELDS:
+        return None
+
+    current_model, path, nullable = model, '', []
+    attrs = field.source_attrs
+    for index, attr in enumerate(attrs):
+        last = index == len(attrs) - 1
+        try:
+            model_field = current_model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete:
+            return None
+        if last:
+            if model_field.is_relation and not isinstance(field, serializers.PrimaryKeyRelatedField):
+                return None
+            break
+        # Relation traversée (ex: 'client.nom') : uniquement une clé étrangère ou un OneToOne
+        if not (model_field.many_to_one or model_field.one_to_one):
+            return None
+        if model_field.null:
+            nullable.append(path + attr)
+        current_model, path = model_field.related_model, path + attr + '__'
+
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        convert = None
+    else:
+        convert = field.to_representation
+        if model_field.get_internal_type() in IDENTITY_FIELDS.get(type(field), ()):
+            convert = None
+
+    # Relation nulle sur le chemin : DRF renvoie None (allow_null) ou omet le champ ;
+    # un champ avec une valeur par défaut garde le chemin normal
+    missing = None
+    if nullable:
+        if field.default is not empty:
+            return None
+        if not field.allow_null:
+            if field.required:
+                return None
+            missing = SKIP
+    return path + attrs[-1], tuple(nullable), convert, missing
+
+
+def compile_serializer(serializer):
+    """Compile le mapper d'un serializer de liste , ou None s'il n'a pas de chemin rapide"""
+    serializer = getattr(serializer, 'child', serializer)
+    if not isinstance(serializer, serializers.ModelSerializer):
+        return None
+    if type(serializer).to_representation is not serializers.Serializer.to_representation:
+        return None
+    model = serializer.Meta.model
+    columns = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            return None
+        compiled = compile_field(field, model)
+        if compiled is None:
+            return None
+        columns.append((name, *compiled))
+    return RowMapper(columns)
+
+
+_mappers = {}
+
+
+def get_row_mapper(serializer):
+    """Mapper du serializer , compilé à la première utilisation de cette combinaison de champs"""
+    serializer = getattr(serializer, 'child', serializer)
+    key = (type(serializer), tuple((name, type(field)) for name, field in serializer.fields.items()))
+    mapper = _mappers.get(key, empty)
+    if mapper is empty:
+        if len(_mappers) >= MAPPER_CACHE_SIZE:
+            _mappers.clear()
+        mapper = _mappers[key] = compile_serializer(serializer)
+    return mapper
+
+
+class FastListMixin:
+    """
+    Mixin pour les ViewSets : l'action list lit des lignes .values() converties par le mapper
+    compilé du serializer, au lieu d'instancier et de sérialiser un modèle par ligne.
+    Désactivable par le réglage FAST_PATH_LISTS.
+    """
+
+    def get_row_mapper(self):
+        if not settings.FAST_PATH_LISTS:
+            return None
+        return get_row_mapper(self.get_serializer())
+
+    def list(self, request, *args, **kwargs):
+        mapper = self.get_row_mapper()
+        if mapper is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = mapper.get_values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(mapper.map_rows(page))
+        return Response(mapper.map_rows(queryset))
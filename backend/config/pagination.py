@@ -0,0 +1,172 @@
+# Ce fichier pagination.py contient la pagination par curseur (keyset) partagée par les APIs.
+# Contrairement à PageNumberPagination, elle n'exécute ni COUNT(*) ni OFFSET :
+# chaque page est lue par un parcours d'index à partir de la dernière ligne de la page précédente,
+# quel que soit le numéro de la page.
+# pour plus d'informations : https://www.django-rest-framework.org/api-guide/pagination/#cursorpagination
+
+import datetime
+import json
+import uuid
+from decimal import Decimal
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class RowValue(models.Func):
+    """Expression SQL de valeur de ligne, ex: (prix, id), pour comparer deux colonnes à la fois"""
+    template = '(%(expressions)s)'
+    arg_joiner = ', '
+    output_field = models.Field()
+
+
+def encode_value(value):
+    """Convertit les valeurs de clé (Decimal, dates...) en texte sans perte de précision"""
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f"Type non sérialisable dans un curseur : {type(value).__name__}")
+
+
+class CursorSerializer:
+    """Sérialiseur JSON utilisé par django.core.signing pour les curseurs"""
+
+    def dumps(self, obj):
+        return json.dumps(obj, default=encode_value, separators=(',', ':')).encode('latin-1')
+
+    def loads(self, data):
+        return json.loads(data.decode('latin-1'))
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Pagination par curseur sur le tri actif de la vue.
+
+    La clé de tri est le premier champ de `?ordering=` s'il fait partie des `ordering_fields`
+    de la vue ou des annotations du queryset, comme la pertinence d'une recherche
+    (sinon l'ordre par défaut du modèle, sinon l'id), complétée par l'id pour
+    départager les égalités. Le curseur est opaque et signé : il ne peut pas être forgé.
+    Un tri sur plusieurs champs (`?ordering=a,b`) est refusé (400) : la clé ne porte que sur un champ.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    salt = 'config.pagination.keyset'
+    invalid_cursor_message = "Curseur invalide."
+    multiple_ordering_message = "La pagination par curseur n'accepte qu'un seul champ de tri."
+
+    def get_keyset(self, queryset, view):
+        """Retourne (champ, descendant) pour la clé de tri à utiliser"""
+        allowed = getattr(view, 'ordering_fields', None) or []
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        if ordering and isinstance(ordering[0], str):
+            name = ordering[0].lstrip('-')
+            allowed_name = name in allowed or name in queryset.query.annotations
+            if allowed_name and self.get_key_field(queryset, name) is not None:
+                return name, ordering[0].startswith('-')
+        return 'pk', False
+
+    def get_key_field(self, queryset, name):
+        """Retourne le champ modèle de la clé, ou None s'il ne peut pas servir de clé (NULL possibles)"""
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        try:
+            field = queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if field.null or field.is_relation:
+            return None
+        return field
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        ordering = request.query_params.get(api_settings.ORDERING_PARAM, '')
+        if len([term for term in ordering.split(',') if term.strip()]) > 1:
+            raise ValidationError({api_settings.ORDERING_PARAM: [self.multiple_ordering_message]})
+
+        self.base_url = request.build_absolute_uri()
+        self.key, self.descending = self.get_keyset(queryset, view)
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['previous'])
+
+        # Sens de parcours effectif : une page précédente se lit à rebours
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        if self.key == 'pk':
+            queryset = queryset.order_by(prefix + 'pk')
+        else:
+            queryset = queryset.order_by(prefix + self.key, prefix + 'pk')
+
+        if cursor is not None:
+            lookup = 'lt' if descending else 'gt'
+            if self.key == 'pk':
+                queryset = queryset.filter(**{f'pk__{lookup}': cursor['pk']})
+            else:
+                value = self.get_key_field(queryset, self.key).to_python(cursor['value'])
+                queryset = queryset.alias(
+                    _keyset=RowValue(self.key, 'pk')
+                ).filter(**{f'_keyset__{lookup}': RowValue(models.Value(value), models.Value(cursor['pk']))})
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.page = results
+        self.has_next = has_more if not reverse else True
+        self.has_previous = has_more if reverse else cursor is not None
+        return self.page
+
+    def get_key_value(self, row, name):
+        """Lit la valeur d'une colonne sur une instance ou un dictionnaire (.values())"""
+        if isinstance(row, dict):
+            return row['id' if name == 'pk' else name]
+        return getattr(row, name)
+
+    def build_link(self, row, previous):
+        return self.encode_cursor({
+            'key': self.key,
+            'descending': self.descending,
+            'value': None if self.key == 'pk' else self.get_key_value(row, self.key),
+            'pk': self.get_key_value(row, 'pk'),
+            'previous': previous,
+        })
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.build_link(self.page[-1], previous=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.build_link(self.page[0], previous=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = signing.loads(encoded, salt=self.salt, serializer=CursorSerializer)
+        except signing.BadSignature:
+            raise NotFound(self.invalid_cursor_message)
+        # Un curseur n'est valable que pour le tri avec lequel il a été créé
+        if (cursor.get('key'), cursor.get('descending')) != (self.key, self.descending):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, cursor):
+        encoded = signing.dumps(cursor, salt=self.salt, serializer=CursorSerializer, compress=True)
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
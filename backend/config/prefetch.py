@@ -0,0 +1,150 @@
+# Ce fichier prefetch.py permet de planifier le préchargement des relations
+# (select_related / prefetch_related) à partir des champs d'un serializer.
+# Le planificateur lit les champs imbriqués du serializer et ajoute au queryset
+# les jointures et préchargements correspondants, pour éviter une requête par relation.
+# pour plus d'informations : https://docs.djangoproject.com/en/5.1/ref/models/querysets/#prefetch-related
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def get_relation(model, name):
+    """Retourne le champ de relation `name` du modèle, ou None si ce n'est pas une relation"""
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    return field if field.is_relation else None
+
+
+def plan_serializer(serializer, model, prefix=''):
+    """
+    Parcourt les champs du serializer et retourne les listes (select_related, prefetch_related).
+
+    - une relation simple (FK / OneToOne) sérialisée en objet ou traversée par une
+      source pointée (ex: 'client.nom') devient un select_related ;
+    - une relation multiple (reverse FK / ManyToMany) devient un prefetch_related,
+      avec un Prefetch planifié récursivement quand elle est sérialisée par un ModelSerializer ;
+    - une relation simple sérialisée par un ModelSerializer qui déclare des annotations
+      devient un Prefetch annoté (une jointure ne porterait pas les annotations de l'objet lié) ;
+      les sources pointées qui la traversent (ex: 'produit.nom') sont lues dans l'objet préchargé :
+      une jointure sur le même chemin ferait ignorer le Prefetch par Django.
+    """
+    select_related, prefetch_related = [], []
+    fields = [field for field in serializer.fields.values() if not field.write_only and field.source != '*']
+
+    # Source d'un objet annoté -> champs dont la source pointée passe par cet objet
+    readers = {
+        tuple(field.source_attrs): []
+        for field in fields
+        if isinstance(field, serializers.ModelSerializer) and plan_annotations(field)
+    }
+    folded = set()
+    for field in fields:
+        for source, fields_through in readers.items():
+            if len(field.source_attrs) > len(source) and tuple(field.source_attrs[:len(source)]) == source:
+                fields_through.append(field)
+                folded.add(field)
+
+    for field in fields:
+        if field not in folded:
+            plan_source(
+                field, field.source_attrs, model, prefix, select_related, prefetch_related,
+                readers.get(tuple(field.source_attrs), ()),
+            )
+
+    return select_related, prefetch_related
+
+
+def plan_source(field, attrs, model, path, select_related, prefetch_related, readers=()):
+    """Ajoute aux listes les jointures et préchargements nécessaires pour lire `attrs` depuis `model`"""
+    current_model = model
+    for index, attr in enumerate(attrs):
+        relation = get_relation(current_model, attr)
+        if relation is None:
+            break
+        last = index == len(attrs) - 1
+
+        # Relation multiple : un seul préchargement pour toutes les instances
+        if relation.one_to_many or relation.many_to_many:
+            child = getattr(field, 'child', None)
+            if last and isinstance(child, serializers.ModelSerializer):
+                queryset = plan_queryset(relation.related_model._default_manager.all(), child)
+                prefetch_related.append(Prefetch(path + attr, queryset=queryset))
+            else:
+                prefetch_related.append(path + attr)
+            break
+
+        # Relation simple : la clé étrangère suffit pour un PrimaryKeyRelatedField
+        if last and isinstance(field, serializers.PrimaryKeyRelatedField):
+            break
+
+        # Objet imbriqué avec des champs calculés en base (ex: prix effectif) : préchargé avec ses annotations
+        if last and isinstance(field, serializers.ModelSerializer) and plan_annotations(field):
+            queryset = plan_queryset(relation.related_model._default_manager.all(), field)
+            # les sources pointées à travers cet objet sont planifiées dans le queryset du Prefetch
+            nested_select, nested_prefetch = [], []
+            for reader in readers:
+                plan_source(
+                    reader, reader.source_attrs[len(attrs):], relation.related_model, '',
+                    nested_select, nested_prefetch,
+                )
+            if nested_select:
+                queryset = queryset.select_related(*nested_select)
+            if nested_prefetch:
+                queryset = queryset.prefetch_related(*nested_prefetch)
+            prefetch_related.append(Prefetch(path + attr, queryset=queryset))
+            break
+
+        select_related.append(path + attr)
+        if last and isinstance(field, serializers.ModelSerializer):
+            nested_select, nested_prefetch = plan_serializer(
+                field, relation.related_model, prefix=path + attr + '__'
+            )
+            select_related.extend(nested_select)
+            prefetch_related.extend(nested_prefetch)
+        current_model, path = relation.related_model, path + attr + '__'
+
+
+def plan_annotations(serializer):
+    """
+    Retourne les annotations SQL déclarées par les champs du serializer :
+    un champ calculé en base expose une méthode get_annotation() (ex: le prix effectif d'un produit).
+    """
+    return {
+        field.source: field.get_annotation()
+        for field in serializer.fields.values()
+        if hasattr(field, 'get_annotation') and not field.write_only
+    }
+
+
+def plan_queryset(queryset, serializer):
+    """Applique au queryset les annotations et le préchargement déduits des champs du serializer"""
+    annotations = plan_annotations(serializer)
+    if annotations:
+        queryset = queryset.annotate(**annotations)
+    select_related, prefetch_related = plan_serializer(serializer, queryset.model)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
+
+
+class PrefetchPlannerMixin:
+    """
+    Mixin pour les ViewSets : le queryset de chaque action est préchargé
+    selon le serializer utilisé par cette action.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # La suppression ne sérialise rien, inutile de précharger les relations
+        if self.action == 'destroy':
+            return queryset
+        serializer = self.get_serializer()
+        # Action qui sérialise un autre modèle (ex: les produits d'un catalogue) : rien à planifier ici
+        if getattr(getattr(serializer, 'Meta', None), 'model', queryset.model) is not queryset.model:
+            return queryset
+        return plan_queryset(queryset, serializer)
@@ -0,0 +1,64 @@
+# Ce fichier renderers.py contient le rendu JSON partagé par les APIs.
+# Il produit exactement les mêmes octets que le JSONRenderer de DRF (JSON compact, UTF-8,
+# mêmes conversions des dates et décimaux par l'encodeur de DRF) mais encode avec orjson,
+# plusieurs fois plus rapide que le module json de la bibliothèque standard.
+# Sans orjson, ou pour une sortie indentée (API navigable), le rendu standard de DRF est utilisé.
+# Activé par le réglage FAST_JSON_RENDERER (désactivé par défaut).
+# orjson écrit les flottants sans notation « e+ » de Python (1e-05 -> 0.00001) et les NaN / infinis en null :
+# une réponse qui contient un tel flottant garde le rendu standard de DRF.
+# pour plus d'informations : https://github.com/ijl/orjson
+
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel : rendu standard de DRF
+    orjson = None
+
+
+def has_special_float(data):
+    """Vrai si les données contiennent un flottant qu'orjson n'écrit pas comme le module json (notation exponentielle , NaN , infini)"""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif type(value) is float and value and not 1e-4 <= abs(value) < 1e16:
+            # Python passe en notation exponentielle hors de [1e-4 , 1e16[ ; NaN échoue à la comparaison
+            return True
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer de DRF encodé par orjson. Les types que orjson encoderait à sa façon
+    (dates, dataclasses) sont passés à l'encodeur de DRF pour garder la même représentation.
+    """
+
+    def get_options(self):
+        return (
+            orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_PASSTHROUGH_DATETIME
+            | orjson.OPT_PASSTHROUGH_DATACLASS
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (
+            not settings.FAST_JSON_RENDERER or orjson is None
+            or indent is not None or not self.compact or self.ensure_ascii
+            or has_special_float(data)
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.get_options())
+        except orjson.JSONEncodeError:
+            # Valeur hors des limites d'orjson (ex: entier de plus de 64 bits)
+            return super().render(data, accepted_media_type, renderer_context)
+        # Comme DRF : U+2028 et U+2029 sont échappés pour être valides en JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
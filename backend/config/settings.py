@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres', # pour la recherche plein texte et les index GIN / trigrammes de PostgreSQL
 
     # DRF et autres paquets pour le backend
     'rest_framework', # pour le framework rest api , il permet de gerer les requetes http
@@ -147,6 +148,76 @@ USE_I18N = True
 USE_TZ = True
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# Redis si REDIS_URL est défini (production), sinon cache mémoire local au processus
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Durée de cache (en secondes) des compteurs de facettes du catalogue
+FACETS_CACHE_TIMEOUT = int(os.getenv('FACETS_CACHE_TIMEOUT', 300))
+
+# Durée de vie (en secondes) de l'arbre des catégories en cache ; une écriture change déjà la clé (products.categories)
+CATEGORY_TREE_CACHE_TIMEOUT = int(os.getenv('CATEGORY_TREE_CACHE_TIMEOUT', 86400))
+
+# Cache LRU des codes-barres (caisse) : nombre d'articles gardés en mémoire par processus,
+# et durée de vie (en secondes) qui borne le décalage entre processus
+BARCODE_CACHE_SIZE = int(os.getenv('BARCODE_CACHE_SIZE', 10000))
+BARCODE_CACHE_TIMEOUT = int(os.getenv('BARCODE_CACHE_TIMEOUT', 60))
+
+# Produits souvent achetés ensemble (products.recommendations) : nombre de voisins gardés par produit
+# et durée de cache (en secondes) des réponses de l'API
+BOUGHT_TOGETHER_TOP_N = int(os.getenv('BOUGHT_TOGETHER_TOP_N', 10))
+BOUGHT_TOGETHER_CACHE_TIMEOUT = int(os.getenv('BOUGHT_TOGETHER_CACHE_TIMEOUT', 3600))
+
+# Produits similaires (products.similarity) : nombre de voisins gardés par produit ,
+# produits de la file recalculés par paquet et attente (en secondes) du worker refresh_similar quand la file est vide
+SIMILAR_PRODUCTS_K = int(os.getenv('SIMILAR_PRODUCTS_K', 10))
+SIMILAR_REFRESH_BATCH_SIZE = int(os.getenv('SIMILAR_REFRESH_BATCH_SIZE', 1000))
+SIMILAR_REFRESH_INTERVAL = int(os.getenv('SIMILAR_REFRESH_INTERVAL', 30))
+
+# Flux des modifications du catalogue (products.changes) : lignes par flux et par paquet ,
+# délai (en secondes) avant qu'une écriture soit servie (au moins l'écart d'horloge entre les serveurs web et la base ;
+# les transactions plus longues sont attendues sous PostgreSQL) , et rétention (en jours) des traces de suppression
+CHANGES_FEED_BATCH_SIZE = int(os.getenv('CHANGES_FEED_BATCH_SIZE', 500))
+CHANGES_FEED_LAG = int(os.getenv('CHANGES_FEED_LAG', 60))
+CHANGES_RETENTION_DAYS = int(os.getenv('CHANGES_RETENTION_DAYS', 90))
+
+# Durée de validité (en heures) des clés Idempotency-Key des créations de commandes et de paniers (commandes.idempotency)
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', 24))
+
+# Boîte d'envoi des événements de commande (commandes.outbox) : événements traités par paquet ,
+# attente (en secondes) du worker quand la boîte est vide , et tentatives avant abandon d'un événement
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 100))
+OUTBOX_POLL_INTERVAL = int(os.getenv('OUTBOX_POLL_INTERVAL', 5))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 5))
+
+# Fidélité : montant net de commande (livrée) donnant un point
+FIDELITE_MONTANT_PAR_POINT = int(os.getenv('FIDELITE_MONTANT_PAR_POINT', 10))
+
+# E-mails de suivi des commandes , affichés dans la console si aucun serveur SMTP n'est configuré
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'no-reply@yoozak.com')
+
+# Chemin rapide des listes (lignes .values() converties sans instancier les modèles) , voir config.fastpath
+# Désactivé par défaut : à activer après avoir vérifié la parité des réponses (FAST_PATH_LISTS=True)
+FAST_PATH_LISTS = os.getenv('FAST_PATH_LISTS', 'False') == 'True'
+# Rendu JSON par orjson (config.renderers) , désactivé par défaut : rendu standard de DRF
+FAST_JSON_RENDERER = os.getenv('FAST_JSON_RENDERER', 'False') == 'True'
+
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 
@@ -162,6 +233,15 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/' # pour les fichiers media
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media') # pour les fichiers media en production
 
+# Images dérivées des médias produit (largeur maximale en pixels par taille) , générées par products.images
+IMAGE_DERIVATIVES = {
+    'thumb': 160,
+    'card': 480,
+    'zoom': 1200,
+}
+# Nombre de processus du pool de génération utilisé par les signaux
+IMAGE_DERIVATIVES_WORKERS = int(os.getenv('IMAGE_DERIVATIVES_WORKERS', 2))
+
 # Configuration de WhiteNoise pour servir les fichiers statiques en production
 if not DEBUG:
     MIDDLEWARE.insert(1, 'whitenoise.middleware.WhiteNoiseMiddleware')
@@ -183,6 +263,11 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
+    # Rendu JSON par orjson si FAST_JSON_RENDERER est activé , sinon JSONRenderer de DRF
+    'DEFAULT_RENDERER_CLASSES': (
+        'config.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
 }
@@ -0,0 +1,147 @@
+# Ce fichier sparse.py permet aux clients de l'API de choisir les champs des réponses :
+#   ?fields=id,nom,client.nom  garde seulement ces champs (la notation pointée descend dans les objets imbriqués)
+#   ?expand=produit             remplace l'id d'une relation par l'objet complet (Meta.expandable_fields)
+# Les champs retirés ne sont ni sérialisés ni chargés : le planificateur de préchargement
+# (config.prefetch) ne joint que les relations restantes et le queryset est limité avec .only().
+# pour plus d'informations : https://docs.djangoproject.com/en/5.1/ref/models/querysets/#only
+
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from .prefetch import get_relation
+
+
+def parse_fields(value):
+    """Transforme 'id,client.nom,client.prenom' en arbre {'id': {}, 'client': {'nom': {}, 'prenom': {}}}"""
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in filter(None, (part.strip() for part in path.split('.'))):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def get_fields_serializer(serializer):
+    """Serializer dont on modifie les champs (l'enfant d'un ListSerializer)"""
+    return serializer.child if isinstance(serializer, serializers.ListSerializer) else serializer
+
+
+def expand_fields(serializer, expand):
+    """Remplace les relations demandées par leur serializer déclaré dans Meta.expandable_fields"""
+    serializer = get_fields_serializer(serializer)
+    expandable = getattr(getattr(serializer, 'Meta', None), 'expandable_fields', {})
+    for name, subtree in expand.items():
+        if name in expandable:
+            field = serializer.fields.get(name)
+            nested_class = expandable[name]
+            if isinstance(nested_class, str):
+                nested_class = import_string(nested_class)
+            source = field.source if field is not None else name
+            kwargs = {'read_only': True}
+            if source != name:
+                kwargs['source'] = source
+            serializer.fields[name] = nested_class(**kwargs)
+        nested = serializer.fields.get(name)
+        if subtree and isinstance(nested, (serializers.Serializer, serializers.ListSerializer)):
+            expand_fields(nested, subtree)
+
+
+def trim_fields(serializer, fields):
+    """Retire les champs non demandés ; un champ imbriqué avec des sous-champs est réduit récursivement"""
+    serializer = get_fields_serializer(serializer)
+    for name in list(serializer.fields):
+        if name not in fields:
+            serializer.fields.pop(name)
+        elif fields[name]:
+            nested = serializer.fields[name]
+            if isinstance(nested, (serializers.Serializer, serializers.ListSerializer)):
+                trim_fields(nested, fields[name])
+
+
+def only_fields(serializer, model, select_related, prefix=''):
+    """
+    Retourne les chemins à passer à .only() pour les champs du serializer, ou None si un champ
+    lit autre chose qu'un champ du modèle (méthode, propriété, source='*') : rien n'est alors différé.
+    `select_related` est l'arbre des jointures du queryset (query.select_related).
+    """
+    paths = [prefix + model._meta.pk.name]
+    for field in get_fields_serializer(serializer).fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            return None
+        if hasattr(field, 'get_annotation'):
+            # Champ annoté en SQL (config.prefetch) : rien à charger depuis la table
+            continue
+        current_model, current_joins, path = model, select_related, prefix
+        for index, attr in enumerate(field.source_attrs):
+            last = index == len(field.source_attrs) - 1
+            try:
+                model_field = current_model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                return None
+            relation = get_relation(current_model, attr)
+            if relation is None:
+                if not last or not model_field.concrete:
+                    return None
+                paths.append(path + attr)
+                break
+            # Relation multiple : chargée par une autre requête , la clé primaire suffit
+            if relation.one_to_many or relation.many_to_many:
+                break
+            if relation.auto_created and not relation.concrete:
+                # OneToOne inverse : non différable simplement
+                return None
+            joined = isinstance(current_joins, dict) and attr in current_joins
+            if not joined:
+                # Relation non jointe : la clé étrangère suffit , l'objet est chargé à part
+                paths.append(path + attr)
+                break
+            if last:
+                if isinstance(field, serializers.Serializer):
+                    nested = only_fields(field, relation.related_model, current_joins[attr], path + attr + '__')
+                    if nested is None:
+                        return None
+                    paths.extend(nested)
+                else:
+                    paths.append(path + attr)
+                break
+            current_model, current_joins, path = relation.related_model, current_joins[attr], path + attr + '__'
+    return paths
+
+
+class SparseFieldsetsMixin:
+    """
+    Mixin pour les ViewSets : applique ?fields= et ?expand= au serializer de l'action
+    (en lecture seulement) et limite les colonnes chargées quand ?fields= est présent.
+    """
+    fields_param = 'fields'
+    expand_param = 'expand'
+
+    def get_sparse_params(self):
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in SAFE_METHODS:
+            return None, None
+        fields = request.query_params.get(self.fields_param)
+        expand = request.query_params.get(self.expand_param)
+        return (parse_fields(fields) if fields else None), (parse_fields(expand) if expand else None)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields, expand = self.get_sparse_params()
+        if expand:
+            expand_fields(serializer, expand)
+        if fields:
+            trim_fields(serializer, fields)
+        return serializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields, _ = self.get_sparse_params()
+        if fields and queryset.query.select_related is not True:
+            paths = only_fields(self.get_serializer(), queryset.model, queryset.query.select_related or {})
+            if paths is not None:
+                queryset = queryset.only(*paths)
+        return queryset
@@ -0,0 +1,20 @@
+# Ce fichier testing.py contient les outils de test partagés par les applications.
+
+from django.test import override_settings
+
+
+class FastPathParityMixin:
+    """
+    Parité du chemin rapide (config.fastpath et config.renderers) pour un TestCase dont
+    self.client est un APIClient : la liste lue en .values() et rendue par orjson doit produire
+    les mêmes octets que le serializer et le JSONRenderer de DRF.
+    Chaque requête a un budget de requêtes SQL : une parité obtenue par un repli N+1 échoue aussi.
+    """
+
+    def assertSameAsSerializer(self, url, queries):
+        with override_settings(FAST_PATH_LISTS=True, FAST_JSON_RENDERER=True), self.assertNumQueries(queries):
+            fast = self.client.get(url)
+        with override_settings(FAST_PATH_LISTS=False, FAST_JSON_RENDERER=False), self.assertNumQueries(queries):
+            reference = self.client.get(url)
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.content, reference.content)
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     Categories, SousCategories, Produit, Article, 
-    Creative, Promotion, Catalogue, ProduitCategorie, ProduitCatalogue
+    Creative, Promotion, Catalogue, ProduitCategorie, ProduitCatalogue, ModificationMasse
 )
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
@@ -88,3 +88,15 @@ class ProduitCatalogueAdmin(admin.ModelAdmin):
     list_display = ('produit', 'catalogue')
     list_filter = ('catalogue',)
     search_fields = ('produit__nom', 'catalogue__nom')
+
+@admin.register(ModificationMasse)
+class ModificationMasseAdmin(admin.ModelAdmin):
+    """Journal en lecture seule des modifications en masse faites par l'API"""
+    list_display = ('date', 'utilisateur', 'operation', 'nb_produits')
+    readonly_fields = ('date', 'utilisateur', 'filtre', 'operation', 'nb_produits')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
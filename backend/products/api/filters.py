@@ -0,0 +1,61 @@
+# Ce fichier filters.py contient les filtres personnalisés de l'api products
+# il permet de remplacer la recherche ILIKE de DRF par la recherche plein texte de PostgreSQL
+# pour plus d'informations sur les filtres : https://www.django-rest-framework.org/api-guide/filtering/
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast, Coalesce, Greatest
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+from ..materials import filter_matieres
+from ..search import get_search_config
+
+
+class ProduitSearchFilter(filters.SearchFilter):
+    """
+    Recherche des produits via le paramètre `?search=` :
+    plein texte (tsvector avec stemming) sur le nom et la description,
+    complété par la similarité de trigrammes pour tolérer les fautes de frappe.
+    Les résultats sont triés par pertinence, sauf si `?ordering=` est fourni.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        # Hors PostgreSQL, on garde la recherche ILIKE de DRF
+        if not terms or connection.vendor != 'postgresql':
+            return super().filter_queryset(request, queryset, view)
+
+        text = ' '.join(terms)
+        query = SearchQuery(text, config=get_search_config(), search_type='websearch')
+        similarity = Greatest(
+            TrigramWordSimilarity(text, 'nom'),
+            TrigramWordSimilarity(text, 'description'),
+        )
+        # Le rang est converti en double précision pour servir de clé exacte à la pagination par curseur
+        rank = Coalesce(SearchRank(F('search_vector'), query), Value(0.0)) + similarity
+        return queryset.annotate(
+            rank=Cast(rank, output_field=FloatField())
+        ).filter(
+            Q(search_vector=query)
+            | Q(nom__trigram_word_similar=text)
+            | Q(description__trigram_word_similar=text)
+        ).order_by('-rank', 'pk')
+
+
+class MatiereFilter(filters.BaseFilterBackend):
+    """
+    Filtre des produits par matière première via le paramètre `?matiere=` (répétable, toutes requises) :
+    `?matiere=cuir` pour n'importe quelle partie, `?matiere=dessus:cuir` pour une partie donnée.
+    Les deux formes sont servies par l'index GIN de matieres_premieres (voir products.materials).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        values = request.query_params.getlist('matiere')
+        if not values:
+            return queryset
+        if connection.vendor != 'postgresql':
+            # Requêtes jsonb (@> , @?) : ignorer le filtre renverrait des produits sans la matière demandée
+            raise ValidationError({'matiere': ["Filtre par matière disponible uniquement avec PostgreSQL."]})
+        return filter_matieres(queryset, values)
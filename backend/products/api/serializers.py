@@ -5,11 +5,19 @@
 # pour plus d'informations sur les serializers : https://www.django-rest-framework.org/api-guide/serializers/
 
 
+import logging
+from decimal import Decimal
+
 from rest_framework import serializers # import du serializer de rest framework
 from ..models import (
     Categories, SousCategories, Produit, Article,
-    Creative, Promotion, Catalogue
+    Creative, Promotion, Catalogue, ProduitCard, Suppression
 )# import des models de la base de données
+from ..pricing import effective_prices, prix_effectif # pour le prix après promotion
+from ..images import srcset # pour les images dérivées des médias
+from ..materials import normalize_matieres # pour les matières premières envoyées en chaîne JSON
+
+logger = logging.getLogger(__name__)
 
 # Cette classe CategoriesSerializer permet de gerer les serializers pour les données 
 # car les données sont dans la base de données
@@ -24,13 +32,20 @@ class SousCategoriesSerializer(serializers.ModelSerializer):
     class Meta:
         model = SousCategories
         fields = '__all__'
+        expandable_fields = {'categorie': CategoriesSerializer} # pour ?expand=categorie
 
 # Cette classe CreativeSerializer permet de gerer les serializers pour les données 
 # car les données sont dans la base de données
 class CreativeSerializer(serializers.ModelSerializer):
+    srcset = serializers.SerializerMethodField() # pour les images dérivées , au format srcset par type d'image
+
     class Meta:
         model = Creative
-        fields = '__all__'
+        exclude = ('derives',) # les images dérivées sont exposées par srcset
+        expandable_fields = {'produit': 'products.api.serializers.ProduitListSerializer'} # pour ?expand=produit
+
+    def get_srcset(self, obj):
+        return srcset(obj.derives, obj.url)
 
 # Cette classe ArticleSerializer permet de gerer les serializers pour les données 
 # car les données sont dans la base de données
@@ -38,6 +53,7 @@ class ArticleSerializer(serializers.ModelSerializer):
     class Meta:
         model = Article
         fields = '__all__'
+        expandable_fields = {'produit': 'products.api.serializers.ProduitListSerializer'} # pour ?expand=produit
 
 # Cette classe PromotionSerializer permet de gerer les serializers pour les données 
 # car les données sont dans la base de données
@@ -45,14 +61,51 @@ class PromotionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Promotion
         fields = '__all__'
+        expandable_fields = {'produit': 'products.api.serializers.ProduitListSerializer'} # pour ?expand=produit
+
+# Cette classe PrixEffectifField permet d'exposer le prix effectif des produits
+class PrixEffectifField(serializers.DecimalField):
+    """
+    Prix après la meilleure promotion active du jour , calculé en SQL :
+    le planificateur de requêtes (config.prefetch) ajoute l'annotation au queryset.
+    """
+    def __init__(self, **kwargs):
+        kwargs.update(max_digits=10, decimal_places=2, read_only=True)
+        super().__init__(**kwargs)
+
+    def get_annotation(self):
+        return prix_effectif()
+
+    def in_list(self):
+        parent = self.parent
+        while parent is not None:
+            if isinstance(parent, serializers.ListSerializer):
+                return True
+            parent = parent.parent
+        return False
+
+    def get_attribute(self, instance):
+        # Instance chargée sans l'annotation (ex: après une création) : une requête pour ce produit
+        if not hasattr(instance, self.source):
+            if self.in_list():
+                # Dans une liste , une requête par produit : le queryset n'est pas passé par plan_queryset
+                logger.error(
+                    "Annotation %s absente pour le produit %s sérialisé dans une liste (requête N+1) : "
+                    "appliquer config.prefetch.plan_queryset au queryset", self.source, instance.pk,
+                )
+            return effective_prices([instance.pk]).get(instance.pk)
+        return super().get_attribute(instance)
+
 
 # Cette classe ProduitListSerializer permet de gerer les serializers pour les données 
 # car les données sont dans la base de données
 class ProduitListSerializer(serializers.ModelSerializer):
     """Serializer pour la liste des produits (version simplifiée)"""
+    prix_effectif = PrixEffectifField() # pour le prix après promotion , triable avec ?ordering=prix_effectif
+
     class Meta:
         model = Produit
-        fields = ('id', 'nom', 'prix', 'origine', 'type_de_semelle')
+        fields = ('id', 'nom', 'prix', 'prix_effectif', 'origine', 'type_de_semelle')
 
 # Cette classe ProduitDetailSerializer permet de gerer les serializers pour les données 
 # car les données sont dans la base de données
@@ -67,7 +120,37 @@ class ProduitDetailSerializer(serializers.ModelSerializer):
     # car les données sont dans la base de données et les champs sont dans la base de données
     class Meta:
         model = Produit
-        fields = '__all__'
+        exclude = ('search_vector',) # le vecteur de recherche est interne à la base de données
+
+    def validate_matieres_premieres(self, value):
+        # un objet envoyé en chaîne JSON serait stocké comme une chaîne jsonb , hors de portée du filtre ?matiere=
+        return normalize_matieres(value)
+
+# Cette classe ProduitSyncSerializer permet de gerer les produits du flux de synchronisation
+# car les articles , médias et promotions y sont envoyés à part , seuls les ids des catégories sont inclus
+class ProduitSyncSerializer(serializers.ModelSerializer):
+    """Serializer à plat d'un produit pour le flux des modifications"""
+    class Meta:
+        model = Produit
+        exclude = ('search_vector',)
+
+# Cette classe SuppressionSerializer permet de gerer les suppressions du flux de synchronisation
+class SuppressionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Suppression
+        fields = ('modele', 'objet_id', 'date_suppression')
+
+# Cette classe ProduitCardSerializer permet de gerer les vignettes produit
+# car les données sont déjà dénormalisées dans la table ProduitCard
+class ProduitCardSerializer(serializers.ModelSerializer):
+    """Serializer pour les vignettes produit (lecture seule)"""
+    class Meta:
+        model = ProduitCard
+        fields = (
+            'produit', 'nom', 'prix', 'prix_effectif', 'origine', 'type_de_semelle',
+            'categories', 'image_url', 'note_moyenne', 'nb_avis'
+        )
+        read_only_fields = fields
 
 # Cette classe CatalogueListSerializer permet de gerer les serializers pour les données 
 # car les données sont dans la base de données
@@ -80,11 +163,62 @@ class CatalogueListSerializer(serializers.ModelSerializer):
 # Cette classe CatalogueDetailSerializer permet de gerer les serializers pour les données 
 # car les données sont dans la base de données
 class CatalogueDetailSerializer(serializers.ModelSerializer):
-    """Serializer détaillé pour un catalogue avec ses produits"""
-    produits = ProduitListSerializer(many=True, read_only=True) # pour les produits le read_only=True permet de ne pas afficher les données des produits
+    """
+    Serializer détaillé pour un catalogue avec son nombre de produits ;
+    les produits sont servis à part, paginés (catalogues/<id>/produits/) ou en flux (catalogues/<id>/export/)
+    """
+    nb_produits = serializers.SerializerMethodField() # pour le nombre de produits , annoté par la vue en lecture
     
     # Cette classe Meta permet de gerer les serializers pour les données 
     # car les données sont dans la base de données et les champs sont dans la base de données
     class Meta:
         model = Catalogue
-        fields = '__all__' 
\ No newline at end of file
+        fields = ('id', 'nom', 'description', 'date_creation', 'nb_produits')
+
+    def get_nb_produits(self, obj):
+        if hasattr(obj, 'nb_produits'):
+            return obj.nb_produits
+        return obj.produits.count()
+
+# Cette classe ScanSerializer valide un lot de codes-barres scannés en caisse
+class ScanSerializer(serializers.Serializer):
+    codes = serializers.ListField(
+        child=serializers.CharField(max_length=50), allow_empty=False, max_length=1000
+    )
+
+# Cette classe BulkFiltreSerializer valide le filtre d'une modification en masse
+class BulkFiltreSerializer(serializers.Serializer):
+    categories = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False, max_length=10000)
+    origine = serializers.CharField(max_length=255, required=False)
+    type_de_semelle = serializers.CharField(max_length=255, required=False)
+
+    def validate(self, attrs):
+        # un filtre vide modifierait tout le catalogue
+        if not attrs:
+            raise serializers.ValidationError("Au moins un critère est requis (categories, ids, origine, type_de_semelle).")
+        return attrs
+
+# Cette classe BulkUpdateSerializer valide une modification en masse des produits
+# ex: {"filtre": {"categories": [3]}, "operation": "pourcentage", "valeur": "-10"}
+class BulkUpdateSerializer(serializers.Serializer):
+    filtre = BulkFiltreSerializer()
+    operation = serializers.ChoiceField(choices=['prix', 'pourcentage', 'attribut'])
+    champ = serializers.ChoiceField(choices=['origine', 'type_de_semelle'], required=False)
+    valeur = serializers.JSONField(allow_null=True)
+
+    # champ de validation de la valeur pour chaque opération
+    VALEURS = {
+        'prix': serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0),
+        'pourcentage': serializers.DecimalField(max_digits=5, decimal_places=2, min_value=Decimal('-99.99'), max_value=Decimal('999.99')),
+        'attribut': serializers.CharField(max_length=255, allow_null=True),
+    }
+
+    def validate(self, attrs):
+        if attrs['operation'] == 'attribut' and 'champ' not in attrs:
+            raise serializers.ValidationError({'champ': "Ce champ est requis pour l'opération attribut."})
+        try:
+            attrs['valeur'] = self.VALEURS[attrs['operation']].run_validation(attrs['valeur'])
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError({'valeur': exc.detail})
+        return attrs
@@ -8,7 +8,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     CategoriesViewSet, SousCategoriesViewSet, ProduitViewSet,
-    ArticleViewSet, CreativeViewSet, PromotionViewSet, CatalogueViewSet
+    ArticleViewSet, CreativeViewSet, PromotionViewSet, CatalogueViewSet,
+    ProduitCardViewSet, ChangesViewSet
 )# pour les vues qui sont dans le fichier views.py  du dossier api
 
 # Création du routeur pour l'API pour les routes des vues 
@@ -16,6 +17,8 @@ router = DefaultRouter()
 router.register(r'categories', CategoriesViewSet) # pour les categories qui sont dans le fichier views.py  du dossier api
 router.register(r'sous-categories', SousCategoriesViewSet) # pour les sous-categories qui sont dans le fichier views.py  du dossier api
 router.register(r'produits', ProduitViewSet) # pour les produits qui sont dans le fichier views.py  du dossier api
+router.register(r'cards', ProduitCardViewSet) # pour les vignettes produit (modèle de lecture dénormalisé)
+router.register(r'changes', ChangesViewSet, basename='changes') # pour le flux des modifications (synchronisation hors ligne)
 router.register(r'articles', ArticleViewSet) # pour les articles qui sont dans le fichier views.py  du dossier api
 router.register(r'creatives', CreativeViewSet) # pour les creatives qui sont dans le fichier views.py  du dossier api
 router.register(r'promotions', PromotionViewSet) # pour les promotions qui sont dans le fichier views.py  du dossier api
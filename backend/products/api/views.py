@@ -4,34 +4,69 @@
 # pour plus d'informations sur les vues : https://www.django-rest-framework.org/api-guide/viewsets/
 
 
-from rest_framework import viewsets, permissions, filters # pour les vues , les permissions , les filtres
+import json
+
+from rest_framework import viewsets, permissions, filters, status # pour les vues , les permissions , les filtres , les codes HTTP
+from rest_framework.decorators import action # pour les routes supplémentaires des viewsets
+from rest_framework.response import Response
+from rest_framework.exceptions import NotFound, ValidationError
+from django.conf import settings
+from django.core import signing # pour les curseurs signés du flux des modifications
+from django.core.serializers.json import DjangoJSONEncoder # pour les décimaux et les dates de l'export
+from django.db.models import Count
+from django.http import StreamingHttpResponse # pour l'export en flux des produits d'un catalogue
+from django.core.cache import cache # pour mettre en cache les compteurs de facettes
 from django_filters.rest_framework import DjangoFilterBackend # pour le filtrage des données
+from config.conditional import ConditionalGetMixin # pour les ETag et les réponses 304 Not Modified
+from config.fastpath import FastListMixin # pour la liste lue en .values() sans instancier les produits
+from config.prefetch import PrefetchPlannerMixin, plan_queryset # pour précharger les relations selon le serializer de l'action
+from config.pagination import KeysetPagination # pour la pagination par curseur , sans COUNT ni OFFSET
+from config.sparse import SparseFieldsetsMixin # pour ?fields= et ?expand=
+from .filters import MatiereFilter, ProduitSearchFilter # pour la recherche plein texte et le filtre par matière sur les produits
+from ..facets import facet_counts, facets_cache_key # pour les compteurs de facettes
+from ..availability import availability_matrix # pour la matrice couleur / pointure
+from ..pricing import with_prix_effectif # pour le prix après promotion dans l'export
+from ..categories import category_tree # pour l'arbre des catégories mis en cache
+from ..barcodes import lookup_barcodes # pour la recherche exacte par code-barres , avec cache LRU
+from ..recommendations import bought_together # pour les produits souvent achetés ensemble
+from ..similarity import similar_products # pour les produits similaires (matières , semelle , origine , catégories)
+from ..materials import matieres_index # pour l'index des matières premières
+from ..bulk import PrixHorsLimites, bulk_update # pour les modifications en masse des prix et attributs
+from ..changes import CursorExpired, changes # pour le flux des modifications du catalogue
 from ..models import (
-    Categories, SousCategories, Produit, 
-    Article, Creative, Promotion, Catalogue
+    Categories, SousCategories, Produit, ProduitCategorie,
+    Article, Creative, Promotion, Catalogue, ProduitCatalogue, ProduitCard
 ) # pour les models  qui sont dans le fichier models.py 
 from .serializers import (
     CategoriesSerializer, SousCategoriesSerializer,
     ProduitListSerializer, ProduitDetailSerializer,
     ArticleSerializer, CreativeSerializer, PromotionSerializer,
-    CatalogueListSerializer, CatalogueDetailSerializer
+    CatalogueListSerializer, CatalogueDetailSerializer, ProduitCardSerializer,
+    ScanSerializer, BulkUpdateSerializer
 ) # pour les serializers qui sont dans le fichier serializers.py  , il permet de gerer les données et les formats de réponse 
 # parce que les serializers sont utilisés pour convertir les données en format json
 
 
 # Cette CategorieViewSet permet de gerer les requetes http pour les catégories 
-class CategoriesViewSet(viewsets.ModelViewSet):
+class CategoriesViewSet(ConditionalGetMixin, SparseFieldsetsMixin, PrefetchPlannerMixin, viewsets.ModelViewSet):
     """API pour gérer les catégories"""
     queryset = Categories.objects.all() # pour les données  car les données sont dans la base de données
+    version_models = (Categories,) # pour les ETag , les modèles dont dépendent les réponses
     serializer_class = CategoriesSerializer # pour le serializer qui est dans le fichier serializers.py 
     permission_classes = [permissions.IsAuthenticatedOrReadOnly] # pour les permissions , il permet de gerer les permissions
     filter_backends = [filters.SearchFilter, DjangoFilterBackend] # pour le filtrage des données
     search_fields = ['nom'] # pour le filtrage des données
 
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        """Arbre complet catégories -> sous-catégories avec le nombre de produits par catégorie (mis en cache)"""
+        return Response(category_tree())
+
 # Cette SousCategoriesViewSet permet de gerer les requetes http pour les sous-catégories
-class SousCategoriesViewSet(viewsets.ModelViewSet):
+class SousCategoriesViewSet(ConditionalGetMixin, SparseFieldsetsMixin, PrefetchPlannerMixin, viewsets.ModelViewSet):
     """API pour gérer les sous-catégories"""
-    queryset = SousCategories.objects.all() # pour les données  car les données sont dans la base de données
+    queryset = SousCategories.objects.select_related('categorie') # pour les données , avec la catégorie parente utilisée par __str__
+    version_models = (SousCategories,) # pour les ETag , les modèles dont dépendent les réponses
     serializer_class = SousCategoriesSerializer # pour le serializer qui est dans le fichier serializers.py 
     permission_classes = [permissions.IsAuthenticatedOrReadOnly] # pour les permissions , il permet de gerer les permissions
     filter_backends = [filters.SearchFilter, DjangoFilterBackend] # pour le filtrage des données
@@ -40,25 +75,133 @@ class SousCategoriesViewSet(viewsets.ModelViewSet):
 
 
 # Cette ProduitViewSet permet de gerer les requetes http pour les produits
-class ProduitViewSet(viewsets.ModelViewSet):
+class ProduitViewSet(ConditionalGetMixin, FastListMixin, SparseFieldsetsMixin, PrefetchPlannerMixin, viewsets.ModelViewSet):
     """API pour gérer les produits"""
-    queryset = Produit.objects.all() # pour les données  car les données sont dans la base de données
+    queryset = Produit.objects.all() # pour les données , les relations imbriquées sont préchargées par PrefetchPlannerMixin
+    version_models = (Produit, Categories, ProduitCategorie, Article, Creative, Promotion) # pour les ETag de la liste et du détail
+    depends_on_date = True # le prix effectif dépend des promotions actives du jour
     permission_classes = [permissions.IsAuthenticatedOrReadOnly] # pour les permissions , il permet de gerer les permissions
-    filter_backends = [filters.SearchFilter, DjangoFilterBackend, filters.OrderingFilter] # pour le filtrage des données
+    filter_backends = [ProduitSearchFilter, MatiereFilter, DjangoFilterBackend, filters.OrderingFilter] # pour le filtrage des données
     filterset_fields = ['categories', 'origine', 'type_de_semelle'] # pour le filtrage des données
-    search_fields = ['nom', 'description'] # pour le filtrage des données
-    ordering_fields = ['prix', 'nom']
+    search_fields = ['nom', 'description'] # pour la recherche ILIKE hors PostgreSQL
+    ordering_fields = ['prix', 'prix_effectif', 'nom'] # prix_effectif est annoté à partir du serializer de liste
+    pagination_class = KeysetPagination # pour la pagination par curseur sur le tri actif
+    # pour un id entier dans les routes de détail : /produits/abc/... répond 404 avant d'atteindre les filtres ORM
+    # des actions qui lisent un index par id (disponibilites , bought-together , similar)
+    lookup_value_regex = r'\d+'
     
     # Cette fonction permet de gerer les formats de réponse  car il y a deux formats de réponse 
     #Notemmeent le format de réponse pour la liste et le format de réponse pour le détail
     def get_serializer_class(self):
-        if self.action == 'list':
+        if self.action in ('list', 'facets'):
             return ProduitListSerializer
         return ProduitDetailSerializer
 
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Compteurs de produits par origine, type de semelle, catégorie, couleur et pointure,
+        pour les mêmes filtres que la liste (ex: ?origine=Maroc&search=cuir).
+        """
+        key = facets_cache_key(request, self)
+        data = cache.get(key)
+        if data is None:
+            data = facet_counts(self.filter_queryset(self.get_queryset()))
+            cache.set(key, data, settings.FACETS_CACHE_TIMEOUT)
+        return Response(data)
+
+    @action(detail=False, methods=['post'], url_path='bulk-update', permission_classes=[permissions.IsAdminUser])
+    def modification_masse(self, request):
+        """
+        Modification en masse des produits d'un filtre , en une requête UPDATE et une transaction (administrateurs) :
+        ex: {"filtre": {"categories": [3]}, "operation": "pourcentage", "valeur": "-10"}
+        opérations : prix (nouveau prix) , pourcentage (variation du prix) , attribut (champ origine ou type_de_semelle)
+        """
+        serializer = BulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            modification, _ = bulk_update(
+                data['filtre'], data['operation'], data['valeur'], champ=data.get('champ'), utilisateur=request.user
+            )
+        except PrixHorsLimites as exc:
+            raise ValidationError({'valeur': [str(exc)]})
+        return Response({'modification': modification.pk, 'nb_produits': modification.nb_produits})
+
+    @action(detail=False, methods=['get'])
+    def matieres(self, request):
+        """Matières premières distinctes avec le nombre de produits , au total et par partie (index Matiere)"""
+        return Response(matieres_index())
+
+    @action(detail=True, methods=['get'])
+    def disponibilites(self, request, pk=None):
+        """Matrice des articles disponibles par couleur et pointure, lue dans l'index de disponibilité"""
+        data = availability_matrix(pk)
+        if data is None:
+            # Index vide : produit sans article disponible, ou produit inexistant
+            if not Produit.objects.filter(pk=pk).exists():
+                raise NotFound("Produit non trouvé.")
+            data = {'couleurs': [], 'pointures': [], 'matrice': {}}
+        return Response(data)
+
+    @action(detail=True, methods=['get'], url_path='bought-together')
+    def achetes_ensemble(self, request, pk=None):
+        """Produits souvent achetés avec ce produit , du plus au moins fréquent (calculés par build_bought_together)"""
+        data = bought_together(pk)
+        if not data and not Produit.objects.filter(pk=pk).exists():
+            raise NotFound("Produit non trouvé.")
+        return Response(data)
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """Produits les plus proches par matières , type de semelle , origine et catégories (index ProduitSimilaire)"""
+        data = similar_products(pk)
+        if not data and not Produit.objects.filter(pk=pk).exists():
+            raise NotFound("Produit non trouvé.")
+        return Response(data)
+
+
+# Cette ChangesViewSet permet de synchroniser le catalogue des clients mobiles / hors ligne
+class ChangesViewSet(viewsets.ViewSet):
+    """
+    Flux des modifications du catalogue : produits , articles , médias et promotions modifiés
+    et suppressions depuis le curseur `?since=` (absent pour une première synchronisation).
+    La réponse contient un paquet par flux , le curseur `next` à renvoyer et `complet` :
+    tant que `complet` est faux , d'autres paquets attendent (ex: ?since=<next>&limit=500).
+    """
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def list(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', settings.CHANGES_FEED_BATCH_SIZE)), 1000)
+        except ValueError:
+            limit = settings.CHANGES_FEED_BATCH_SIZE
+        try:
+            data = changes(request.query_params.get('since'), max(limit, 1))
+        except signing.BadSignature:
+            raise NotFound("Curseur invalide.")
+        except CursorExpired:
+            return Response(
+                {"detail": "Curseur expiré : une synchronisation complète est nécessaire."},
+                status=status.HTTP_410_GONE
+            )
+        return Response(data)
+
+
+# Cette ProduitCardViewSet permet de lister les vignettes produit en une seule requête indexée
+class ProduitCardViewSet(SparseFieldsetsMixin, PrefetchPlannerMixin, viewsets.ReadOnlyModelViewSet):
+    """API en lecture seule pour les vignettes produit (modèle de lecture dénormalisé)"""
+    queryset = ProduitCard.objects.all() # pour les données , une ligne par produit sans jointure
+    serializer_class = ProduitCardSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['origine', 'type_de_semelle']
+    ordering_fields = ['prix_effectif', 'nom']
+    pagination_class = KeysetPagination
+
 
 # Cette ArticleViewSet permet de gerer les requetes http pour les articles
-class ArticleViewSet(viewsets.ModelViewSet):
+class ArticleViewSet(SparseFieldsetsMixin, PrefetchPlannerMixin, viewsets.ModelViewSet):
     """API pour gérer les articles"""
     queryset = Article.objects.all() # pour les données  car les données sont dans la base de données
     serializer_class = ArticleSerializer # pour le serializer qui est dans le fichier serializers.py 
@@ -67,9 +210,28 @@ class ArticleViewSet(viewsets.ModelViewSet):
     filterset_fields = ['produit', 'couleur', 'pointure'] # pour le filtrage des données
     search_fields = ['code_bar'] # pour le filtrage des données
 
+    @action(detail=False, methods=['get'], url_path=r'code-bar/(?P<code_bar>[^/]+)')
+    def code_bar(self, request, code_bar=None):
+        """Recherche exacte d'un article par code-barres (index unique , pas de ILIKE)"""
+        found, _ = lookup_barcodes([code_bar])
+        if code_bar not in found:
+            raise NotFound("Article non trouvé.")
+        return Response(found[code_bar])
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def scan(self, request):
+        """
+        Résout un lot de codes-barres en une seule requête (ex: {"codes": ["123", "456"]}) :
+        retourne les articles trouvés par code-barres et la liste des codes introuvables.
+        """
+        serializer = ScanSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        found, missing = lookup_barcodes(serializer.validated_data['codes'])
+        return Response({'articles': found, 'introuvables': missing})
+
 
 # Cette CreativeViewSet permet de gerer les requetes http pour les médias des produits
-class CreativeViewSet(viewsets.ModelViewSet):
+class CreativeViewSet(SparseFieldsetsMixin, PrefetchPlannerMixin, viewsets.ModelViewSet):
     """API pour gérer les médias des produits"""
     queryset = Creative.objects.all() # pour les données  car les données sont dans la base de données
     serializer_class = CreativeSerializer # pour le serializer qui est dans le fichier serializers.py 
@@ -77,7 +239,7 @@ class CreativeViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend] # pour le filtrage des données
     filterset_fields = ['produit', 'type_creative'] # pour le filtrage des données
 
-class PromotionViewSet(viewsets.ModelViewSet):
+class PromotionViewSet(SparseFieldsetsMixin, PrefetchPlannerMixin, viewsets.ModelViewSet):
     """API pour gérer les promotions"""
     queryset = Promotion.objects.all()
     serializer_class = PromotionSerializer # pour le serializer qui est dans le fichier serializers.py 
@@ -87,10 +249,15 @@ class PromotionViewSet(viewsets.ModelViewSet):
     ordering_fields = ['date_debut', 'date_fin', 'reduction'] # pour le filtrage des données
 
 
+# Nombre de produits lus par paquet lors de l'export d'un catalogue
+EXPORT_CHUNK_SIZE = 2000
+
+
 # Cette CatalogueViewSet permet de gerer les requetes http pour les catalogues
-class CatalogueViewSet(viewsets.ModelViewSet):
+class CatalogueViewSet(ConditionalGetMixin, SparseFieldsetsMixin, PrefetchPlannerMixin, viewsets.ModelViewSet):
     """API pour gérer les catalogues"""
-    queryset = Catalogue.objects.all() # pour les données  car les données sont dans la base de données
+    queryset = Catalogue.objects.all() # pour les données , les produits du détail sont préchargés par PrefetchPlannerMixin
+    version_models = (Catalogue, ProduitCatalogue, Produit) # pour les ETag , le détail contient les produits
     permission_classes = [permissions.IsAuthenticatedOrReadOnly] # pour les permissions , il permet de gerer les permissions
     filter_backends = [filters.SearchFilter] # pour le filtrage des données
     search_fields = ['nom', 'description'] # pour le filtrage des données
@@ -100,4 +267,39 @@ class CatalogueViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action == 'list':
             return CatalogueListSerializer
-        return CatalogueDetailSerializer 
\ No newline at end of file
+        if self.action == 'produits':
+            return ProduitListSerializer
+        return CatalogueDetailSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            # le nombre de produits est compté en base , sans charger les produits
+            queryset = queryset.annotate(nb_produits=Count('produits'))
+        return queryset
+
+    @action(detail=True, methods=['get'], pagination_class=KeysetPagination)
+    def produits(self, request, pk=None):
+        """Produits du catalogue , paginés par curseur (ex: ?page_size=50)"""
+        catalogue = self.get_object()
+        queryset = plan_queryset(Produit.objects.filter(catalogues=catalogue), self.get_serializer())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def export(self, request, pk=None):
+        """
+        Export en flux des produits du catalogue au format JSON lines (un produit par ligne) :
+        les lignes sont lues par paquets avec un curseur serveur , la mémoire reste constante.
+        """
+        catalogue = self.get_object()
+        rows = with_prix_effectif(Produit.objects.filter(catalogues=catalogue)).order_by('pk').values(
+            *ProduitListSerializer.Meta.fields
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        response = StreamingHttpResponse(
+            (json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n' for row in rows),
+            content_type='application/x-ndjson',
+        )
+        response['Content-Disposition'] = f'attachment; filename="catalogue-{catalogue.pk}.jsonl"'
+        return response 
\ No newline at end of file
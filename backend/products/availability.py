@@ -0,0 +1,61 @@
+# Ce fichier availability.py maintient l'index de disponibilité des articles (Disponibilite) :
+# pour chaque produit, le nombre d'articles encore disponibles par couleur et pointure.
+# Un article est disponible tant qu'aucune ligne de commande ne le référence.
+# L'index est recalculé par produit, avec une seule requête groupée.
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Article, Disponibilite
+
+# Nombre de produits recalculés par requête
+CHUNK_SIZE = 1000
+
+
+def refresh_availability(produit_ids):
+    """Recalcule l'index de disponibilité des produits donnés"""
+    produit_ids = list(set(produit_ids))
+    for start in range(0, len(produit_ids), CHUNK_SIZE):
+        chunk = produit_ids[start:start + CHUNK_SIZE]
+        rows = Article.objects.filter(
+            produit_id__in=chunk, lignes_commande__isnull=True
+        ).values('produit_id', 'couleur', 'pointure').annotate(quantite=Count('pk')).order_by()
+        with transaction.atomic():
+            Disponibilite.objects.filter(produit_id__in=chunk).delete()
+            Disponibilite.objects.bulk_create(Disponibilite(**row) for row in rows)
+
+
+def schedule_availability_refresh(produit_ids):
+    """Recalcule l'index de disponibilité après la validation de la transaction en cours"""
+    produit_ids = [pk for pk in produit_ids if pk is not None]
+    if produit_ids:
+        transaction.on_commit(lambda: refresh_availability(produit_ids))
+
+
+def pointure_key(pointure):
+    """Tri naturel des pointures : numériques d'abord (38 < 38.5 < 40), puis le reste"""
+    try:
+        return (0, float(pointure.replace(',', '.')), pointure)
+    except ValueError:
+        return (1, 0, pointure)
+
+
+def availability_matrix(produit_id):
+    """
+    Retourne la matrice de disponibilité d'un produit, ou None si l'index est vide :
+    {"couleurs": [...], "pointures": [...], "matrice": {couleur: {pointure: quantite}}}
+    """
+    rows = Disponibilite.objects.filter(produit_id=produit_id).values_list('couleur', 'pointure', 'quantite')
+    matrice = {}
+    pointures = set()
+    for couleur, pointure, quantite in rows:
+        couleur, pointure = couleur or '', pointure or ''
+        matrice.setdefault(couleur, {})[pointure] = quantite
+        pointures.add(pointure)
+    if not matrice:
+        return None
+    return {
+        'couleurs': sorted(matrice),
+        'pointures': sorted(pointures, key=pointure_key),
+        'matrice': matrice,
+    }
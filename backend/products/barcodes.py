@@ -0,0 +1,92 @@
+# Ce fichier barcodes.py permet de retrouver rapidement des articles par code-barres (caisse / POS).
+# Les recherches se font par égalité sur l'index unique de code_bar, avec une seule requête IN
+# pour tout un lot, derrière un cache LRU borné en mémoire du processus.
+# Le cache est invalidé par signal à chaque écriture d'article dans le processus courant ;
+# une durée de vie courte borne le décalage possible entre plusieurs processus (workers gunicorn).
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .api.serializers import ArticleSerializer
+from .models import Article
+
+
+class BarcodeCache:
+    """Cache LRU borné et thread-safe : code-barres -> article sérialisé"""
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._entries = OrderedDict()   # code_bar -> (expiration, pk, data)
+        self._codes = {}                # pk -> code_bar, pour invalider un code-barres modifié
+        self._lock = threading.Lock()
+
+    def get_many(self, codes):
+        """Retourne les articles en cache pour les codes donnés (les entrées expirées sont ignorées)"""
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for code in codes:
+                entry = self._entries.get(code)
+                if entry is None:
+                    continue
+                if entry[0] < now:
+                    self._remove(code)
+                    continue
+                self._entries.move_to_end(code)
+                found[code] = entry[2]
+        return found
+
+    def set_many(self, articles):
+        """Ajoute des articles sérialisés au cache, en évinçant les moins récemment utilisés"""
+        expiration = time.monotonic() + self.timeout
+        with self._lock:
+            for data in articles:
+                self._remove(data['code_bar'])
+                self._entries[data['code_bar']] = (expiration, data['id'], data)
+                self._codes[data['id']] = data['code_bar']
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, pk, code_bar=None):
+        """Invalide un article par son id et/ou son code-barres (ancien et nouveau)"""
+        with self._lock:
+            old_code = self._codes.get(pk)
+            if old_code is not None:
+                self._remove(old_code)
+            if code_bar is not None:
+                self._remove(code_bar)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._codes.clear()
+
+    def _remove(self, code):
+        entry = self._entries.pop(code, None)
+        if entry is not None and self._codes.get(entry[1]) == code:
+            del self._codes[entry[1]]
+
+
+barcode_cache = BarcodeCache(
+    maxsize=settings.BARCODE_CACHE_SIZE,
+    timeout=settings.BARCODE_CACHE_TIMEOUT,
+)
+
+
+def lookup_barcodes(codes):
+    """
+    Résout une liste de codes-barres : retourne (articles trouvés par code, codes introuvables).
+    Les codes absents du cache sont lus en une seule requête sur l'index unique de code_bar.
+    """
+    codes = list(dict.fromkeys(codes))
+    found = barcode_cache.get_many(codes)
+    missing = [code for code in codes if code not in found]
+    if missing:
+        articles = ArticleSerializer(Article.objects.filter(code_bar__in=missing), many=True).data
+        barcode_cache.set_many(articles)
+        found.update((data['code_bar'], data) for data in articles)
+    return found, [code for code in codes if code not in found]
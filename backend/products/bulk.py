@@ -0,0 +1,85 @@
+# Ce fichier bulk.py applique une modification en masse aux produits (prix, pourcentage, attribut).
+# Les produits sont choisis par un filtre (catégories, origine, type de semelle, ids) ; la sélection
+# est compilée par l'ORM puis jointe à la table des produits dans une seule requête UPDATE ... FROM,
+# dans une transaction qui écrit aussi la ligne du journal ModificationMasse.
+# Les données dérivées (vignettes, produits similaires, versions des ETag) sont recalculées
+# après la validation, pour les seuls produits modifiés (RETURNING).
+
+from django.db import DataError, connection, transaction
+
+from config.conditional import bump_version
+
+from .cards import schedule_card_refresh
+from .models import ModificationMasse, Produit
+from .similarity import schedule_similar_refresh
+
+# Attributs modifiables par l'opération 'attribut'
+ATTRIBUTS = ('origine', 'type_de_semelle')
+
+# Expression SET de chaque opération ; %s reçoit la valeur validée
+ASSIGNMENTS = {
+    'prix': "prix = %s",
+    'pourcentage': "prix = round(p.prix * (100 + %s) / 100, 2)",
+}
+
+class PrixHorsLimites(ValueError):
+    """Un prix calculé dépasse la précision de la colonne (DECIMAL(10, 2)) : rien n'est modifié"""
+
+
+UPDATE_SQL = "UPDATE {table} p SET {assignment}, date_maj = now() FROM ({selection}) AS s (id) WHERE p.id = s.id RETURNING p.id"
+
+
+def selection(filtre):
+    """Produits désignés par le filtre : catégories (au moins une), origine, type de semelle, ids"""
+    queryset = Produit.objects.all()
+    if filtre.get('categories'):
+        queryset = queryset.filter(categories__in=filtre['categories'])
+    if filtre.get('ids'):
+        queryset = queryset.filter(pk__in=filtre['ids'])
+    for champ in ATTRIBUTS:
+        if champ in filtre:
+            queryset = queryset.filter(**{champ: filtre[champ]})
+    return queryset.values('pk').distinct()
+
+
+def assignment(operation, champ=None):
+    if operation == 'attribut':
+        if champ not in ATTRIBUTS:
+            raise ValueError(f"Attribut non modifiable : {champ}")
+        return f"{connection.ops.quote_name(champ)} = %s"
+    return ASSIGNMENTS[operation]
+
+
+def bulk_update(filtre, operation, valeur, champ=None, utilisateur=None):
+    """
+    Applique l'opération aux produits du filtre en une requête et journalise la modification ;
+    retourne (ligne ModificationMasse, ids des produits modifiés). Lève PrixHorsLimites si un prix déborde.
+    """
+    sql, params = selection(filtre).query.sql_with_params()
+    query = UPDATE_SQL.format(
+        table=connection.ops.quote_name(Produit._meta.db_table),
+        assignment=assignment(operation, champ),
+        selection=sql,
+    )
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            try:
+                cursor.execute(query, [valeur, *params])
+            except DataError as exc:
+                if operation not in ASSIGNMENTS:
+                    raise
+                raise PrixHorsLimites("Un des prix obtenus dépasse 99999999.99 : aucun produit modifié.") from exc
+            produit_ids = [row[0] for row in cursor.fetchall()]
+        modification = ModificationMasse.objects.create(
+            utilisateur=utilisateur,
+            filtre=filtre,
+            operation={'type': operation, 'champ': champ, 'valeur': None if valeur is None else str(valeur)},
+            nb_produits=len(produit_ids),
+        )
+        # L'UPDATE ne déclenche pas les signaux : données dérivées recalculées après validation
+        schedule_card_refresh(produit_ids)
+        if operation == 'attribut':
+            schedule_similar_refresh(produit_ids)
+        if produit_ids:
+            transaction.on_commit(lambda: bump_version(Produit))
+    return modification, produit_ids
@@ -0,0 +1,80 @@
+# Ce fichier cards.py maintient le modèle de lecture ProduitCard (vignettes produit).
+# Chaque vignette regroupe ce qu'affiche une tuile produit : le prix effectif après promotion (products.pricing),
+# les noms des catégories, la première image et la note moyenne des avis.
+# Les vignettes sont recalculées de façon ensembliste pour une liste de produits :
+# une seule requête de lecture (sous-requêtes corrélées) puis un upsert groupé.
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import transaction
+from django.db.models import Avg, Count, IntegerField, OuterRef, Subquery
+from django.utils import timezone
+
+from clients.models import Avis
+from .models import Produit, ProduitCard, ProduitCategorie, Creative
+from .pricing import prix_effectif
+
+# Nombre de produits recalculés par requête
+CHUNK_SIZE = 1000
+
+CARD_FIELDS = (
+    'nom', 'prix', 'prix_effectif', 'origine', 'type_de_semelle',
+    'categories', 'image_url', 'note_moyenne', 'nb_avis', 'date_maj',
+)
+
+
+def card_values(produit_ids):
+    """Lit en une requête les données nécessaires aux vignettes des produits donnés"""
+    categories = ProduitCategorie.objects.filter(produit=OuterRef('pk')).values('produit').annotate(
+        noms=ArrayAgg('categorie__nom', ordering='categorie__nom')
+    ).values('noms')
+    image = Creative.objects.filter(produit=OuterRef('pk')).order_by('pk').values('url')[:1]
+    avis = Avis.objects.filter(produit=OuterRef('pk')).values('produit')
+
+    return Produit.objects.filter(pk__in=produit_ids).annotate(
+        prix_effectif=prix_effectif(timezone.localdate()),
+        categories_noms=Subquery(categories),
+        image_url=Subquery(image),
+        note_moyenne=Subquery(avis.annotate(moyenne=Avg('note')).values('moyenne')),
+        nb_avis=Subquery(avis.annotate(total=Count('pk')).values('total'), output_field=IntegerField()),
+    ).values(
+        'pk', 'nom', 'prix', 'origine', 'type_de_semelle',
+        'prix_effectif', 'categories_noms', 'image_url', 'note_moyenne', 'nb_avis',
+    )
+
+
+def refresh_cards(produit_ids):
+    """Recalcule les vignettes des produits donnés (les produits supprimés sont ignorés)"""
+    produit_ids = list(produit_ids)
+    now = timezone.now()
+    for start in range(0, len(produit_ids), CHUNK_SIZE):
+        cards = [
+            ProduitCard(
+                produit_id=row['pk'],
+                nom=row['nom'],
+                prix=row['prix'],
+                prix_effectif=row['prix_effectif'],
+                origine=row['origine'],
+                type_de_semelle=row['type_de_semelle'],
+                categories=row['categories_noms'] or [],
+                image_url=row['image_url'],
+                note_moyenne=(
+                    Decimal(row['note_moyenne']).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+                    if row['note_moyenne'] is not None else None
+                ),
+                nb_avis=row['nb_avis'] or 0,
+                date_maj=now,
+            )
+            for row in card_values(produit_ids[start:start + CHUNK_SIZE])
+        ]
+        ProduitCard.objects.bulk_create(
+            cards, update_conflicts=True, unique_fields=['produit'], update_fields=CARD_FIELDS
+        )
+
+
+def schedule_card_refresh(produit_ids):
+    """Recalcule les vignettes après la validation de la transaction en cours"""
+    produit_ids = [pk for pk in produit_ids if pk is not None]
+    if produit_ids:
+        transaction.on_commit(lambda: refresh_cards(produit_ids))
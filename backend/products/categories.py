@@ -0,0 +1,44 @@
+# Ce fichier categories.py construit l'arbre des catégories pour la navigation :
+# catégories -> sous-catégories, avec le nombre de produits de chaque catégorie.
+# L'arbre est construit en deux requêtes et gardé dans le cache Django , sous une clé qui contient
+# les versions des modèles dont il dépend (config.conditional , incrémentées après chaque écriture) :
+# une écriture change la clé , l'ancien arbre n'est plus jamais lu et expire avec sa durée de vie.
+# La clé est lue avant l'arbre : un arbre construit à partir de données antérieures à une écriture
+# est rangé sous l'ancienne version , jamais sous la nouvelle.
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from config.conditional import versions_token
+
+from .models import Categories, ProduitCategorie, SousCategories
+
+TREE_CACHE_KEY = 'products:categories:tree:{}'
+
+# Modèles dont dépend l'arbre (hiérarchie et nombre de produits par catégorie)
+TREE_MODELS = (Categories, SousCategories, ProduitCategorie)
+
+
+def build_category_tree():
+    """Construit l'arbre complet : une requête pour les catégories (et leurs comptes), une pour les sous-catégories"""
+    categories = Categories.objects.annotate(
+        nb_produits=Count('produits', distinct=True)
+    ).order_by('nom', 'pk').values('id', 'nom', 'description', 'nb_produits')
+    tree = {categorie['id']: {**categorie, 'sous_categories': []} for categorie in categories}
+    sous_categories = SousCategories.objects.order_by('nom', 'pk').values('id', 'nom', 'description', 'categorie_id')
+    for sous_categorie in sous_categories:
+        parent = tree.get(sous_categorie.pop('categorie_id'))
+        if parent is not None:
+            parent['sous_categories'].append(sous_categorie)
+    return list(tree.values())
+
+
+def category_tree():
+    """Retourne l'arbre des catégories depuis le cache , en le reconstruisant après une écriture"""
+    key = TREE_CACHE_KEY.format(versions_token(TREE_MODELS))
+    tree = cache.get(key)
+    if tree is None:
+        tree = build_category_tree()
+        cache.set(key, tree, settings.CATEGORY_TREE_CACHE_TIMEOUT)
+    return tree
@@ -0,0 +1,128 @@
+# Ce fichier changes.py construit le flux des modifications du catalogue pour la synchronisation
+# des clients mobiles / hors ligne (/api/products/changes/?since=<curseur>).
+# Chaque flux (produits, articles, médias, promotions, suppressions) est lu dans l'ordre (date_maj, id)
+# à partir de sa position dans le curseur, par paquets et par l'index (date_maj, id) de sa table.
+# Le curseur est opaque et signé ; le client le renvoie tel quel à la synchronisation suivante.
+# date_maj est datée à l'écriture de la ligne , pas à la validation de sa transaction : une transaction
+# encore en cours peut valider plus tard des lignes datées d'avant la position d'un curseur déjà servi.
+# Les lignes écrites depuis moins de CHANGES_FEED_LAG secondes ne sont donc pas encore servies et ,
+# sous PostgreSQL , l'horizon recule aussi au début de la plus ancienne transaction d'écriture en cours
+# (pg_stat_activity) : un import ou une modification en masse plus long que le délai ne passe pas derrière un curseur.
+
+import datetime
+
+from django.conf import settings
+from django.core import signing
+from django.db import connection, models
+from django.utils import timezone
+
+from config.pagination import CursorSerializer, RowValue
+from config.prefetch import plan_queryset
+
+from .api.serializers import (
+    ArticleSerializer, CreativeSerializer, ProduitSyncSerializer, PromotionSerializer, SuppressionSerializer
+)
+from .models import Article, Creative, Produit, Promotion, Suppression
+
+SALT = 'products.changes'
+
+# Début de la plus ancienne transaction d'écriture en cours (un xid attribué) des autres connexions à la base
+OLDEST_WRITE_SQL = """
+    SELECT min(xact_start) FROM pg_stat_activity
+    WHERE datname = current_database() AND backend_xid IS NOT NULL AND pid <> pg_backend_pid()
+"""
+
+# Flux : nom -> (modèle, champ de date, serializer)
+STREAMS = {
+    'produits': (Produit, 'date_maj', ProduitSyncSerializer),
+    'articles': (Article, 'date_maj', ArticleSerializer),
+    'creatives': (Creative, 'date_maj', CreativeSerializer),
+    'promotions': (Promotion, 'date_maj', PromotionSerializer),
+    'suppressions': (Suppression, 'date_suppression', SuppressionSerializer),
+}
+
+# Nom du modèle dans les traces de suppression
+TOMBSTONE_NAMES = {Produit: 'produit', Article: 'article', Creative: 'creative', Promotion: 'promotion'}
+
+
+class CursorExpired(Exception):
+    """Curseur plus ancien que la rétention des suppressions : le client doit tout resynchroniser"""
+
+
+def encode_cursor(cursor):
+    return signing.dumps(cursor, salt=SALT, serializer=CursorSerializer, compress=True)
+
+
+def decode_cursor(encoded):
+    """Curseur vide pour une première synchronisation ; lève signing.BadSignature s'il a été modifié"""
+    if not encoded:
+        return {'positions': {}}
+    cursor = signing.loads(encoded, salt=SALT, serializer=CursorSerializer)
+    retention = datetime.timedelta(days=settings.CHANGES_RETENTION_DAYS)
+    if models.DateTimeField().to_python(cursor['date']) < timezone.now() - retention:
+        raise CursorExpired()
+    return cursor
+
+
+def oldest_write_transaction():
+    """Début de la plus ancienne transaction d'écriture en cours , ou None (aucune , ou hors PostgreSQL)"""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(OLDEST_WRITE_SQL)
+        return cursor.fetchone()[0]
+
+
+def feed_horizon(now):
+    """Date avant laquelle toutes les lignes sont validées : délai CHANGES_FEED_LAG et transactions en cours"""
+    horizon = now - datetime.timedelta(seconds=settings.CHANGES_FEED_LAG)
+    oldest = oldest_write_transaction()
+    return min(horizon, oldest) if oldest is not None else horizon
+
+
+def stream_page(name, position, horizon, limit):
+    """Lignes d'un flux après la position (date, id) et avant l'horizon ; retourne (lignes, complet)"""
+    model, date_field, serializer_class = STREAMS[name]
+    queryset = model.objects.filter(**{f'{date_field}__lt': horizon}).order_by(date_field, 'pk')
+    if position:
+        date, pk = position
+        queryset = queryset.alias(_position=RowValue(date_field, 'pk')).filter(
+            _position__gt=RowValue(models.Value(models.DateTimeField().to_python(date)), models.Value(pk))
+        )
+    rows = list(plan_queryset(queryset, serializer_class())[:limit + 1])
+    return rows[:limit], len(rows) <= limit
+
+
+def changes(encoded=None, limit=None):
+    """
+    Modifications depuis le curseur : un paquet d'au plus `limit` lignes par flux.
+    Retourne {flux: [...], 'next': curseur, 'complet': bool} ; tant que `complet` est faux,
+    le client rappelle le flux avec `next` pour lire les paquets suivants.
+    """
+    limit = limit or settings.CHANGES_FEED_BATCH_SIZE
+    cursor = decode_cursor(encoded)
+    now = timezone.now()
+    horizon = feed_horizon(now)
+    positions = dict(cursor['positions'])
+    data, complet = {}, True
+    for name, (model, date_field, serializer_class) in STREAMS.items():
+        rows, stream_complet = stream_page(name, positions.get(name), horizon, limit)
+        complet = complet and stream_complet
+        data[name] = serializer_class(rows, many=True).data
+        if rows:
+            positions[name] = [getattr(rows[-1], date_field), rows[-1].pk]
+    # La date du curseur sert au contrôle de rétention : celle de la dernière lecture complète
+    date = now if complet else cursor.get('date', now)
+    data['next'] = encode_cursor({'positions': positions, 'date': date})
+    data['complet'] = complet
+    return data
+
+
+def record_deletion(instance):
+    Suppression.objects.create(modele=TOMBSTONE_NAMES[type(instance)], objet_id=instance.pk)
+
+
+def purge_suppressions(days=None):
+    """Supprime les traces plus anciennes que la rétention ; retourne le nombre de lignes supprimées"""
+    limit = timezone.now() - datetime.timedelta(days=days or settings.CHANGES_RETENTION_DAYS)
+    return Suppression.objects.filter(date_suppression__lt=limit).delete()[0]
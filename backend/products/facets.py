@@ -0,0 +1,71 @@
+# Ce fichier facets.py calcule les compteurs de facettes du catalogue (origine, semelle,
+# catégorie, couleur et pointure) pour un ensemble de produits déjà filtré.
+# Toutes les facettes sont calculées en une seule requête : un UNION ALL d'agrégats groupés.
+
+import hashlib
+
+from django.db.models import CharField, Count, F, Value
+from django.db.models.functions import Cast
+from django.utils.http import urlencode
+
+from config.conditional import versions_token
+
+from .models import Produit, ProduitCategorie, Article
+
+# Ordre des facettes dans la réponse
+FACETS = ('origine', 'type_de_semelle', 'categories', 'couleur', 'pointure')
+
+
+def facet_query(queryset, facette, valeur, libelle, produit='pk'):
+    """Agrégat groupé pour une facette : (valeur, libelle, facette, total) par valeur distincte"""
+    return queryset.exclude(**{f'{valeur}__isnull': True}).annotate(
+        valeur=Cast(F(valeur), output_field=CharField()),
+        libelle=Cast(F(libelle), output_field=CharField()),
+    ).values('valeur', 'libelle').annotate(
+        facette=Value(facette, output_field=CharField()),
+        total=Count(produit, distinct=True),
+    ).values_list('valeur', 'libelle', 'facette', 'total')
+
+
+def facet_counts(queryset):
+    """Retourne pour chaque facette la liste des valeurs avec le nombre de produits correspondants"""
+    produits = queryset.order_by().values('pk')
+    articles = Article.objects.filter(produit__in=produits)
+
+    union = facet_query(Produit.objects.filter(pk__in=produits), 'origine', 'origine', 'origine').union(
+        facet_query(Produit.objects.filter(pk__in=produits), 'type_de_semelle', 'type_de_semelle', 'type_de_semelle'),
+        facet_query(
+            ProduitCategorie.objects.filter(produit__in=produits),
+            'categories', 'categorie_id', 'categorie__nom', produit='produit',
+        ),
+        facet_query(articles, 'couleur', 'couleur', 'couleur', produit='produit'),
+        facet_query(articles, 'pointure', 'pointure', 'pointure', produit='produit'),
+        all=True,
+    )
+
+    data = {facette: [] for facette in FACETS}
+    for valeur, libelle, facette, total in union:
+        if facette == 'categories':
+            data[facette].append({'valeur': int(valeur), 'libelle': libelle, 'total': total})
+        else:
+            data[facette].append({'valeur': valeur, 'total': total})
+    for values in data.values():
+        values.sort(key=lambda item: (-item['total'], str(item['valeur'])))
+    return data
+
+
+def facets_cache_key(request, view):
+    """
+    Clé de cache construite à partir des filtres normalisés : seuls les paramètres de filtre
+    comptent, dans un ordre fixe ; la recherche, insensible à la casse, est mise en minuscules.
+    Les versions des modèles y sont ajoutées : toute écriture sur le catalogue invalide les compteurs.
+    """
+    params = []
+    for name in sorted(set(view.filterset_fields) | {'search', 'matiere'}):
+        values = [value.strip() for value in request.query_params.getlist(name) if value.strip()]
+        if name == 'search':
+            values = [value.lower() for value in values]
+        params.extend((name, value) for value in sorted(values))
+    params.append(('versions', versions_token(view.version_models)))
+    digest = hashlib.md5(urlencode(params).encode('utf-8')).hexdigest()
+    return f'products:facets:{digest}'
@@ -0,0 +1,154 @@
+# Ce fichier images.py génère les images dérivées des médias produit (Creative) :
+# une version miniature, vignette et zoom de chaque image, en WebP et en JPEG.
+# Les fichiers sont nommés d'après un hash de leur contenu : une URL ne change jamais de contenu,
+# elle peut donc être mise en cache indéfiniment par les navigateurs et le CDN.
+# Le redimensionnement tourne dans un pool de processus (commande generate_derivatives
+# et signal post_save des Creative) ; seules les images locales (sous MEDIA_URL) sont traitées.
+# Les processus du pool sont démarrés en « spawn » : un fork du processus web copierait ses threads,
+# ses verrous et ses connexions ouvertes (base , cache) dans chaque processus du pool.
+
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from config.conditional import bump_version
+
+from .models import Creative
+
+logger = logging.getLogger(__name__)
+
+# Dossier des images dérivées, relatif à MEDIA_ROOT
+DERIVES_DIR = os.path.join('products', 'derives')
+
+# Paramètres d'enregistrement par format
+FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 6},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+
+def source_path(url):
+    """Chemin local de l'image d'un média , ou None si l'image n'est pas un fichier sous MEDIA_ROOT"""
+    if not url or not url.startswith(settings.MEDIA_URL):
+        return None
+    path = os.path.normpath(os.path.join(settings.MEDIA_ROOT, url[len(settings.MEDIA_URL):]))
+    if not path.startswith(os.path.normpath(settings.MEDIA_ROOT) + os.sep) or not os.path.isfile(path):
+        return None
+    return path
+
+
+def render_derivatives(path, tailles, media_root, media_url):
+    """
+    Génère les images dérivées d'un fichier source (exécuté dans un processus du pool).
+    Retourne {taille: {'largeur': ..., 'webp': url, 'jpeg': url}} ; une image n'est jamais agrandie.
+    """
+    from PIL import Image, ImageOps
+
+    derives = {}
+    os.makedirs(os.path.join(media_root, DERIVES_DIR), exist_ok=True)
+    with Image.open(path) as source:
+        source = ImageOps.exif_transpose(source).convert('RGB')
+        for taille, largeur in tailles.items():
+            largeur = min(largeur, source.width)
+            hauteur = max(1, round(source.height * largeur / source.width))
+            image = source.resize((largeur, hauteur), Image.LANCZOS)
+            derives[taille] = {'largeur': largeur}
+            for extension, options in FORMATS.items():
+                buffer = io.BytesIO()
+                image.save(buffer, **options)
+                content = buffer.getvalue()
+                name = f"{taille}-{hashlib.sha256(content).hexdigest()[:20]}.{extension}"
+                target = os.path.join(media_root, DERIVES_DIR, name)
+                # Même contenu , même nom : un fichier déjà présent est identique
+                if not os.path.exists(target):
+                    with open(target + '.tmp', 'wb') as file:
+                        file.write(content)
+                    os.replace(target + '.tmp', target)
+                derives[taille][extension] = media_url + '/'.join((*DERIVES_DIR.split(os.sep), name))
+    return derives
+
+
+def derivative_job(creative):
+    """Arguments du travail de génération pour un média , ou None si son image n'est pas locale"""
+    path = source_path(creative.url)
+    if path is None:
+        return None
+    return (path, settings.IMAGE_DERIVATIVES, str(settings.MEDIA_ROOT), settings.MEDIA_URL)
+
+
+def save_derivatives(pk, url, tailles):
+    """Enregistre les dérivées d'un média , si son image n'a pas changé entre-temps"""
+    updated = Creative.objects.filter(pk=pk, url=url).update(
+        derives={'source': url, 'tailles': tailles}, date_maj=timezone.now()
+    )
+    if updated:
+        bump_version(Creative)
+
+
+def process_pool(workers):
+    """Pool de processus démarrés en spawn , qui chargent Django avant de recevoir un travail"""
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup
+    )
+
+
+# Pool partagé par les signaux d'un processus web , créé à la première image
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = process_pool(settings.IMAGE_DERIVATIVES_WORKERS)
+        return _executor
+
+
+def schedule_derivatives(creative):
+    """Génère les dérivées d'un média en arrière-plan , après la validation de la transaction"""
+    job = derivative_job(creative)
+    if job is None:
+        return
+    pk, url = creative.pk, creative.url
+
+    def done(future):
+        # Exécuté dans un thread du processus web : connexion propre à ce thread , fermée à la fin
+        try:
+            if future.exception() is None:
+                save_derivatives(pk, url, future.result())
+            else:
+                logger.error("Images dérivées du média %s non générées : %s", pk, future.exception())
+        finally:
+            connections.close_all()
+
+    transaction.on_commit(lambda: get_executor().submit(render_derivatives, *job).add_done_callback(done))
+
+
+def srcset(derives, url):
+    """
+    Construit les attributs srcset par format : {'webp': 'url 160w, url 480w, ...', 'jpeg': ...}
+    Dérivées d'une autre image que `url` (image du média changée depuis) : aucun srcset.
+    """
+    derives = derives or {}
+    if derives.get('source') != url:
+        return {}
+    tailles = {}
+    for derive in derives.get('tailles', {}).values():
+        # Une image source étroite donne plusieurs tailles de même largeur : une seule entrée par largeur
+        tailles.setdefault(derive['largeur'], derive)
+    tailles = [tailles[largeur] for largeur in sorted(tailles)]
+    return {
+        extension: ', '.join(f"{derive[extension]} {derive['largeur']}w" for derive in tailles)
+        for extension in FORMATS
+        if tailles
+    }
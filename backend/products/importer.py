@@ -0,0 +1,302 @@
+# Ce fichier importer.py charge en masse un flux catalogue fournisseur (CSV ou JSONL).
+# Le flux est lu par lots ; chaque lot est copié dans une table temporaire avec COPY,
+# puis fusionné dans Produit, ProduitCategorie, Article, Creative et Promotion
+# par quelques requêtes ensemblistes (une par table), dans une seule transaction par lot.
+# Une ligne du flux décrit un article (SKU) et son produit :
+#   nom, prix, description, type_de_semelle, matieres_premieres, origine,
+#   categories (séparées par "|" en CSV, liste en JSONL), code_bar, couleur, pointure,
+#   image_url, type_promo, reduction, date_debut, date_fin
+# Les produits sont identifiés par leur nom, les articles par leur code-barres.
+# Le nom n'étant pas unique en base, un lot qui nomme un produit porté par plusieurs produits
+# existants est rejeté (CatalogueImportError) plutôt que d'écraser tous les homonymes ;
+# les lots sont importés l'un après l'autre (verrou consultatif) pour ne pas créer de doublons.
+
+import csv
+import io
+import json
+from itertools import islice
+
+from django.db import connection, transaction
+
+from config.conditional import bump_version
+
+from .availability import refresh_availability
+from .barcodes import barcode_cache
+from .cards import refresh_cards
+from .materials import normalize_matieres, rebuild_matieres
+from .models import Produit, Categories, ProduitCategorie, Article, Creative, Promotion
+from .search import update_search_vector
+from .similarity import schedule_similar_refresh
+
+# Nombre de lignes du flux traitées par lot
+CHUNK_SIZE = 5000
+
+# Colonnes du flux, dans l'ordre de la table temporaire
+COLUMNS = (
+    'nom', 'prix', 'description', 'type_de_semelle', 'matieres_premieres', 'origine',
+    'categories', 'code_bar', 'couleur', 'pointure', 'image_url',
+    'type_promo', 'reduction', 'date_debut', 'date_fin',
+)
+
+# Séparateur des catégories dans une cellule CSV
+CATEGORIES_SEPARATOR = '|'
+
+# Verrou consultatif de transaction : deux imports ne fusionnent jamais un lot en même temps
+LOCK_SQL = "SELECT pg_advisory_xact_lock(hashtext('products.import_catalogue'))"
+
+STAGING_SQL = f"""
+CREATE TEMP TABLE import_catalogue (
+    ligne bigint,
+    {', '.join(f'{column} text' for column in COLUMNS)},
+    produit_id bigint
+) ON COMMIT DROP
+"""
+
+# Noms du lot portés par plusieurs produits existants (le rattachement par nom serait ambigu)
+AMBIGUOUS_SQL = """
+SELECT p.nom FROM products_produit p
+WHERE p.nom IN (SELECT nom FROM import_catalogue)
+GROUP BY p.nom HAVING count(*) > 1
+ORDER BY p.nom
+LIMIT 10
+"""
+
+# Produits actuels des articles du lot : un article rattaché à un autre produit quitte sa matrice de disponibilité
+PREVIOUS_SQL = """
+SELECT DISTINCT a.produit_id FROM products_article a
+WHERE a.code_bar IN (SELECT code_bar FROM import_catalogue WHERE code_bar IS NOT NULL)
+"""
+
+# Étapes de fusion, exécutées dans l'ordre ; chaque requête traite tout le lot
+# (%(separator)s reçoit CATEGORIES_SEPARATOR)
+MERGE_SQL = (
+    # Produits existants : mise à jour par nom (la dernière ligne du flux l'emporte)
+    """
+    UPDATE products_produit p SET
+        prix = s.prix::numeric,
+        description = COALESCE(s.description, p.description),
+        type_de_semelle = COALESCE(s.type_de_semelle, p.type_de_semelle),
+        matieres_premieres = COALESCE(s.matieres_premieres::jsonb, p.matieres_premieres),
+        origine = COALESCE(s.origine, p.origine),
+        date_maj = now()
+    FROM (
+        SELECT DISTINCT ON (nom) * FROM import_catalogue ORDER BY nom, ligne DESC
+    ) s
+    WHERE p.nom = s.nom
+    """,
+    # Nouveaux produits
+    """
+    INSERT INTO products_produit (nom, prix, description, type_de_semelle, matieres_premieres, origine)
+    SELECT s.nom, s.prix::numeric, s.description, s.type_de_semelle, s.matieres_premieres::jsonb, s.origine
+    FROM (
+        SELECT DISTINCT ON (nom) * FROM import_catalogue ORDER BY nom, ligne DESC
+    ) s
+    WHERE NOT EXISTS (SELECT 1 FROM products_produit p WHERE p.nom = s.nom)
+    """,
+    # Rattachement de chaque ligne à son produit
+    """
+    UPDATE import_catalogue s SET produit_id = p.id
+    FROM products_produit p
+    WHERE p.nom = s.nom
+    """,
+    # Catégories : création de celles qui n'existent pas encore, puis association
+    """
+    INSERT INTO products_categories (nom)
+    SELECT DISTINCT c.nom
+    FROM import_catalogue s,
+         unnest(string_to_array(s.categories, %(separator)s)) AS c(nom)
+    WHERE c.nom <> ''
+      AND NOT EXISTS (SELECT 1 FROM products_categories k WHERE k.nom = c.nom)
+    """,
+    """
+    INSERT INTO products_produitcategorie (produit_id, categorie_id)
+    SELECT DISTINCT s.produit_id, k.id
+    FROM import_catalogue s,
+         unnest(string_to_array(s.categories, %(separator)s)) AS c(nom)
+    JOIN (SELECT nom, min(id) AS id FROM products_categories GROUP BY nom) k ON k.nom = c.nom
+    ON CONFLICT (produit_id, categorie_id) DO NOTHING
+    """,
+    # Articles : upsert sur l'index unique du code-barres
+    """
+    INSERT INTO products_article (produit_id, couleur, pointure, code_bar)
+    SELECT DISTINCT ON (code_bar) produit_id, couleur, pointure, code_bar
+    FROM import_catalogue
+    WHERE code_bar IS NOT NULL
+    ORDER BY code_bar, ligne DESC
+    ON CONFLICT (code_bar) DO UPDATE SET
+        produit_id = EXCLUDED.produit_id,
+        couleur = EXCLUDED.couleur,
+        pointure = EXCLUDED.pointure,
+        date_maj = now()
+    """,
+    # Médias : ajout des images pas encore connues pour le produit
+    """
+    INSERT INTO products_creative (produit_id, type_creative, url)
+    SELECT DISTINCT s.produit_id, 'image', s.image_url
+    FROM import_catalogue s
+    WHERE s.image_url IS NOT NULL
+      AND NOT EXISTS (
+          SELECT 1 FROM products_creative c WHERE c.produit_id = s.produit_id AND c.url = s.image_url
+      )
+    """,
+    # Promotions : mise à jour de la réduction d'une promotion identique, sinon création
+    """
+    UPDATE products_promotion p SET reduction = s.reduction::numeric, date_maj = now()
+    FROM (
+        SELECT DISTINCT ON (produit_id, type_promo, date_debut, date_fin) *
+        FROM import_catalogue WHERE type_promo IS NOT NULL
+        ORDER BY produit_id, type_promo, date_debut, date_fin, ligne DESC
+    ) s
+    WHERE p.produit_id = s.produit_id AND p.type_promo = s.type_promo
+      AND p.date_debut = s.date_debut::date AND p.date_fin = s.date_fin::date
+    """,
+    """
+    INSERT INTO products_promotion (produit_id, type_promo, reduction, date_debut, date_fin)
+    SELECT s.produit_id, s.type_promo, s.reduction::numeric, s.date_debut::date, s.date_fin::date
+    FROM (
+        SELECT DISTINCT ON (produit_id, type_promo, date_debut, date_fin) *
+        FROM import_catalogue WHERE type_promo IS NOT NULL
+        ORDER BY produit_id, type_promo, date_debut, date_fin, ligne DESC
+    ) s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM products_promotion p
+        WHERE p.produit_id = s.produit_id AND p.type_promo = s.type_promo
+          AND p.date_debut = s.date_debut::date AND p.date_fin = s.date_fin::date
+    )
+    """,
+)
+
+
+class CatalogueImportError(ValueError):
+    """Lot du flux rejeté (valeur invalide, contrainte non respectée, nom de produit ambigu...)"""
+
+
+def read_csv(stream):
+    """Lit un flux CSV (avec en-tête) ligne par ligne"""
+    for row in csv.DictReader(stream):
+        yield row
+
+
+def read_jsonl(stream):
+    """Lit un flux JSONL (un objet JSON par ligne) ligne par ligne"""
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+READERS = {
+    'csv': read_csv,
+    'jsonl': read_jsonl,
+}
+
+
+def normalize_row(row):
+    """Ramène une ligne du flux aux colonnes de la table temporaire (texte ou None)"""
+    values = []
+    for column in COLUMNS:
+        value = row.get(column)
+        if column == 'categories' and isinstance(value, (list, tuple)):
+            value = CATEGORIES_SEPARATOR.join(str(nom).strip() for nom in value)
+        elif column == 'matieres_premieres' and isinstance(value, (dict, list)):
+            value = json.dumps(value, ensure_ascii=False)
+        elif column == 'matieres_premieres' and isinstance(value, str):
+            # Objet de matières encodé deux fois dans le flux (chaîne JSON) : décodé avant l'import
+            matieres = normalize_matieres(value.strip())
+            if isinstance(matieres, (dict, list)):
+                value = json.dumps(matieres, ensure_ascii=False)
+        elif value is not None:
+            value = str(value).strip()
+        values.append(value or None)
+    return values
+
+
+def chunks(rows, size):
+    """Découpe un itérable de lignes en lots"""
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def copy_chunk(cursor, rows, first_line):
+    """Copie un lot dans la table temporaire avec COPY (une seule requête)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for ligne, values in enumerate(rows, start=first_line):
+        # Une cellule vide non quotée est lue comme NULL par COPY ... CSV
+        writer.writerow([ligne, *('' if value is None else value for value in values)])
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY import_catalogue (ligne, {', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+
+
+def import_chunk(rows, first_line=1):
+    """
+    Importe un lot de lignes normalisées dans une transaction ;
+    retourne les ids des produits touchés.
+    """
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(LOCK_SQL)
+            # ON COMMIT DROP ne supprime la table qu'à la fin de la transaction englobante , s'il y en a une
+            cursor.execute("DROP TABLE IF EXISTS import_catalogue")
+            cursor.execute(STAGING_SQL)
+            copy_chunk(cursor, rows, first_line)
+            cursor.execute(AMBIGUOUS_SQL)
+            ambiguous = [row[0] for row in cursor.fetchall()]
+            if ambiguous:
+                raise CatalogueImportError(
+                    f"Lot commençant à la ligne {first_line} rejeté : nom(s) porté(s) par plusieurs produits "
+                    f"existants ({', '.join(ambiguous)}) , à renommer avant l'import."
+                )
+            cursor.execute(PREVIOUS_SQL)
+            previous_ids = [row[0] for row in cursor.fetchall()]
+            for sql in MERGE_SQL:
+                cursor.execute(sql, {'separator': CATEGORIES_SEPARATOR})
+            cursor.execute("SELECT DISTINCT produit_id FROM import_catalogue")
+            produit_ids = [row[0] for row in cursor.fetchall()]
+            # catégories et attributs changés : voisins recalculés par le worker refresh_similar
+            schedule_similar_refresh(produit_ids)
+    except CatalogueImportError:
+        raise
+    except Exception as exc:
+        raise CatalogueImportError(f"Lot commençant à la ligne {first_line} rejeté : {exc}") from exc
+    refresh_derived(produit_ids)
+    refresh_availability(set(previous_ids) - set(produit_ids))
+    return produit_ids
+
+
+def refresh_derived(produit_ids):
+    """
+    Les requêtes ensemblistes ne déclenchent pas les signaux :
+    mise à jour explicite des données dérivées des produits touchés.
+    """
+    update_search_vector(Produit.objects.filter(pk__in=produit_ids))
+    refresh_cards(produit_ids)
+    refresh_availability(produit_ids)
+    barcode_cache.clear()
+    bump_version(Produit, Categories, ProduitCategorie, Article, Creative, Promotion)
+
+
+def import_catalogue(stream, file_format='csv', chunk_size=CHUNK_SIZE):
+    """
+    Importe un flux catalogue lot par lot ; produit pour chaque lot
+    (nombre de lignes importées, nombre de lignes ignorées, ids des produits touchés).
+    Les lignes sans nom ou sans prix sont ignorées.
+    """
+    line = 1
+    imported = False
+    try:
+        for chunk in chunks(READERS[file_format](stream), chunk_size):
+            rows = [normalize_row(row) for row in chunk]
+            valid = [values for values in rows if values[0] and values[1]]
+            produit_ids = import_chunk(valid, first_line=line) if valid else []
+            imported = imported or bool(produit_ids)
+            line += len(chunk)
+            yield len(valid), len(rows) - len(valid), produit_ids
+    finally:
+        # Les matières des produits mis à jour ne sont pas connues avant la fusion : index reconstruit une fois ,
+        # y compris quand un lot suivant est rejeté (les lots précédents sont validés)
+        if imported:
+            rebuild_matieres()
@@ -0,0 +1,26 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products.recommendations import CHUNK_SIZE, build_bought_together
+
+
+class Command(BaseCommand):
+    """
+    Recalcule les produits souvent achetés ensemble (AchatAssocie) à partir des lignes de commande.
+    Calcul hors ligne , à planifier (ex: chaque nuit) : la table est remplacée en une transaction.
+    """
+    help = "Recalcule les produits souvent achetés ensemble par co-occurrence dans les commandes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=settings.BOUGHT_TOGETHER_TOP_N, help="Nombre de voisins par produit")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Nombre de commandes lues par paquet")
+        parser.add_argument('--min-commandes', type=int, default=1, help="Nombre minimal de commandes en commun")
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        total = build_bought_together(options['top'], options['chunk_size'], options['min_commandes'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} association(s) enregistrée(s) en {time.monotonic() - start:.1f} s."
+        ))
@@ -0,0 +1,25 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products.similarity import build_similar
+
+
+class Command(BaseCommand):
+    """
+    Reconstruit l'index des produits similaires (ProduitSimilaire).
+    Le worker refresh_similar le met à jour après chaque écriture de produit ; cette commande sert au remplissage
+    initial, après un import en masse et pour recalculer les poids TF-IDF sur tout le catalogue.
+    """
+    help = "Reconstruit l'index des produits similaires (TF-IDF + similarité cosinus)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--k', type=int, default=settings.SIMILAR_PRODUCTS_K, help="Nombre de voisins par produit")
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        total = build_similar(options['k'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} produit(s) similaire(s) enregistré(s) en {time.monotonic() - start:.1f} s."
+        ))
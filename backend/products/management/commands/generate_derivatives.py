@@ -0,0 +1,49 @@
+import os
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from products.images import derivative_job, process_pool, render_derivatives, save_derivatives
+from products.models import Creative
+
+
+class Command(BaseCommand):
+    """
+    Génère les images dérivées (miniature, vignette, zoom en WebP et JPEG) des médias produit.
+    Le signal post_save des Creative s'en charge à chaque nouvelle image ; cette commande sert
+    au rattrapage des images existantes et après un changement des tailles (IMAGE_DERIVATIVES).
+    """
+    help = "Génère les images dérivées des médias produit avec un pool de processus"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Nombre de processus")
+        parser.add_argument('--force', action='store_true', help="Régénère aussi les médias déjà traités")
+
+    def handle(self, *args, **options):
+        jobs = {}
+        for creative in Creative.objects.order_by('pk').only('pk', 'url', 'derives'):
+            # sans --force : médias sans dérivées , ou dérivées d'une image remplacée depuis
+            if not options['force'] and creative.derives.get('source') == creative.url:
+                continue
+            job = derivative_job(creative)
+            if job is not None:
+                jobs[(creative.pk, creative.url)] = job
+
+        # Les connexions sont rouvertes à la demande par save_derivatives
+        connections.close_all()
+        done = failed = 0
+        with process_pool(options['workers']) as executor:
+            futures = {executor.submit(render_derivatives, *job): key for key, job in jobs.items()}
+            for future in as_completed(futures):
+                pk, url = futures[future]
+                try:
+                    save_derivatives(pk, url, future.result())
+                    done += 1
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"Média {pk} ({url}) : {exc}")
+
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{failed} média(s) en erreur."))
+        self.stdout.write(self.style.SUCCESS(f"Images dérivées générées pour {done} média(s)."))
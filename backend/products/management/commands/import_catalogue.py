@@ -0,0 +1,55 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.importer import CHUNK_SIZE, READERS, CatalogueImportError, import_catalogue
+
+
+class Command(BaseCommand):
+    """
+    Importe un flux catalogue fournisseur (CSV ou JSONL) en masse.
+    Chaque lot est chargé avec COPY dans une table temporaire puis fusionné par requêtes
+    ensemblistes ; vecteurs de recherche, vignettes et disponibilités sont recalculés par lot.
+    Exemple : python manage.py import_catalogue fournisseur.csv --chunk-size 10000
+    """
+    help = "Importe un flux catalogue (CSV ou JSONL) par lots avec COPY"
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichier', help="Chemin du flux à importer")
+        parser.add_argument(
+            '--format', choices=sorted(READERS), help="Format du flux (déduit de l'extension par défaut)"
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Nombre de lignes par lot")
+
+    def handle(self, *args, **options):
+        path = Path(options['fichier'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(f"Format inconnu : {file_format!r} (attendu : {', '.join(sorted(READERS))}).")
+        if not path.exists():
+            raise CommandError(f"Fichier introuvable : {path}")
+
+        total = ignored = 0
+        produits = set()
+        start = time.perf_counter()
+        with path.open(encoding='utf-8-sig', newline='') as stream:
+            try:
+                for imported, skipped, produit_ids in import_catalogue(stream, file_format, options['chunk_size']):
+                    total += imported
+                    ignored += skipped
+                    produits.update(produit_ids)
+                    if not imported:
+                        continue
+                    elapsed = time.perf_counter() - start
+                    self.stdout.write(f"{total} ligne(s) importée(s) ({total / elapsed:.0f} lignes/s)")
+            except CatalogueImportError as exc:
+                raise CommandError(str(exc)) from exc
+
+        elapsed = time.perf_counter() - start
+        if ignored:
+            self.stdout.write(self.style.WARNING(f"{ignored} ligne(s) ignorée(s) : nom ou prix manquant."))
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} ligne(s) importée(s) pour {len(produits)} produit(s) en {elapsed:.1f} s "
+            f"({total / elapsed if elapsed else 0:.0f} lignes/s)."
+        ))
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products.changes import purge_suppressions
+
+
+class Command(BaseCommand):
+    """
+    Supprime les traces de suppression plus anciennes que la rétention du flux des modifications.
+    Un client dont le curseur est plus ancien reçoit 410 Gone et repart d'une synchronisation complète.
+    """
+    help = "Supprime les traces de suppression plus anciennes que CHANGES_RETENTION_DAYS"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.CHANGES_RETENTION_DAYS, help="Rétention des traces (en jours)"
+        )
+
+    def handle(self, *args, **options):
+        total = purge_suppressions(options['days'])
+        self.stdout.write(self.style.SUCCESS(f"{total} trace(s) de suppression supprimée(s)."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from products.availability import CHUNK_SIZE, refresh_availability
+from products.models import Produit
+
+
+class Command(BaseCommand):
+    """
+    Reconstruit l'index de disponibilité des articles (Disponibilite).
+    Les signaux maintiennent l'index à chaque écriture d'article ou de ligne de commande ;
+    cette commande sert au remplissage initial et après un import en masse.
+    """
+    help = "Reconstruit l'index de disponibilité des articles par lots"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Nombre de produits par lot")
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        ids = list(Produit.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(ids), chunk_size):
+            refresh_availability(ids[start:start + chunk_size])
+        self.stdout.write(self.style.SUCCESS(f"Disponibilités reconstruites pour {len(ids)} produit(s)."))
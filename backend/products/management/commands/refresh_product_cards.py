@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from products.cards import CHUNK_SIZE, refresh_cards
+from products.models import Produit
+
+
+class Command(BaseCommand):
+    """
+    Reconstruit les vignettes produit (ProduitCard).
+    Les signaux maintiennent les vignettes à chaque écriture ; cette commande sert au
+    remplissage initial et à un passage quotidien, car une promotion qui commence
+    ou se termine change le prix effectif sans aucune écriture.
+    """
+    help = "Reconstruit les vignettes produit (ProduitCard) par lots"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Nombre de produits par lot")
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        ids = list(Produit.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(ids), chunk_size):
+            refresh_cards(ids[start:start + chunk_size])
+        self.stdout.write(self.style.SUCCESS(f"{len(ids)} vignette(s) produit reconstruite(s)."))
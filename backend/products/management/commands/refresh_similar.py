@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from products.similarity import drain_similar
+
+
+class Command(BaseCommand):
+    """
+    Worker de l'index des produits similaires : recalcule par paquets , hors des requêtes HTTP ,
+    les produits mis en file par les écritures (SimilaireEnAttente).
+    Tourne en continu ; --once vide la file puis s'arrête.
+    """
+    help = "Met à jour l'index des produits similaires pour les produits modifiés"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.SIMILAR_REFRESH_BATCH_SIZE, help="Produits par paquet"
+        )
+        parser.add_argument(
+            '--interval', type=float, default=settings.SIMILAR_REFRESH_INTERVAL,
+            help="Attente (en secondes) quand la file est vide"
+        )
+        parser.add_argument('--once', action='store_true', help="Vide la file puis s'arrête")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total = 0
+        try:
+            while True:
+                close_old_connections()
+                lus = drain_similar(batch_size)
+                total += lus
+                if lus < batch_size:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"{total} produit(s) recalculé(s)."))
@@ -0,0 +1,151 @@
+# Ce fichier materials.py gère les matières premières des produits (Produit.matieres_premieres,
+# un objet jsonb {"dessus": "cuir", "semelle": "caoutchouc", ...}) :
+#   - le filtre ?matiere= de la liste des produits, en requêtes servies par l'index GIN de la colonne :
+#     containment @> pour une partie donnée (dessus:cuir), chemin JSON @? pour n'importe quelle partie (cuir) ;
+#   - l'index des matières (Matiere) : nombre de produits par matière et par partie, maintenu par les signaux
+#     en recomptant les seules matières touchées (chaque compte est un parcours de l'index GIN).
+# pour plus d'informations : https://www.postgresql.org/docs/current/datatype-json.html#JSON-INDEXING
+
+import json
+
+from django.db import connection, transaction
+from django.db.models import BooleanField, F, Func, Q, Value
+
+from .models import Matiere
+
+# Séparateur entre la partie et la matière dans ?matiere=dessus:cuir
+PARTIE_SEPARATOR = ':'
+
+COUNT_CONTAINS_SQL = "SELECT %s, %s, count(*) FROM products_produit WHERE matieres_premieres @> %s::jsonb"
+COUNT_ANY_SQL = "SELECT %s, %s, count(*) FROM products_produit WHERE matieres_premieres @? %s::jsonpath"
+
+REBUILD_SQL = """
+    WITH matieres AS (
+        SELECT p.id, m.key AS partie, m.value #>> '{}' AS nom
+        FROM products_produit p,
+             jsonb_each(CASE WHEN jsonb_typeof(p.matieres_premieres) = 'object' THEN p.matieres_premieres ELSE '{}' END) m
+        WHERE jsonb_typeof(m.value) = 'string' AND m.value #>> '{}' <> ''
+    )
+    SELECT partie, nom, count(*) FROM matieres GROUP BY partie, nom
+    UNION ALL
+    SELECT '', nom, count(DISTINCT id) FROM matieres GROUP BY nom
+"""
+
+
+class JSONPathExists(Func):
+    """Expression SQL `colonne @? 'chemin'` : vrai si le chemin JSON trouve une valeur (indexable par GIN jsonb_ops)"""
+    template = '%(expressions)s'
+    arg_joiner = ' @? '
+    output_field = BooleanField()
+
+
+def any_part_path(nom):
+    """Chemin JSON d'une matière dans n'importe quelle partie , la valeur étant échappée comme une chaîne JSON"""
+    return f'$.* ? (@ == {json.dumps(nom)})'
+
+
+def parse_matiere(value):
+    """'dessus:cuir' -> ('dessus', 'cuir') ; 'cuir' -> ('', 'cuir')"""
+    partie, _, nom = value.rpartition(PARTIE_SEPARATOR)
+    return partie.strip(), nom.strip()
+
+
+def matiere_condition(value):
+    """Condition de filtre pour une valeur de ?matiere="""
+    partie, nom = parse_matiere(value)
+    if partie:
+        return Q(matieres_premieres__contains={partie: nom})
+    return Q(JSONPathExists(F('matieres_premieres'), Value(any_part_path(nom))))
+
+
+def filter_matieres(queryset, values):
+    """Produits contenant toutes les matières demandées"""
+    for value in values:
+        if parse_matiere(value)[1]:
+            queryset = queryset.filter(matiere_condition(value))
+    return queryset
+
+
+def matiere_pairs(matieres):
+    """Couples (partie, matière) d'un objet matieres_premieres , plus ('', matière) pour « n'importe quelle partie »"""
+    if not isinstance(matieres, dict):
+        return set()
+    pairs = {(partie, nom) for partie, nom in matieres.items() if isinstance(nom, str) and nom}
+    return pairs | {('', nom) for _, nom in pairs}
+
+
+def normalize_matieres(value):
+    """Décode un objet de matières encodé une ou plusieurs fois en chaîne JSON ; les autres valeurs sont inchangées"""
+    decoded = value
+    while isinstance(decoded, str):
+        try:
+            decoded = json.loads(decoded)
+        except ValueError:
+            return value
+    return decoded if isinstance(decoded, (dict, list)) else value
+
+
+def save_counts(counts):
+    """Enregistre les comptes {(partie, matière): nombre} ; les matières sans produit sont supprimées"""
+    present = [
+        Matiere(partie=partie, nom=nom, nb_produits=total)
+        for (partie, nom), total in counts.items() if total
+    ]
+    absent = [key for key, total in counts.items() if not total]
+    with transaction.atomic():
+        Matiere.objects.bulk_create(
+            present, update_conflicts=True, unique_fields=['partie', 'nom'], update_fields=['nb_produits']
+        )
+        if absent:
+            condition = Q()
+            for partie, nom in absent:
+                condition |= Q(partie=partie, nom=nom)
+            Matiere.objects.filter(condition).delete()
+
+
+def refresh_matieres(pairs):
+    """Recompte les produits des couples (partie, matière) donnés : une requête UNION ALL de comptes indexés"""
+    pairs = sorted(pairs)
+    if not pairs:
+        return
+    parts, params = [], []
+    for partie, nom in pairs:
+        if partie:
+            parts.append(COUNT_CONTAINS_SQL)
+            params.extend((partie, nom, json.dumps({partie: nom})))
+        else:
+            parts.append(COUNT_ANY_SQL)
+            params.extend((partie, nom, any_part_path(nom)))
+    with connection.cursor() as cursor:
+        cursor.execute(' UNION ALL '.join(parts), params)
+        counts = {(partie, nom): total for partie, nom, total in cursor.fetchall()}
+    save_counts(counts)
+
+
+def rebuild_matieres():
+    """Reconstruit tout l'index des matières (un parcours de la table , après un import en masse)"""
+    with connection.cursor() as cursor:
+        cursor.execute(REBUILD_SQL)
+        counts = {(partie, nom): total for partie, nom, total in cursor.fetchall()}
+    with transaction.atomic():
+        Matiere.objects.all().delete()
+        save_counts(counts)
+
+
+def schedule_matieres_refresh(pairs):
+    """Recompte les matières touchées après la validation de la transaction en cours"""
+    pairs = set(pairs)
+    if pairs:
+        transaction.on_commit(lambda: refresh_matieres(pairs))
+
+
+def matieres_index():
+    """Matières distinctes avec le nombre de produits , au total et par partie , lues dans l'index Matiere"""
+    data = {}
+    for partie, nom, total in Matiere.objects.order_by('nom', 'partie').values_list('partie', 'nom', 'nb_produits'):
+        entry = data.setdefault(nom, {'nom': nom, 'nb_produits': 0, 'parties': {}})
+        if partie:
+            entry['parties'][partie] = total
+        else:
+            entry['nb_produits'] = total
+    return sorted(data.values(), key=lambda entry: (-entry['nb_produits'], entry['nom']))
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_alter_creative_options'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='produit',
+            index=models.Index(fields=['prix', 'id'], name='produit_prix_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produit',
+            index=models.Index(fields=['nom', 'id'], name='produit_nom_id_idx'),
+        ),
+    ]
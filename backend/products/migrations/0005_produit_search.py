@@ -0,0 +1,45 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:08
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+def remplir_search_vector(apps, schema_editor):
+    """Calcule le vecteur de recherche des produits existants (PostgreSQL uniquement , voir products.search)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from products.search import produit_search_vector
+
+    Produit = apps.get_model('products', 'Produit')
+    Produit.objects.update(search_vector=produit_search_vector())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_produit_produit_prix_id_idx_and_more'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='produit',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Vecteur de recherche'),
+        ),
+        migrations.RunPython(remplir_search_vector, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='produit',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='produit_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produit',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['nom'], name='produit_nom_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='produit',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['description'], name='produit_description_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
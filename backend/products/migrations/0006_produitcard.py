@@ -0,0 +1,35 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_produit_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProduitCard',
+            fields=[
+                ('produit', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='products.produit', verbose_name='Produit')),
+                ('nom', models.CharField(max_length=100, verbose_name='Nom')),
+                ('prix', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Prix')),
+                ('prix_effectif', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Prix effectif')),
+                ('origine', models.CharField(blank=True, max_length=255, null=True, verbose_name='Origine')),
+                ('type_de_semelle', models.CharField(blank=True, max_length=255, null=True, verbose_name='Type de semelle')),
+                ('categories', models.JSONField(default=list, verbose_name='Catégories')),
+                ('image_url', models.CharField(blank=True, max_length=255, null=True, verbose_name='Image')),
+                ('note_moyenne', models.DecimalField(blank=True, decimal_places=2, max_digits=3, null=True, verbose_name='Note moyenne')),
+                ('nb_avis', models.PositiveIntegerField(default=0, verbose_name="Nombre d'avis")),
+                ('date_maj', models.DateTimeField(auto_now=True, verbose_name='Date de mise à jour')),
+            ],
+            options={
+                'verbose_name': 'Vignette produit',
+                'verbose_name_plural': 'Vignettes produit',
+                'indexes': [models.Index(fields=['prix_effectif', 'produit'], name='card_prix_effectif_idx'), models.Index(fields=['nom', 'produit'], name='card_nom_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_produitcard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Disponibilite',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('couleur', models.CharField(blank=True, max_length=50, null=True, verbose_name='Couleur')),
+                ('pointure', models.CharField(blank=True, max_length=10, null=True, verbose_name='Pointure')),
+                ('quantite', models.PositiveIntegerField(default=0, verbose_name='Quantité disponible')),
+                ('produit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='disponibilites', to='products.produit', verbose_name='Produit')),
+            ],
+            options={
+                'verbose_name': 'Disponibilité',
+                'verbose_name_plural': 'Disponibilités',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_disponibilite'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='promotion',
+            index=models.Index(fields=['produit', 'date_debut', 'date_fin'], name='promotion_periode_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_promotion_periode_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='creative',
+            name='derives',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Images dérivées'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_creative_derives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AchatAssocie',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nb_commandes', models.PositiveIntegerField(verbose_name='Commandes en commun')),
+                ('rang', models.PositiveSmallIntegerField(verbose_name='Rang')),
+                ('associe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.produit', verbose_name='Produit associé')),
+                ('produit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='achats_associes', to='products.produit', verbose_name='Produit')),
+            ],
+            options={
+                'verbose_name': 'Achat associé',
+                'verbose_name_plural': 'Achats associés',
+                'indexes': [models.Index(fields=['produit', 'rang'], name='achat_associe_rang_idx')],
+            },
+        ),
+    ]
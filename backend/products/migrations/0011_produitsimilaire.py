@@ -0,0 +1,29 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_achatassocie'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProduitSimilaire',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Similarité')),
+                ('rang', models.PositiveSmallIntegerField(verbose_name='Rang')),
+                ('produit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similaires', to='products.produit', verbose_name='Produit')),
+                ('similaire', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.produit', verbose_name='Produit similaire')),
+            ],
+            options={
+                'verbose_name': 'Produit similaire',
+                'verbose_name_plural': 'Produits similaires',
+                'indexes': [models.Index(fields=['produit', 'rang'], name='produit_similaire_rang_idx'), models.Index(fields=['similaire'], name='produit_similaire_cible_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:36
+
+import json
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+# Copie de products.materials.REBUILD_SQL au moment de la migration : une migration ne dépend pas du code courant
+REBUILD_SQL = """
+    WITH matieres AS (
+        SELECT p.id, m.key AS partie, m.value #>> '{}' AS nom
+        FROM products_produit p,
+             jsonb_each(CASE WHEN jsonb_typeof(p.matieres_premieres) = 'object' THEN p.matieres_premieres ELSE '{}' END) m
+        WHERE jsonb_typeof(m.value) = 'string' AND m.value #>> '{}' <> ''
+    )
+    SELECT partie, nom, count(*) FROM matieres GROUP BY partie, nom
+    UNION ALL
+    SELECT '', nom, count(DISTINCT id) FROM matieres GROUP BY nom
+"""
+
+
+def normalize_matieres(value):
+    """Copie de products.materials.normalize_matieres au moment de la migration"""
+    decoded = value
+    while isinstance(decoded, str):
+        try:
+            decoded = json.loads(decoded)
+        except ValueError:
+            return value
+    return decoded if isinstance(decoded, (dict, list)) else value
+
+
+def normaliser_matieres(apps, schema_editor):
+    """Décode les matières enregistrées deux fois encodées (chaîne JSON au lieu d'un objet)"""
+    # Requêtes jsonb : sans objet hors de PostgreSQL (le filtre ?matiere= et l'index Matiere en dépendent)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Produit = apps.get_model('products', 'Produit')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT id FROM products_produit WHERE jsonb_typeof(matieres_premieres) = 'string'")
+        ids = [row[0] for row in cursor.fetchall()]
+    for produit in Produit.objects.filter(pk__in=ids).only('pk', 'matieres_premieres'):
+        matieres = normalize_matieres(produit.matieres_premieres)
+        if matieres != produit.matieres_premieres:
+            Produit.objects.filter(pk=produit.pk).update(matieres_premieres=matieres)
+
+
+def remplir_matieres(apps, schema_editor):
+    """Construit l'index des matières à partir des produits existants"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Matiere = apps.get_model('products', 'Matiere')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(REBUILD_SQL)
+        Matiere.objects.bulk_create(
+            Matiere(partie=partie, nom=nom, nb_produits=total) for partie, nom, total in cursor.fetchall()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_produitsimilaire'),
+    ]
+
+    operations = [
+        migrations.RunPython(normaliser_matieres, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='Matiere',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('partie', models.CharField(blank=True, default='', max_length=255, verbose_name='Partie')),
+                ('nom', models.CharField(max_length=255, verbose_name='Matière')),
+                ('nb_produits', models.PositiveIntegerField(default=0, verbose_name='Nombre de produits')),
+            ],
+            options={
+                'verbose_name': 'Matière',
+                'verbose_name_plural': 'Matières',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='produit',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['matieres_premieres'], name='produit_matieres_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='matiere',
+            unique_together={('partie', 'nom')},
+        ),
+        migrations.RunPython(remplir_matieres, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_matieres'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModificationMasse',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateTimeField(auto_now_add=True, verbose_name='Date')),
+                ('filtre', models.JSONField(verbose_name='Filtre')),
+                ('operation', models.JSONField(verbose_name='Opération')),
+                ('nb_produits', models.PositiveIntegerField(verbose_name='Produits modifiés')),
+                ('utilisateur', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Modification en masse',
+                'verbose_name_plural': 'Modifications en masse',
+                'ordering': ['-date'],
+            },
+        ),
+    ]
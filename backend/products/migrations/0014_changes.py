@@ -0,0 +1,67 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:41
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0013_modificationmasse'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Suppression',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modele', models.CharField(max_length=50, verbose_name='Modèle')),
+                ('objet_id', models.BigIntegerField(verbose_name='Identifiant')),
+                ('date_suppression', models.DateTimeField(auto_now_add=True, db_default=django.db.models.functions.datetime.Now(), verbose_name='Date de suppression')),
+            ],
+            options={
+                'verbose_name': 'Suppression',
+                'verbose_name_plural': 'Suppressions',
+            },
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='date_maj',
+            field=models.DateTimeField(auto_now=True, db_default=django.db.models.functions.datetime.Now(), verbose_name='Date de mise à jour'),
+        ),
+        migrations.AddField(
+            model_name='creative',
+            name='date_maj',
+            field=models.DateTimeField(auto_now=True, db_default=django.db.models.functions.datetime.Now(), verbose_name='Date de mise à jour'),
+        ),
+        migrations.AddField(
+            model_name='produit',
+            name='date_maj',
+            field=models.DateTimeField(auto_now=True, db_default=django.db.models.functions.datetime.Now(), verbose_name='Date de mise à jour'),
+        ),
+        migrations.AddField(
+            model_name='promotion',
+            name='date_maj',
+            field=models.DateTimeField(auto_now=True, db_default=django.db.models.functions.datetime.Now(), verbose_name='Date de mise à jour'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['date_maj', 'id'], name='article_date_maj_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='creative',
+            index=models.Index(fields=['date_maj', 'id'], name='creative_date_maj_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produit',
+            index=models.Index(fields=['date_maj', 'id'], name='produit_date_maj_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='promotion',
+            index=models.Index(fields=['date_maj', 'id'], name='promotion_date_maj_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='suppression',
+            index=models.Index(fields=['date_suppression', 'id'], name='suppression_date_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0014_changes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilaireEnAttente',
+            fields=[
+                ('produit', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Produit')),
+            ],
+            options={
+                'verbose_name': 'Produit similaire en attente',
+                'verbose_name_plural': 'Produits similaires en attente',
+            },
+        ),
+    ]
@@ -1,4 +1,8 @@
 from django.db import models
+from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models.functions import Now
 from django.utils.translation import gettext_lazy as _
 # JSONField fait maintenant partie de models dans Django 3.1+
 
@@ -40,6 +44,11 @@ class Produit(models.Model):
     type_de_semelle = models.CharField(_("Type de semelle"), max_length=255, blank=True, null=True)
     matieres_premieres = models.JSONField(_("Matières premières"), blank=True, null=True)
     origine = models.CharField(_("Origine"), max_length=255, blank=True, null=True)
+    # Date de dernière écriture (flux de synchronisation products.changes) ; la valeur par défaut
+    # de la base couvre les insertions en SQL (import en masse)
+    date_maj = models.DateTimeField(_("Date de mise à jour"), auto_now=True, db_default=Now())
+    # Vecteur de recherche plein texte (nom + description), maintenu par products.search
+    search_vector = SearchVectorField(_("Vecteur de recherche"), null=True, editable=False)
     categories = models.ManyToManyField(
         Categories, 
         through='ProduitCategorie',
@@ -50,6 +59,19 @@ class Produit(models.Model):
     class Meta:
         verbose_name = _("Produit")
         verbose_name_plural = _("Produits")
+        # Index pour la pagination par curseur sur les tris de l'API (clé + id)
+        indexes = [
+            models.Index(fields=['prix', 'id'], name='produit_prix_id_idx'),
+            models.Index(fields=['nom', 'id'], name='produit_nom_id_idx'),
+            # Index pour la recherche plein texte et la tolérance aux fautes de frappe
+            GinIndex(fields=['search_vector'], name='produit_search_vector_idx'),
+            GinIndex(fields=['nom'], name='produit_nom_trgm_idx', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['description'], name='produit_description_trgm_idx', opclasses=['gin_trgm_ops']),
+            # Index pour le filtre par matière (containment @> et chemins JSON @?) , voir products.materials
+            GinIndex(fields=['matieres_premieres'], name='produit_matieres_idx'),
+            # Index pour le flux des modifications (products.changes)
+            models.Index(fields=['date_maj', 'id'], name='produit_date_maj_idx'),
+        ]
         
     def __str__(self):
         return self.nom
@@ -79,14 +101,37 @@ class Article(models.Model):
     pointure = models.CharField(_("Pointure"), max_length=10, blank=True, null=True)
     code_bar = models.CharField(_("Code-barres"), max_length=50, unique=True)
     date_achat = models.DateField(_("Date d'achat"), blank=True, null=True)
+    date_maj = models.DateTimeField(_("Date de mise à jour"), auto_now=True, db_default=Now())
     
     class Meta:
         verbose_name = _("Article")
         verbose_name_plural = _("Articles")
+        indexes = [
+            models.Index(fields=['date_maj', 'id'], name='article_date_maj_idx'),
+        ]
         
     def __str__(self):
         return f"{self.produit.nom} - {self.couleur} - {self.pointure}"
 
+class Disponibilite(models.Model):
+    """Index de disponibilité : nombre d'articles non commandés par couleur et pointure (maintenu par products.availability)"""
+    produit = models.ForeignKey(
+        Produit,
+        on_delete=models.CASCADE,
+        related_name="disponibilites",
+        verbose_name=_("Produit")
+    )
+    couleur = models.CharField(_("Couleur"), max_length=50, blank=True, null=True)
+    pointure = models.CharField(_("Pointure"), max_length=10, blank=True, null=True)
+    quantite = models.PositiveIntegerField(_("Quantité disponible"), default=0)
+
+    class Meta:
+        verbose_name = _("Disponibilité")
+        verbose_name_plural = _("Disponibilités")
+
+    def __str__(self):
+        return f"{self.produit_id} - {self.couleur} - {self.pointure} ({self.quantite})"
+
 class Creative(models.Model):
     """Modèle pour les médias associés aux produits"""
     produit = models.ForeignKey(
@@ -97,10 +142,17 @@ class Creative(models.Model):
     )
     type_creative = models.CharField(_("Type"), max_length=255, blank=True, null=True)
     url = models.URLField(_("URL"), max_length=255)
+    # Images dérivées (miniature, vignette, zoom) générées par products.images :
+    # {"source": url, "tailles": {"thumb": {"largeur": 160, "webp": url, "jpeg": url}, ...}}
+    derives = models.JSONField(_("Images dérivées"), default=dict, blank=True, editable=False)
+    date_maj = models.DateTimeField(_("Date de mise à jour"), auto_now=True, db_default=Now())
     
     class Meta:
         verbose_name = "Creative"
         verbose_name_plural = "Creatives"
+        indexes = [
+            models.Index(fields=['date_maj', 'id'], name='creative_date_maj_idx'),
+        ]
         
     def __str__(self):
         return f"{self.type_creative} - {self.produit.nom}"
@@ -117,14 +169,151 @@ class Promotion(models.Model):
     reduction = models.DecimalField(_("Réduction"), max_digits=5, decimal_places=2)
     date_debut = models.DateField(_("Date de début"))
     date_fin = models.DateField(_("Date de fin"))
+    date_maj = models.DateTimeField(_("Date de mise à jour"), auto_now=True, db_default=Now())
     
     class Meta:
         verbose_name = _("Promotion")
         verbose_name_plural = _("Promotions")
+        # Index pour la recherche des promotions actives d'un produit à une date (products.pricing)
+        indexes = [
+            models.Index(fields=['produit', 'date_debut', 'date_fin'], name='promotion_periode_idx'),
+            models.Index(fields=['date_maj', 'id'], name='promotion_date_maj_idx'),
+        ]
         
     def __str__(self):
         return f"{self.type_promo} - {self.produit.nom} ({self.reduction}%)"
 
+class ProduitCard(models.Model):
+    """Modèle de lecture dénormalisé pour les vignettes produit (maintenu par products.cards)"""
+    produit = models.OneToOneField(
+        Produit,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="card",
+        verbose_name=_("Produit")
+    )
+    nom = models.CharField(_("Nom"), max_length=100)
+    prix = models.DecimalField(_("Prix"), max_digits=10, decimal_places=2)
+    prix_effectif = models.DecimalField(_("Prix effectif"), max_digits=10, decimal_places=2)
+    origine = models.CharField(_("Origine"), max_length=255, blank=True, null=True)
+    type_de_semelle = models.CharField(_("Type de semelle"), max_length=255, blank=True, null=True)
+    categories = models.JSONField(_("Catégories"), default=list)
+    image_url = models.CharField(_("Image"), max_length=255, blank=True, null=True)
+    note_moyenne = models.DecimalField(_("Note moyenne"), max_digits=3, decimal_places=2, blank=True, null=True)
+    nb_avis = models.PositiveIntegerField(_("Nombre d'avis"), default=0)
+    date_maj = models.DateTimeField(_("Date de mise à jour"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Vignette produit")
+        verbose_name_plural = _("Vignettes produit")
+        indexes = [
+            models.Index(fields=['prix_effectif', 'produit'], name='card_prix_effectif_idx'),
+            models.Index(fields=['nom', 'produit'], name='card_nom_idx'),
+        ]
+
+    def __str__(self):
+        return self.nom
+
+class AchatAssocie(models.Model):
+    """Produits souvent achetés ensemble : les produits les plus commandés avec chaque produit (maintenu par products.recommendations)"""
+    produit = models.ForeignKey(
+        Produit,
+        on_delete=models.CASCADE,
+        related_name="achats_associes",
+        verbose_name=_("Produit")
+    )
+    associe = models.ForeignKey(
+        Produit,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name=_("Produit associé")
+    )
+    nb_commandes = models.PositiveIntegerField(_("Commandes en commun"))
+    rang = models.PositiveSmallIntegerField(_("Rang"))
+
+    class Meta:
+        verbose_name = _("Achat associé")
+        verbose_name_plural = _("Achats associés")
+        indexes = [
+            models.Index(fields=['produit', 'rang'], name='achat_associe_rang_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.produit_id} -> {self.associe_id} ({self.nb_commandes})"
+
+class ProduitSimilaire(models.Model):
+    """Index des produits similaires : les k plus proches voisins de chaque produit par similarité cosinus (maintenu par products.similarity)"""
+    produit = models.ForeignKey(
+        Produit,
+        on_delete=models.CASCADE,
+        related_name="similaires",
+        verbose_name=_("Produit")
+    )
+    similaire = models.ForeignKey(
+        Produit,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name=_("Produit similaire")
+    )
+    score = models.FloatField(_("Similarité"))
+    rang = models.PositiveSmallIntegerField(_("Rang"))
+
+    class Meta:
+        verbose_name = _("Produit similaire")
+        verbose_name_plural = _("Produits similaires")
+        indexes = [
+            models.Index(fields=['produit', 'rang'], name='produit_similaire_rang_idx'),
+            # Pour retrouver les produits qui listent un produit modifié (mise à jour incrémentale)
+            models.Index(fields=['similaire'], name='produit_similaire_cible_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.produit_id} -> {self.similaire_id} ({self.score:.3f})"
+
+class SimilaireEnAttente(models.Model):
+    """
+    File des produits dont les voisins sont à recalculer (vidée par la commande refresh_similar).
+    Un id sans clé étrangère : la ligne peut être écrite pendant la suppression du produit.
+    """
+    produit = models.BigIntegerField(_("Produit"), primary_key=True)
+
+    class Meta:
+        verbose_name = _("Produit similaire en attente")
+        verbose_name_plural = _("Produits similaires en attente")
+
+    def __str__(self):
+        return str(self.produit)
+
+class Matiere(models.Model):
+    """Index des matières : nombre de produits par matière et par partie , partie vide pour « toutes parties » (maintenu par products.materials)"""
+    partie = models.CharField(_("Partie"), max_length=255, blank=True, default='')
+    nom = models.CharField(_("Matière"), max_length=255)
+    nb_produits = models.PositiveIntegerField(_("Nombre de produits"), default=0)
+
+    class Meta:
+        verbose_name = _("Matière")
+        verbose_name_plural = _("Matières")
+        unique_together = ('partie', 'nom')
+
+    def __str__(self):
+        return f"{self.partie}:{self.nom} ({self.nb_produits})" if self.partie else f"{self.nom} ({self.nb_produits})"
+
+class Suppression(models.Model):
+    """Trace d'un produit , article , média ou promotion supprimé , pour le flux des modifications (products.changes)"""
+    modele = models.CharField(_("Modèle"), max_length=50)
+    objet_id = models.BigIntegerField(_("Identifiant"))
+    date_suppression = models.DateTimeField(_("Date de suppression"), auto_now_add=True, db_default=Now())
+
+    class Meta:
+        verbose_name = _("Suppression")
+        verbose_name_plural = _("Suppressions")
+        indexes = [
+            models.Index(fields=['date_suppression', 'id'], name='suppression_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.modele} {self.objet_id} ({self.date_suppression:%Y-%m-%d %H:%M})"
+
 class Catalogue(models.Model):
     """Modèle pour les catalogues de produits"""
     nom = models.CharField(_("Nom"), max_length=255)
@@ -156,3 +345,25 @@ class ProduitCatalogue(models.Model):
     
     def __str__(self):
         return f"{self.produit.nom} - {self.catalogue.nom}"
+
+class ModificationMasse(models.Model):
+    """Journal des modifications en masse des produits (prix, attributs) faites par l'API (products.bulk)"""
+    utilisateur = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="+",
+        verbose_name=_("Utilisateur")
+    )
+    date = models.DateTimeField(_("Date"), auto_now_add=True)
+    filtre = models.JSONField(_("Filtre"))
+    operation = models.JSONField(_("Opération"))
+    nb_produits = models.PositiveIntegerField(_("Produits modifiés"))
+
+    class Meta:
+        verbose_name = _("Modification en masse")
+        verbose_name_plural = _("Modifications en masse")
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.operation.get('type')} - {self.nb_produits} produits ({self.date:%Y-%m-%d %H:%M})"
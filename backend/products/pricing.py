@@ -0,0 +1,44 @@
+# Ce fichier pricing.py calcule le prix effectif des produits : le prix après la meilleure
+# promotion active à une date donnée (réduction en pourcentage, arrondie au centime).
+# Le calcul est ensembliste : une expression SQL qui s'ajoute à n'importe quel queryset de produits,
+# avec une sous-requête d'intervalle servie par l'index (produit, date_debut, date_fin) des promotions.
+# Toute une page de produits est ainsi tarifée dans la même requête, et la liste peut être triée dessus.
+
+from django.db.models import DecimalField, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Round
+from django.utils import timezone
+
+from .models import Produit, Promotion
+
+
+def reduction_active(day=None, produit=OuterRef('pk')):
+    """Sous-requête : meilleure réduction (en %) parmi les promotions actives du produit à la date donnée"""
+    day = day or timezone.localdate()
+    return Subquery(
+        Promotion.objects.filter(
+            produit=produit, date_debut__lte=day, date_fin__gte=day
+        ).order_by('-reduction').values('reduction')[:1],
+        output_field=DecimalField(max_digits=5, decimal_places=2),
+    )
+
+
+def prix_effectif(day=None):
+    """Expression du prix effectif d'un produit : prix * (100 - réduction) / 100 , arrondi au centime"""
+    reduction = Coalesce(reduction_active(day), Value(0), output_field=DecimalField(max_digits=5, decimal_places=2))
+    return Round(
+        F('prix') * (Value(100) - reduction) / Value(100),
+        2,
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    )
+
+
+def with_prix_effectif(queryset, day=None):
+    """Ajoute l'annotation prix_effectif à un queryset de produits"""
+    return queryset.annotate(prix_effectif=prix_effectif(day))
+
+
+def effective_prices(produit_ids, day=None):
+    """Retourne {id produit: prix effectif} pour une liste de produits, en une seule requête"""
+    return dict(
+        with_prix_effectif(Produit.objects.filter(pk__in=produit_ids), day).values_list('pk', 'prix_effectif')
+    )
@@ -0,0 +1,145 @@
+# Ce fichier recommendations.py calcule les produits "souvent achetés ensemble".
+# La matrice de co-occurrence produit × produit (nombre de commandes contenant les deux produits)
+# est construite hors ligne (commande build_bought_together) avec des matrices creuses SciPy :
+# les lignes de commande sont lues par paquets de commandes consécutives, chaque paquet donne
+# une matrice d'incidence commande × produit B et sa contribution Bᵀ·B est ajoutée au total.
+# La mémoire est bornée par la taille d'un paquet et le nombre de paires de produits distinctes.
+# Seuls les N meilleurs voisins de chaque produit sont gardés dans la table AchatAssocie,
+# servie par /api/products/produits/<id>/bought-together/ derrière le cache Django.
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from commandes.models import Commande, LigneCommande
+from config.conditional import bump_version, versions_token
+
+from .api.serializers import ProduitListSerializer
+from .models import AchatAssocie, Produit, Promotion
+from .pricing import with_prix_effectif
+
+# Nombre de commandes lues par paquet
+CHUNK_SIZE = 10000
+
+# Nombre de lignes AchatAssocie insérées par requête
+BATCH_SIZE = 5000
+
+CACHE_KEY = 'products:bought-together:{}:{}'
+
+
+def produit_ids():
+    """Identifiants des produits triés : la position d'un id est son indice dans la matrice"""
+    import numpy as np
+
+    return np.fromiter(Produit.objects.order_by('pk').values_list('pk', flat=True).iterator(), dtype=np.int64)
+
+
+def commande_chunks(chunk_size=CHUNK_SIZE):
+    """
+    Parcourt les paires (commande, produit) distinctes par paquets de `chunk_size` commandes consécutives :
+    un parcours par clé (commande_id > dernier id lu), sans OFFSET sur les lignes.
+    """
+    import numpy as np
+
+    last = 0
+    while True:
+        # Id de la dernière commande du paquet , absent pour le dernier paquet
+        bound = list(
+            Commande.objects.filter(pk__gt=last).order_by('pk').values_list('pk', flat=True)[chunk_size - 1:chunk_size]
+        )
+        lines = LigneCommande.objects.filter(commande_id__gt=last)
+        if bound:
+            lines = lines.filter(commande_id__lte=bound[0])
+        rows = np.array(list(lines.values_list('commande_id', 'produit_id').distinct()), dtype=np.int64).reshape(-1, 2)
+        if len(rows):
+            yield rows
+        if not bound:
+            return
+        last = bound[0]
+
+
+def cooccurrence_matrix(ids, chunks):
+    """Matrice creuse (CSR) du nombre de commandes contenant chaque paire de produits, sans la diagonale"""
+    import numpy as np
+    from scipy import sparse
+
+    total = sparse.csr_matrix((len(ids), len(ids)), dtype=np.int32)
+    if not len(ids):
+        return total
+    for rows in chunks:
+        commandes = np.unique(rows[:, 0], return_inverse=True)[1]
+        colonnes = np.searchsorted(ids, rows[:, 1])
+        # Produit créé pendant le calcul (absent de ids) : ignoré
+        connus = (colonnes < len(ids)) & (ids[np.minimum(colonnes, len(ids) - 1)] == rows[:, 1])
+        incidence = sparse.csr_matrix(
+            (np.ones(connus.sum(), dtype=np.int32), (commandes[connus], colonnes[connus])),
+            shape=(commandes.max() + 1, len(ids)),
+        )
+        total = total + (incidence.T @ incidence).tocsr()
+    total.setdiag(0)
+    total.eliminate_zeros()
+    return total
+
+
+def top_neighbours(ids, matrix, top_n, min_commandes=1):
+    """Génère (produit, [(associé, nombre de commandes), ...]) : les top_n voisins de chaque produit"""
+    import numpy as np
+
+    for row in range(matrix.shape[0]):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        if start == end:
+            continue
+        counts, colonnes = matrix.data[start:end], matrix.indices[start:end]
+        keep = counts >= min_commandes
+        counts, colonnes = counts[keep], colonnes[keep]
+        if not len(counts):
+            continue
+        # Plus de commandes en commun d'abord , puis l'id le plus petit pour départager
+        order = np.lexsort((ids[colonnes], -counts))[:top_n]
+        yield int(ids[row]), [(int(ids[colonnes[i]]), int(counts[i])) for i in order]
+
+
+def save_neighbours(neighbours):
+    """Remplace la table AchatAssocie en une transaction : les lecteurs voient l'ancienne table jusqu'au commit"""
+    total = 0
+    with transaction.atomic():
+        AchatAssocie.objects.all().delete()
+        batch = []
+        for produit_id, associes in neighbours:
+            batch.extend(
+                AchatAssocie(produit_id=produit_id, associe_id=associe_id, nb_commandes=nb, rang=rang)
+                for rang, (associe_id, nb) in enumerate(associes, start=1)
+            )
+            if len(batch) >= BATCH_SIZE:
+                AchatAssocie.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        AchatAssocie.objects.bulk_create(batch)
+        total += len(batch)
+    bump_version(AchatAssocie)
+    return total
+
+
+def build_bought_together(top_n=None, chunk_size=CHUNK_SIZE, min_commandes=1):
+    """Recalcule toute la table AchatAssocie ; retourne le nombre de lignes écrites"""
+    ids = produit_ids()
+    matrix = cooccurrence_matrix(ids, commande_chunks(chunk_size))
+    return save_neighbours(top_neighbours(ids, matrix, top_n or settings.BOUGHT_TOGETHER_TOP_N, min_commandes))
+
+
+def bought_together(produit_id):
+    """Produits souvent achetés avec un produit (vignettes de liste + nombre de commandes en commun) , mis en cache"""
+    key = CACHE_KEY.format(produit_id, versions_token((AchatAssocie, Produit, Promotion)))
+    data = cache.get(key)
+    if data is None:
+        associes = list(
+            AchatAssocie.objects.filter(produit_id=produit_id).order_by('rang').values_list('associe_id', 'nb_commandes')
+        )
+        produits = with_prix_effectif(Produit.objects.filter(pk__in=[pk for pk, _ in associes])).in_bulk()
+        data = [
+            {**ProduitListSerializer(produits[pk]).data, 'nb_commandes': nb}
+            for pk, nb in associes
+            if pk in produits
+        ]
+        cache.set(key, data, settings.BOUGHT_TOGETHER_CACHE_TIMEOUT)
+    return data
@@ -0,0 +1,40 @@
+# Ce fichier search.py regroupe la recherche plein texte sur les produits :
+# la configuration linguistique PostgreSQL, l'expression du vecteur de recherche
+# et sa mise à jour ensembliste (une seule requête UPDATE pour tout un queryset).
+# pour plus d'informations : https://docs.djangoproject.com/en/5.1/ref/contrib/postgres/search/
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import connections
+
+# Configurations de recherche PostgreSQL selon la langue du site (LANGUAGE_CODE)
+SEARCH_CONFIGS = {
+    'fr': 'french',
+    'en': 'english',
+    'es': 'spanish',
+    'de': 'german',
+}
+
+
+def get_search_config():
+    """Retourne la configuration de recherche PostgreSQL (stemming) correspondant à LANGUAGE_CODE"""
+    return SEARCH_CONFIGS.get(settings.LANGUAGE_CODE[:2], 'simple')
+
+
+def produit_search_vector():
+    """Expression du vecteur de recherche : le nom pèse plus lourd que la description"""
+    config = get_search_config()
+    return (
+        SearchVector('nom', weight='A', config=config)
+        + SearchVector('description', weight='B', config=config)
+    )
+
+
+def update_search_vector(queryset):
+    """
+    Recalcule le vecteur de recherche des produits du queryset en une seule requête.
+    Hors PostgreSQL , la recherche passe par ILIKE (ProduitSearchFilter) : rien à calculer.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return 0
+    return queryset.update(search_vector=produit_search_vector())
@@ -0,0 +1,209 @@
+# Ce fichier signals.py contient les signaux de l'application products
+# il permet de maintenir les données dérivées des produits à chaque écriture
+# pour plus d'informations sur les signaux : https://docs.djangoproject.com/en/5.1/topics/signals/
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from config.conditional import bump_version
+
+from .availability import schedule_availability_refresh
+from .barcodes import barcode_cache
+from .cards import schedule_card_refresh
+from .changes import record_deletion
+from .images import schedule_derivatives
+from .materials import matiere_pairs, schedule_matieres_refresh
+from .models import (
+    Categories, SousCategories, Produit, ProduitCategorie, Article, Creative, Promotion,
+    Catalogue, ProduitCatalogue
+)
+from .search import update_search_vector
+from .similarity import schedule_similar_refresh
+
+
+@receiver(post_save, sender=Produit)
+def produit_search_vector(sender, instance, update_fields=None, **kwargs):
+    """Met à jour le vecteur de recherche quand le nom ou la description change"""
+    if update_fields is not None and not {'nom', 'description'} & set(update_fields):
+        return
+    update_search_vector(Produit.objects.filter(pk=instance.pk))
+
+
+# Vignettes produit (ProduitCard) : recalcul incrémental du seul produit concerné
+
+@receiver(post_save, sender=Produit)
+def produit_card(sender, instance, **kwargs):
+    schedule_card_refresh([instance.pk])
+
+
+@receiver(post_save, sender=Promotion)
+@receiver(post_delete, sender=Promotion)
+@receiver(post_save, sender=Creative)
+@receiver(post_delete, sender=Creative)
+@receiver(post_save, sender=ProduitCategorie)
+@receiver(post_delete, sender=ProduitCategorie)
+@receiver(post_save, sender='clients.Avis')
+@receiver(post_delete, sender='clients.Avis')
+def produit_relation_card(sender, instance, **kwargs):
+    schedule_card_refresh([instance.produit_id])
+
+
+@receiver(m2m_changed, sender=Produit.categories.through)
+def produit_categories_card(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        schedule_card_refresh([instance.pk])
+    elif pk_set:
+        schedule_card_refresh(pk_set)
+
+
+@receiver(post_save, sender=Categories)
+def categorie_card(sender, instance, created, **kwargs):
+    """Un renommage de catégorie change les vignettes de tous ses produits"""
+    if not created:
+        schedule_card_refresh(instance.produits.values_list('pk', flat=True))
+
+
+# Index des produits similaires (ProduitSimilaire) : mise à jour incrémentale quand les attributs d'un produit changent
+
+@receiver(post_save, sender=Produit)
+def produit_similar(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'matieres_premieres', 'type_de_semelle', 'origine'} & set(update_fields):
+        return
+    schedule_similar_refresh([instance.pk])
+
+
+@receiver(post_save, sender=ProduitCategorie)
+@receiver(post_delete, sender=ProduitCategorie)
+def produit_categorie_similar(sender, instance, **kwargs):
+    schedule_similar_refresh([instance.produit_id])
+
+
+@receiver(m2m_changed, sender=Produit.categories.through)
+def produit_categories_similar(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        schedule_similar_refresh([instance.pk])
+    elif pk_set:
+        schedule_similar_refresh(pk_set)
+
+
+# Index des matières (Matiere) : recompte des seules matières de l'ancienne et de la nouvelle version du produit
+
+@receiver(pre_save, sender=Produit)
+def produit_matieres_avant(sender, instance, update_fields=None, **kwargs):
+    instance._matieres_avant = set()
+    if instance.pk is not None and (update_fields is None or 'matieres_premieres' in update_fields):
+        ancien = Produit.objects.filter(pk=instance.pk).values_list('matieres_premieres', flat=True).first()
+        instance._matieres_avant = matiere_pairs(ancien)
+
+
+@receiver(post_save, sender=Produit)
+def produit_matieres(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'matieres_premieres' not in update_fields:
+        return
+    schedule_matieres_refresh(getattr(instance, '_matieres_avant', set()) | matiere_pairs(instance.matieres_premieres))
+
+
+@receiver(post_delete, sender=Produit)
+def produit_matieres_supprime(sender, instance, **kwargs):
+    schedule_matieres_refresh(matiere_pairs(instance.matieres_premieres))
+
+
+# Flux des modifications (products.changes) : traces des suppressions , et date de mise à jour
+# des produits dont les catégories changent (les ids des catégories font partie du produit synchronisé)
+
+@receiver(post_delete, sender=Produit)
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Creative)
+@receiver(post_delete, sender=Promotion)
+def catalogue_suppression(sender, instance, **kwargs):
+    record_deletion(instance)
+
+
+@receiver(post_save, sender=ProduitCategorie)
+@receiver(post_delete, sender=ProduitCategorie)
+def produit_categorie_date_maj(sender, instance, **kwargs):
+    Produit.objects.filter(pk=instance.produit_id).update(date_maj=timezone.now())
+
+
+@receiver(m2m_changed, sender=Produit.categories.through)
+def produit_categories_date_maj(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        Produit.objects.filter(pk=instance.pk).update(date_maj=timezone.now())
+    elif pk_set:
+        Produit.objects.filter(pk__in=pk_set).update(date_maj=timezone.now())
+
+
+# Index de disponibilité (Disponibilite) : un article sort du stock dès qu'une ligne de commande le référence
+
+@receiver(pre_save, sender=Article)
+@receiver(pre_save, sender='commandes.LigneCommande')
+def produit_avant(sender, instance, **kwargs):
+    """Produit de la version enregistrée : sa disponibilité change aussi si la ligne change de produit"""
+    instance._produit_avant = None
+    if instance.pk is not None:
+        instance._produit_avant = sender.objects.filter(pk=instance.pk).values_list('produit_id', flat=True).first()
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+@receiver(post_save, sender='commandes.LigneCommande')
+@receiver(post_delete, sender='commandes.LigneCommande')
+def produit_availability(sender, instance, **kwargs):
+    schedule_availability_refresh([instance.produit_id, getattr(instance, '_produit_avant', None)])
+
+
+# Cache des codes-barres : invalidé après validation, pour ne pas être rechargé avec l'ancienne version
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def article_barcode(sender, instance, **kwargs):
+    pk, code_bar = instance.pk, instance.code_bar
+    transaction.on_commit(lambda: barcode_cache.invalidate(pk, code_bar))
+
+
+# Images dérivées des médias : générées en arrière-plan quand l'image source change
+
+@receiver(post_save, sender=Creative)
+def creative_derivatives(sender, instance, **kwargs):
+    if instance.derives.get('source') != instance.url:
+        schedule_derivatives(instance)
+
+
+# Versions des modèles (ETag des réponses de l'API) : incrémentées après validation de la transaction
+
+@receiver(post_save, sender=Produit)
+@receiver(post_delete, sender=Produit)
+@receiver(post_save, sender=Categories)
+@receiver(post_delete, sender=Categories)
+@receiver(post_save, sender=SousCategories)
+@receiver(post_delete, sender=SousCategories)
+@receiver(post_save, sender=ProduitCategorie)
+@receiver(post_delete, sender=ProduitCategorie)
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+@receiver(post_save, sender=Creative)
+@receiver(post_delete, sender=Creative)
+@receiver(post_save, sender=Promotion)
+@receiver(post_delete, sender=Promotion)
+@receiver(post_save, sender=Catalogue)
+@receiver(post_delete, sender=Catalogue)
+@receiver(post_save, sender=ProduitCatalogue)
+@receiver(post_delete, sender=ProduitCatalogue)
+def model_version(sender, **kwargs):
+    transaction.on_commit(lambda: bump_version(sender))
+
+
+@receiver(m2m_changed, sender=ProduitCategorie)
+@receiver(m2m_changed, sender=ProduitCatalogue)
+def through_version(sender, action, **kwargs):
+    """Les méthodes add() / remove() / clear() des relations many-to-many n'envoient pas post_save"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(lambda: bump_version(sender))
@@ -0,0 +1,231 @@
+# Ce fichier similarity.py maintient l'index des produits similaires (ProduitSimilaire).
+# Chaque produit est décrit par ses attributs : matières premières (par partie et globalement),
+# type de semelle, origine et catégories. Les attributs sont encodés en one-hot pondéré TF-IDF
+# (un attribut rare compte plus qu'un attribut partagé par tout le catalogue), puis normalisés :
+# le produit scalaire de deux vecteurs est leur similarité cosinus.
+# Les k plus proches voisins de chaque produit sont calculés par paquets de lignes (matrices creuses SciPy)
+# et stockés en base. L'écriture d'un produit l'ajoute à la file SimilaireEnAttente (dans sa transaction ,
+# un id une seule fois) ; le worker `refresh_similar` vide la file hors des requêtes HTTP et recalcule
+# ces produits et ceux dont la liste peut changer. La commande build_similar reconstruit tout l'index.
+
+import json
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import transaction
+from django.db.models import Count, Min, Q
+
+from config.conditional import bump_version
+
+from .api.serializers import ProduitListSerializer
+from .models import Produit, ProduitSimilaire, SimilaireEnAttente
+from .pricing import with_prix_effectif
+
+# Nombre de produits dont les similarités sont calculées ensemble (une matrice dense paquet × catalogue)
+BATCH_SIZE = 128
+
+# Nombre de lignes ProduitSimilaire insérées par requête
+INSERT_BATCH_SIZE = 5000
+
+
+def parse_matieres(value):
+    """
+    Retourne les matières d'un produit en paires (partie, matière) :
+    accepte un objet {"dessus": "cuir", ...}, une liste de matières ou un JSON encodé en texte
+    """
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return [('', value)]
+    if isinstance(value, dict):
+        return [(str(partie), str(matiere)) for partie, matiere in value.items() if matiere]
+    if isinstance(value, list):
+        return [('', str(matiere)) for matiere in value if matiere]
+    return []
+
+
+def normalize(text):
+    return ' '.join(str(text).lower().split())
+
+
+def produit_features(row):
+    """Attributs d'un produit (chaînes 'type:valeur') utilisés comme dimensions du vecteur"""
+    features = set()
+    for partie, matiere in parse_matieres(row['matieres_premieres']):
+        features.add(f"matiere:{normalize(matiere)}")
+        if partie:
+            features.add(f"matiere:{normalize(partie)}:{normalize(matiere)}")
+    if row['type_de_semelle']:
+        features.add(f"semelle:{normalize(row['type_de_semelle'])}")
+    if row['origine']:
+        features.add(f"origine:{normalize(row['origine'])}")
+    features.update(f"categorie:{pk}" for pk in row['categories_ids'] or ())
+    return features
+
+
+def load_vectors():
+    """
+    Lit les attributs de tous les produits (une requête) et retourne (ids triés, matrice TF-IDF normalisée).
+    L'IDF est calculé sur le catalogue courant : idf = ln((1 + n) / (1 + df)) + 1.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    rows = Produit.objects.order_by('pk').annotate(
+        categories_ids=ArrayAgg('categories', distinct=True, filter=Q(categories__isnull=False))
+    ).values('pk', 'matieres_premieres', 'type_de_semelle', 'origine', 'categories_ids')
+
+    ids, indptr, indices, vocabulary = [], [0], [], {}
+    for row in rows.iterator(chunk_size=2000):
+        ids.append(row['pk'])
+        indices.extend(vocabulary.setdefault(feature, len(vocabulary)) for feature in produit_features(row))
+        indptr.append(len(indices))
+
+    ids = np.array(ids, dtype=np.int64)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.float32), np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+        shape=(len(ids), len(vocabulary)),
+    )
+    df = np.bincount(matrix.indices, minlength=len(vocabulary))
+    idf = np.log((1 + len(ids)) / (1 + df)).astype(np.float32) + 1
+    matrix = matrix @ sparse.diags(idf)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return ids, sparse.diags(1 / norms).astype(np.float32) @ matrix
+
+
+def similarity_rows(matrix, positions):
+    """Similarités cosinus (matrice dense) des produits aux positions données avec tout le catalogue, sans eux-mêmes"""
+    import numpy as np
+
+    scores = (matrix[positions] @ matrix.T).toarray()
+    scores[np.arange(len(positions)), positions] = 0
+    return scores
+
+
+def nearest_neighbours(ids, matrix, positions, k):
+    """Génère (produit, [(similaire, score), ...]) : les k voisins de score > 0 , par paquets de BATCH_SIZE produits"""
+    import numpy as np
+
+    for start in range(0, len(positions), BATCH_SIZE):
+        batch = np.asarray(positions[start:start + BATCH_SIZE])
+        scores = similarity_rows(matrix, batch)
+        for row, position in zip(scores, batch):
+            candidates = np.argpartition(-row, k)[:k] if k < len(row) else np.arange(len(row))
+            candidates = candidates[row[candidates] > 0]
+            # Meilleur score d'abord , puis l'id le plus petit pour départager
+            candidates = candidates[np.lexsort((ids[candidates], -row[candidates]))]
+            yield int(ids[position]), [(int(ids[j]), float(row[j])) for j in candidates]
+
+
+def save_similar(neighbours, produit_ids=None):
+    """Remplace les voisins des produits donnés (tous si produit_ids est None) ; retourne le nombre de lignes"""
+    total = 0
+    with transaction.atomic():
+        existing = ProduitSimilaire.objects.all()
+        if produit_ids is not None:
+            existing = existing.filter(produit_id__in=produit_ids)
+        existing.delete()
+        batch = []
+        for produit_id, similaires in neighbours:
+            batch.extend(
+                ProduitSimilaire(produit_id=produit_id, similaire_id=similaire_id, score=score, rang=rang)
+                for rang, (similaire_id, score) in enumerate(similaires, start=1)
+            )
+            if len(batch) >= INSERT_BATCH_SIZE:
+                ProduitSimilaire.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        ProduitSimilaire.objects.bulk_create(batch)
+        total += len(batch)
+    bump_version(ProduitSimilaire)
+    return total
+
+
+def build_similar(k=None):
+    """Reconstruit tout l'index des produits similaires"""
+    ids, matrix = load_vectors()
+    return save_similar(nearest_neighbours(ids, matrix, range(len(ids)), k or settings.SIMILAR_PRODUCTS_K))
+
+
+def refresh_similar(produit_ids, k=None):
+    """
+    Mise à jour incrémentale après l'écriture de produits : recalcule leurs voisins et ceux des produits
+    dont la liste peut changer (ceux qui les listent déjà, ou dont le moins bon voisin est dépassé).
+    Les scores des autres produits gardent les poids IDF de leur dernier calcul : build_similar les réaligne.
+    """
+    import numpy as np
+
+    k = k or settings.SIMILAR_PRODUCTS_K
+    ids, matrix = load_vectors()
+    known = set(ids.tolist())
+    changed = sorted(pk for pk in set(produit_ids) if pk in known)
+    affected = set(changed) | set(
+        ProduitSimilaire.objects.filter(similaire_id__in=produit_ids).values_list('produit_id', flat=True)
+    )
+    if changed:
+        # Meilleur score de chaque produit avec l'un des produits modifiés , par paquets de BATCH_SIZE lignes
+        positions = np.searchsorted(ids, changed)
+        best = np.zeros(len(ids), dtype=np.float32)
+        for start in range(0, len(positions), BATCH_SIZE):
+            best = np.maximum(best, similarity_rows(matrix, positions[start:start + BATCH_SIZE]).max(axis=0))
+        candidates = {int(ids[j]): float(best[j]) for j in np.nonzero(best > 0)[0]}
+        stats = ProduitSimilaire.objects.filter(produit_id__in=list(candidates)).values('produit_id').annotate(
+            nb=Count('pk'), pire=Min('score')
+        )
+        stats = {row['produit_id']: (row['nb'], row['pire']) for row in stats}
+        for pk, score in candidates.items():
+            nb, pire = stats.get(pk, (0, 0))
+            if nb < k or score > pire:
+                affected.add(pk)
+
+    positions = np.searchsorted(ids, sorted(pk for pk in affected if pk in known))
+    return save_similar(nearest_neighbours(ids, matrix, positions, k), produit_ids=affected)
+
+
+def schedule_similar_refresh(produit_ids):
+    """
+    Ajoute les produits à la file du worker refresh_similar , dans la transaction en cours :
+    annulée avec elle , et un produit déjà en attente n'est pas ajouté deux fois
+    """
+    produit_ids = {pk for pk in produit_ids if pk is not None}
+    if produit_ids:
+        SimilaireEnAttente.objects.bulk_create(
+            [SimilaireEnAttente(produit=pk) for pk in produit_ids], ignore_conflicts=True
+        )
+
+
+def drain_similar(batch_size=None):
+    """
+    Recalcule les voisins d'un paquet de produits de la file ; retourne le nombre de produits lus.
+    Les lignes sont retirées avant le calcul (une écriture pendant le calcul remet le produit en file)
+    et remises en file si le calcul échoue.
+    """
+    batch_size = batch_size or settings.SIMILAR_REFRESH_BATCH_SIZE
+    with transaction.atomic():
+        produit_ids = list(
+            SimilaireEnAttente.objects.select_for_update(skip_locked=True)
+            .order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        SimilaireEnAttente.objects.filter(pk__in=produit_ids).delete()
+    if produit_ids:
+        try:
+            refresh_similar(produit_ids)
+        except Exception:
+            schedule_similar_refresh(produit_ids)
+            raise
+    return len(produit_ids)
+
+
+def similar_products(produit_id):
+    """Produits similaires à un produit (vignettes de liste + score de similarité) , du plus au moins proche"""
+    similaires = list(
+        ProduitSimilaire.objects.filter(produit_id=produit_id).order_by('rang').values_list('similaire_id', 'score')
+    )
+    produits = with_prix_effectif(Produit.objects.filter(pk__in=[pk for pk, _ in similaires])).in_bulk()
+    return [
+        {**ProduitListSerializer(produits[pk]).data, 'score': round(score, 4)}
+        for pk, score in similaires
+        if pk in produits
+    ]
@@ -1,3 +1,992 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import Future
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .api.serializers import ProduitDetailSerializer, ProduitListSerializer
+from .api.views import ProduitViewSet
+from .barcodes import BarcodeCache, barcode_cache, lookup_barcodes
+from .categories import build_category_tree, category_tree
+from .changes import encode_cursor
+from .images import process_pool, render_derivatives
+from .importer import CatalogueImportError, import_catalogue
+from .recommendations import build_bought_together
+from .similarity import build_similar, drain_similar
+from .models import (
+    Categories, SousCategories, Produit, ProduitCategorie, Article,
+    Creative, Promotion, Catalogue, ProduitCatalogue, ProduitCard, AchatAssocie,
+    ProduitSimilaire, SimilaireEnAttente, Matiere, ModificationMasse, Suppression, Disponibilite
+)
+from clients.models import Client, Favoris
+from commandes.models import Commande, LigneCommande
+from config.conditional import MODIFIED_KEY, bump_version, model_label
+from config.prefetch import plan_queryset
+from config.renderers import FastJSONRenderer
+from config.testing import FastPathParityMixin
+
+
+def create_produit(index, categorie):
+    """Crée un produit complet avec ses relations imbriquées"""
+    produit = Produit.objects.create(
+        nom=f"Produit {index}", prix=Decimal('100.00'), origine="Maroc", type_de_semelle="Cuir"
+    )
+    ProduitCategorie.objects.create(produit=produit, categorie=categorie)
+    for pointure in ('40', '41'):
+        Article.objects.create(produit=produit, couleur="Noir", pointure=pointure, code_bar=f"{index}-{pointure}")
+    Creative.objects.create(produit=produit, type_creative="photo", url=f"https://example.com/{index}.jpg")
+    Promotion.objects.create(
+        produit=produit, type_promo="Soldes", reduction=Decimal('10.00'),
+        date_debut=date.today() - timedelta(days=1), date_fin=date.today() + timedelta(days=1)
+    )
+    return produit
+
+
+class ProduitQueryBudgetTests(TestCase):
+    """
+    Budget de requêtes SQL par action : le nombre de requêtes doit rester constant
+    quel que soit le nombre de produits. Toute modification qui ajoute des requêtes
+    doit mettre à jour ce budget explicitement.
+    """
+    QUERY_BUDGETS = {
+        'list': 1,      # produits (pagination par curseur, sans COUNT)
+        'retrieve': 5,  # produit + categories, articles, creatives, promotions
+        'catalogue': 1, # catalogue + nombre de produits (annotation)
+        'catalogue_produits': 2, # catalogue + page de produits (sans COUNT)
+    }
+
+    def setUp(self):
+        self.client = APIClient()
+        self.categorie = Categories.objects.create(nom="Homme")
+
+    def test_list_budget(self):
+        for total in (1, 5):
+            while Produit.objects.count() < total:
+                create_produit(Produit.objects.count(), self.categorie)
+            with self.assertNumQueries(self.QUERY_BUDGETS['list']):
+                response = self.client.get('/api/products/produits/')
+            self.assertEqual(response.status_code, 200)
+            # prix effectif calculé dans la même requête (promotion active de 10 %)
+            self.assertEqual(response.data['results'][0]['prix_effectif'], '90.00')
+
+    def test_retrieve_budget(self):
+        produit = create_produit(0, self.categorie)
+        with self.assertNumQueries(self.QUERY_BUDGETS['retrieve']):
+            response = self.client.get(f'/api/products/produits/{produit.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['articles']), 2)
+        self.assertEqual(response.data['categories'][0]['nom'], "Homme")
+
+    def test_catalogue_retrieve_budget(self):
+        catalogue = Catalogue.objects.create(nom="Été")
+        for index in range(3):
+            ProduitCatalogue.objects.create(produit=create_produit(index, self.categorie), catalogue=catalogue)
+        with self.assertNumQueries(self.QUERY_BUDGETS['catalogue']):
+            response = self.client.get(f'/api/products/catalogues/{catalogue.pk}/')
+        self.assertEqual(response.data['nb_produits'], 3)
+
+    def test_catalogue_produits_budget(self):
+        catalogue = Catalogue.objects.create(nom="Hiver")
+        for index in range(5):
+            ProduitCatalogue.objects.create(produit=create_produit(index, self.categorie), catalogue=catalogue)
+        with self.assertNumQueries(self.QUERY_BUDGETS['catalogue_produits']):
+            response = self.client.get(f'/api/products/catalogues/{catalogue.pk}/produits/?page_size=3')
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_detail_serializer_many_budget(self):
+        for index in range(4):
+            create_produit(index, self.categorie)
+        queryset = plan_queryset(Produit.objects.all(), ProduitDetailSerializer())
+        with self.assertNumQueries(self.QUERY_BUDGETS['retrieve']):
+            data = ProduitDetailSerializer(queryset, many=True).data
+        self.assertEqual(len(data), 4)
+
+    def test_prix_effectif_without_annotation(self):
+        """Sans l'annotation : une requête pour une instance seule , signalée en erreur dans une liste"""
+        produit = create_produit(0, self.categorie)
+        with self.assertNoLogs('products.api.serializers', level='ERROR'):
+            self.assertEqual(ProduitListSerializer(produit).data['prix_effectif'], '90.00')
+        with self.assertLogs('products.api.serializers', level='ERROR') as logs:
+            data = ProduitListSerializer(Produit.objects.all(), many=True).data
+        self.assertEqual(data[0]['prix_effectif'], '90.00')
+        self.assertIn("plan_queryset", logs.output[0])
+
+    def test_mes_favoris_planned(self):
+        user = User.objects.create_user(username="fan", password="secret")
+        client = Client.objects.create(user=user, nom="Fan", prenom="Test", phone="0600000000")
+        for index in range(3):
+            Favoris.objects.create(client=client, produit=create_produit(index, self.categorie))
+        self.client.force_authenticate(user)
+        with self.assertNoLogs('products.api.serializers', level='ERROR'):
+            response = self.client.get('/api/clients/favoris/mes_favoris/')
+        self.assertEqual(response.data[0]['produit_detail']['prix_effectif'], '90.00')
+
+
+class ProduitFastPathTests(FastPathParityMixin, TestCase):
+    """
+    Parité du chemin rapide (config.fastpath) : la liste lue en .values() et rendue par orjson
+    doit produire les mêmes octets que le serializer et le JSONRenderer de DRF.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        categorie = Categories.objects.create(nom="Femme")
+        for index in range(3):
+            create_produit(index, categorie)
+        # Texte non ASCII (dont U+2028 , échappé par DRF) et champs nuls
+        Produit.objects.create(nom="Sandale d'été\u2028", prix=Decimal('59.90'), origine=None)
+
+    def test_list_parity(self):
+        self.assertSameAsSerializer('/api/products/produits/', queries=1)
+        self.assertSameAsSerializer('/api/products/produits/?ordering=-prix_effectif', queries=1)
+        self.assertSameAsSerializer('/api/products/produits/?fields=id,nom,prix_effectif', queries=1)
+        self.assertSameAsSerializer('/api/products/produits/?search=sandale', queries=1)
+
+    def test_disabled_by_default(self):
+        self.assertFalse(settings.FAST_PATH_LISTS)
+        self.assertFalse(settings.FAST_JSON_RENDERER)
+
+    @override_settings(FAST_JSON_RENDERER=True)
+    def test_renderer_floats(self):
+        """Flottants écrits autrement par orjson (notation exponentielle , NaN) : rendu standard de DRF"""
+        standard = JSONRenderer()
+        for value in (0.1, 0.0001, 123456789.123, 1e-05, 1e16, -2.5e-7):
+            self.assertEqual(FastJSONRenderer().render({'score': value}), standard.render({'score': value}))
+        with self.assertRaises(ValueError):
+            FastJSONRenderer().render([{'score': float('nan')}])
+
+
+class KeysetPaginationTests(TestCase):
+    """Pagination par curseur (config.pagination) : pages suivantes et précédentes , égalités , curseurs modifiés"""
+
+    def setUp(self):
+        self.client = APIClient()
+        # prix égaux deux à deux : l'id départage les égalités de la clé de tri
+        for index, prix in enumerate(('30.00', '10.00', '20.00', '10.00', '20.00', '30.00', '10.00')):
+            Produit.objects.create(nom=f"Produit {index}", prix=Decimal(prix))
+
+    def walk(self, url):
+        """Suit les liens next jusqu'à la dernière page ; retourne les pages (liste d'ids) et la dernière réponse"""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.data['results']])
+            url = response.data['next']
+        return pages, response
+
+    def test_next_pages_with_ties(self):
+        pages, _ = self.walk('/api/products/produits/?ordering=-prix&page_size=2')
+        ids = [pk for page in pages for pk in page]
+        expected = list(Produit.objects.order_by('-prix', '-pk').values_list('pk', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+
+    def test_previous_page(self):
+        pages, last = self.walk('/api/products/produits/?ordering=prix&page_size=3')
+        previous = self.client.get(last.data['previous'])
+        self.assertEqual([row['id'] for row in previous.data['results']], pages[-2])
+        self.assertIsNotNone(previous.data['next'])
+
+    def test_tampered_cursor(self):
+        response = self.client.get('/api/products/produits/?ordering=prix&page_size=2')
+        url = response.data['next'].replace('cursor=', 'cursor=x')
+        self.assertEqual(self.client.get(url).status_code, 404)
+        # un curseur n'est valable que pour le tri qui l'a produit
+        other_sort = response.data['next'].replace('ordering=prix', 'ordering=nom')
+        self.assertEqual(self.client.get(other_sort).status_code, 404)
+
+    def test_multiple_ordering_fields_rejected(self):
+        response = self.client.get('/api/products/produits/?ordering=prix,nom')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ordering', response.data)
+
+
+@skipUnless(connection.vendor == 'postgresql', "recherche plein texte PostgreSQL")
+class ProduitSearchTests(TestCase):
+    """Recherche des produits (?search=) : plein texte avec stemming , trigrammes et tri par pertinence"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.randonnee = Produit.objects.create(nom="Chaussures de randonnée", description="Semelle crantée", prix=Decimal('90.00'))
+        self.sandale = Produit.objects.create(nom="Sandale", description="Cuir tressé", prix=Decimal('40.00'))
+        # le mot recherché n'apparaît que dans la description : moins pertinent que dans le nom
+        self.mocassin = Produit.objects.create(nom="Mocassin", description="Se porte comme une sandale", prix=Decimal('60.00'))
+
+    def search(self, terms):
+        response = self.client.get('/api/products/produits/', {'search': terms})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_stemming(self):
+        self.assertEqual(self.search("chaussure"), [self.randonnee.pk])
+
+    def test_typo_tolerance(self):
+        self.assertIn(self.randonnee.pk, self.search("randonee"))
+
+    def test_name_ranks_before_description(self):
+        self.assertEqual(self.search("sandale"), [self.sandale.pk, self.mocassin.pk])
+
+    def test_vector_follows_name_change(self):
+        self.sandale.nom = "Espadrille"
+        self.sandale.save()
+        self.assertEqual(self.search("espadrille"), [self.sandale.pk])
+        self.assertNotIn(self.sandale.pk, self.search("sandale"))
+
+    def test_no_vector_update_off_postgresql(self):
+        with mock.patch.object(connection, 'vendor', 'sqlite'):
+            produit = Produit.objects.create(nom="Botte", description="Caoutchouc", prix=Decimal('30.00'))
+        produit.refresh_from_db()
+        self.assertIsNone(produit.search_vector)
+
+
+class ProduitCardTests(TestCase):
+    """Vignettes produit (products.cards) : recalculées après validation de chaque écriture qui les concerne"""
+
+    def setUp(self):
+        self.categorie = Categories.objects.create(nom="Homme")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.produit = create_produit(0, self.categorie)
+
+    def card(self):
+        return ProduitCard.objects.get(produit=self.produit)
+
+    def test_card_built_from_relations(self):
+        card = self.card()
+        self.assertEqual(card.categories, ["Homme"])
+        self.assertEqual(card.prix_effectif, Decimal('90.00'))
+        self.assertEqual(card.image_url, "https://example.com/0.jpg")
+
+    def test_refresh_on_related_writes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Promotion.objects.filter(produit=self.produit).delete()
+            ProduitCategorie.objects.create(produit=self.produit, categorie=Categories.objects.create(nom="Cuir"))
+        card = self.card()
+        self.assertEqual(card.prix_effectif, Decimal('100.00'))
+        self.assertEqual(card.categories, ["Cuir", "Homme"])
+
+    def test_refresh_after_commit_only(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.produit.nom = "Renommé"
+            self.produit.save()
+        # rien n'est recalculé avant la validation de la transaction
+        self.assertEqual(self.card().nom, "Produit 0")
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.card().nom, "Renommé")
+
+    def test_cards_endpoint(self):
+        response = APIClient().get('/api/products/cards/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['prix_effectif'], '90.00')
+
+
+class FacetsTests(TestCase):
+    """Compteurs de facettes (products.facets) : valeurs par facette , filtres et invalidation du cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        categorie = Categories.objects.create(nom="Homme")
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(3):
+                create_produit(index, categorie)
+            Produit.objects.filter(pk=Produit.objects.order_by('pk').first().pk).update(origine="Espagne")
+
+    def facets(self, query=''):
+        response = self.client.get(f'/api/products/produits/facets/{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_counts(self):
+        data = self.facets()
+        self.assertEqual(data['origine'], [{'valeur': "Maroc", 'total': 2}, {'valeur': "Espagne", 'total': 1}])
+        self.assertEqual(data['categories'][0]['libelle'], "Homme")
+        self.assertEqual(data['categories'][0]['total'], 3)
+        self.assertEqual(data['pointure'], [{'valeur': "40", 'total': 3}, {'valeur': "41", 'total': 3}])
+
+    def test_counts_follow_filters(self):
+        data = self.facets('?origine=Espagne')
+        self.assertEqual(data['origine'], [{'valeur': "Espagne", 'total': 1}])
+        self.assertEqual(data['couleur'], [{'valeur': "Noir", 'total': 1}])
+
+    def test_cache_invalidated_by_write(self):
+        self.facets()
+        with self.captureOnCommitCallbacks(execute=True):
+            Produit.objects.create(nom="Nouveau", prix=Decimal('50.00'), origine="Espagne")
+        self.assertEqual(
+            self.facets()['origine'], [{'valeur': "Espagne", 'total': 2}, {'valeur': "Maroc", 'total': 2}]
+        )
+
+
+class DisponibiliteTests(TestCase):
+    """Matrice de disponibilité (products.availability) : articles non commandés par couleur et pointure"""
+
+    def setUp(self):
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.produit = create_produit(0, Categories.objects.create(nom="Homme"))
+            Article.objects.create(produit=self.produit, couleur="Marron", pointure="40", code_bar="0-40-marron")
+
+    def test_matrix(self):
+        response = self.client.get(f'/api/products/produits/{self.produit.pk}/disponibilites/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['couleurs'], ["Marron", "Noir"])
+        self.assertEqual(response.data['pointures'], ["40", "41"])
+        self.assertEqual(response.data['matrice']['Noir'], {"40": 1, "41": 1})
+
+    def test_article_moved(self):
+        """Un article rattaché à un autre produit quitte la matrice de l'ancien"""
+        autre = Produit.objects.create(nom="Autre", prix=Decimal('10.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            article = Article.objects.get(code_bar="0-40-marron")
+            article.produit = autre
+            article.save()
+        self.assertEqual(self.client.get(f'/api/products/produits/{self.produit.pk}/disponibilites/').data['couleurs'], ["Noir"])
+        self.assertEqual(self.client.get(f'/api/products/produits/{autre.pk}/disponibilites/').data['matrice'], {"Marron": {"40": 1}})
+
+    def test_product_without_articles(self):
+        produit = Produit.objects.create(nom="Sans article", prix=Decimal('10.00'))
+        response = self.client.get(f'/api/products/produits/{produit.pk}/disponibilites/')
+        self.assertEqual(response.data, {'couleurs': [], 'pointures': [], 'matrice': {}})
+
+    def test_unknown_or_invalid_id(self):
+        for pk in (0, 'abc'):
+            with self.subTest(pk=pk):
+                response = self.client.get(f'/api/products/produits/{pk}/disponibilites/')
+                self.assertEqual(response.status_code, 404)
+
+
+class BarcodeTests(TestCase):
+    """Recherche par code-barres (products.barcodes) : recherche exacte , lot , cache LRU et invalidation"""
+
+    def setUp(self):
+        barcode_cache.clear()
+        self.client = APIClient()
+        self.produit = create_produit(0, Categories.objects.create(nom="Homme"))
+        self.article = Article.objects.get(code_bar="0-40")
+
+    def test_lookup(self):
+        response = self.client.get('/api/products/articles/code-bar/0-40/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], self.article.pk)
+        self.assertEqual(self.client.get('/api/products/articles/code-bar/inconnu/').status_code, 404)
+
+    def test_scan(self):
+        self.client.force_authenticate(User.objects.create_user('caisse'))
+        response = self.client.post(
+            '/api/products/articles/scan/', {'codes': ["0-40", "inconnu", "0-41", "0-40"]}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.data['articles']), ["0-40", "0-41"])
+        self.assertEqual(response.data['introuvables'], ["inconnu"])
+
+    def test_scan_requires_authentication(self):
+        response = self.client.post('/api/products/articles/scan/', {'codes': ["0-40"]}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_cached_lookup(self):
+        lookup_barcodes(["0-40", "0-41"])
+        with self.assertNumQueries(0):
+            found, missing = lookup_barcodes(["0-41", "0-40"])
+        self.assertEqual((sorted(found), missing), (["0-40", "0-41"], []))
+
+    def test_invalidated_by_article_write(self):
+        lookup_barcodes(["0-40"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.couleur = "Marron"
+            self.article.code_bar = "0-40-marron"
+            self.article.save()
+        found, missing = lookup_barcodes(["0-40", "0-40-marron"])
+        self.assertEqual(missing, ["0-40"])
+        self.assertEqual(found["0-40-marron"]['couleur'], "Marron")
+
+    def test_lru_eviction(self):
+        lru = BarcodeCache(maxsize=2, timeout=60)
+        lru.set_many([{'id': 1, 'code_bar': "a"}, {'id': 2, 'code_bar': "b"}])
+        lru.get_many(["a"])
+        lru.set_many([{'id': 3, 'code_bar': "c"}])
+        self.assertEqual(sorted(lru.get_many(["a", "b", "c"])), ["a", "c"])
+
+
+@skipUnless(connection.vendor == 'postgresql', "import par COPY PostgreSQL")
+class CatalogueImportTests(TestCase):
+    """Import du flux catalogue (products.importer) : fusion par nom et code-barres , lots rejetés"""
+
+    HEADER = "nom,prix,description,categories,code_bar,couleur,pointure,type_promo,reduction,date_debut,date_fin\n"
+
+    def run_import(self, lines, chunk_size=1000):
+        stream = io.StringIO(self.HEADER + ''.join(f"{line}\n" for line in lines))
+        return list(import_catalogue(stream, 'csv', chunk_size))
+
+    def test_import_and_reimport(self):
+        self.run_import([
+            "Babouche,120.00,Cuir,Homme|Artisanat,B-40,Jaune,40,Soldes,10,2026-01-01,2026-12-31",
+            "Babouche,120.00,Cuir,Homme,B-41,Jaune,41,,,,",
+            "Sans prix,,,,S-1,,,,,,",
+        ], chunk_size=2)
+        produit = Produit.objects.get(nom="Babouche")
+        self.assertEqual(sorted(produit.categories.values_list('nom', flat=True)), ["Artisanat", "Homme"])
+        self.assertEqual(sorted(produit.articles.values_list('code_bar', flat=True)), ["B-40", "B-41"])
+        self.assertEqual(produit.promotions.get().reduction, Decimal('10.00'))
+        self.assertFalse(Article.objects.filter(code_bar="S-1").exists())
+
+        # nouvel import : mise à jour du produit et des articles existants , sans doublon
+        self.run_import(["Babouche,99.00,,Homme,B-40,Rouge,40,Soldes,20,2026-01-01,2026-12-31"])
+        produit = Produit.objects.get(nom="Babouche")
+        self.assertEqual(produit.prix, Decimal('99.00'))
+        self.assertEqual(produit.description, "Cuir")
+        self.assertEqual(Article.objects.get(code_bar="B-40").couleur, "Rouge")
+        self.assertEqual(produit.promotions.get().reduction, Decimal('20.00'))
+        self.assertEqual(Categories.objects.filter(nom="Homme").count(), 1)
+
+        # article rattaché à un autre produit : retiré de la disponibilité de l'ancien
+        self.run_import(["Mule,50.00,,,B-41,Jaune,41,,,,"])
+        self.assertFalse(Disponibilite.objects.filter(produit=produit, pointure="41").exists())
+        self.assertTrue(Disponibilite.objects.filter(produit__nom="Mule", pointure="41").exists())
+
+    def test_ambiguous_name_rejected(self):
+        homonymes = [Produit.objects.create(nom="Mule", prix=Decimal('50.00')) for _ in range(2)]
+        with self.assertRaisesMessage(CatalogueImportError, "Mule"):
+            self.run_import(["Mule,10.00,,,M-40,,40,,,,"])
+        self.assertEqual(
+            sorted(Produit.objects.filter(nom="Mule").values_list('prix', flat=True)), [Decimal('50.00')] * 2
+        )
+        self.assertFalse(Article.objects.filter(produit__in=homonymes).exists())
+
+    def test_rejected_chunk_keeps_derived_data(self):
+        """Lot rejeté après un lot validé : matières et file des produits similaires à jour pour le premier"""
+        [Produit.objects.create(nom="Mule", prix=Decimal('50.00')) for _ in range(2)]
+        SimilaireEnAttente.objects.all().delete()
+        lines = [
+            {'nom': "Botte", 'prix': "80.00", 'categories': ["Homme"], 'code_bar': "B-1", 'matieres_premieres': {'dessus': "cuir"}},
+            {'nom': "Mule", 'prix': "10.00", 'code_bar': "M-1"},
+        ]
+        stream = io.StringIO(''.join(json.dumps(line) + "\n" for line in lines))
+        with self.assertRaisesMessage(CatalogueImportError, "Mule"):
+            list(import_catalogue(stream, 'jsonl', chunk_size=1))
+        botte = Produit.objects.get(nom="Botte")
+        self.assertEqual(list(SimilaireEnAttente.objects.values_list('pk', flat=True)), [botte.pk])
+        self.assertEqual(Matiere.objects.get(partie="dessus", nom="cuir").nb_produits, 1)
+
+
+class ConditionalGetTests(TestCase):
+    """GET conditionnels (config.conditional) : ETag et Last-Modified suivent les versions des modèles"""
+
+    url = '/api/products/categories/'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        Categories.objects.create(nom="Homme")
+
+    def age_last_write(self, seconds=10):
+        """Recule la date de dernière écriture des catégories (Last-Modified n'est servi qu'après la seconde écoulée)"""
+        cache.set(MODIFIED_KEY.format('products.categories'), time.time() - seconds, None)
+
+    def test_etag_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_after_write(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Categories.objects.create(nom="Femme")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since(self):
+        bump_version(Categories)
+        self.age_last_write()
+        last_modified = self.client.get(self.url)['Last-Modified']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        # écriture dans la seconde qui suit : jamais de 304 périmé pour If-Modified-Since seul
+        with self.captureOnCommitCallbacks(execute=True):
+            Categories.objects.create(nom="Femme")
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_last_modified_withheld_during_write_second(self):
+        bump_version(Categories)
+        response = self.client.get(self.url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertTrue(response.has_header('ETag'))
+
+    def test_promotion_starts_at_midnight(self):
+        """Une promotion qui commence aujourd'hui , sans écriture depuis hier : ni ETag ni Last-Modified d'hier ne valent"""
+        url = '/api/products/produits/'
+        today = timezone.localdate()
+        produit = Produit.objects.create(nom="Babouche", prix=Decimal('100.00'))
+        Promotion.objects.create(produit=produit, reduction=Decimal('20.00'), date_debut=today, date_fin=today)
+        # dernière écriture avant-hier
+        for model in ProduitViewSet.version_models:
+            cache.set(MODIFIED_KEY.format(model_label(model)), time.time() - 2 * 86400, None)
+
+        with mock.patch('django.utils.timezone.localdate', return_value=today - timedelta(days=1)):
+            hier = self.client.get(url)
+        self.assertEqual(hier.data['results'][0]['prix_effectif'], '100.00')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=hier['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['prix_effectif'], '80.00')
+        self.assertNotEqual(response['ETag'], hier['ETag'])
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=hier['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+
+class CategoryTreeTests(TestCase):
+    """Arbre des catégories (products.categories) : comptes , cache et invalidation par les versions"""
+
+    def setUp(self):
+        cache.clear()
+        self.homme = Categories.objects.create(nom="Homme")
+        SousCategories.objects.create(nom="Sandales", categorie=self.homme)
+        create_produit(0, self.homme)
+
+    def names(self, tree):
+        return [categorie['nom'] for categorie in tree]
+
+    def test_tree(self):
+        tree = APIClient().get('/api/products/categories/tree/').data
+        self.assertEqual(tree[0]['nb_produits'], 1)
+        self.assertEqual([sous['nom'] for sous in tree[0]['sous_categories']], ["Sandales"])
+
+    def test_cached(self):
+        category_tree()
+        with self.assertNumQueries(0):
+            category_tree()
+
+    def test_invalidated_by_write(self):
+        category_tree()
+        with self.captureOnCommitCallbacks(execute=True):
+            ProduitCategorie.objects.create(produit=create_produit(1, self.homme), categorie=Categories.objects.create(nom="Femme"))
+        tree = category_tree()
+        self.assertEqual(self.names(tree), ["Femme", "Homme"])
+        self.assertEqual(tree[1]['nb_produits'], 2)
+
+    def test_stale_rebuild_not_served(self):
+        """Une écriture validée pendant la reconstruction ne laisse pas d'arbre périmé sous la nouvelle clé"""
+        def racing_build():
+            tree = build_category_tree()
+            with self.captureOnCommitCallbacks(execute=True):
+                Categories.objects.create(nom="Enfant")
+            return tree
+
+        with mock.patch('products.categories.build_category_tree', side_effect=racing_build):
+            self.assertEqual(self.names(category_tree()), ["Homme"])
+        self.assertEqual(self.names(category_tree()), ["Enfant", "Homme"])
+
+
+class InlineExecutor:
+    """Pool de test : exécute le travail dans le thread courant"""
+
+    def submit(self, fonction, *args):
+        future = Future()
+        future.set_result(fonction(*args))
+        return future
+
+
+class ImageDerivativesTests(TestCase):
+    """Images dérivées des médias (products.images) : génération , signal post_save et exposition en srcset"""
+
+    def setUp(self):
+        from PIL import Image
+
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        override = override_settings(MEDIA_ROOT=media_root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        os.makedirs(os.path.join(media_root.name, 'products'))
+        self.source = os.path.join(media_root.name, 'products', 'source.jpg')
+        Image.new('RGB', (600, 300), 'red').save(self.source)
+        self.produit = create_produit(0, Categories.objects.create(nom="Homme"))
+
+    def test_render(self):
+        tailles = render_derivatives(self.source, {'thumb': 160, 'card': 480, 'zoom': 1200}, settings.MEDIA_ROOT, '/media/')
+        # une image n'est jamais agrandie
+        self.assertEqual({taille: derive['largeur'] for taille, derive in tailles.items()}, {'thumb': 160, 'card': 480, 'zoom': 600})
+        self.assertTrue(tailles['thumb']['webp'].startswith('/media/products/derives/thumb-'))
+        # même contenu , mêmes noms de fichiers
+        self.assertEqual(render_derivatives(self.source, {'thumb': 160}, settings.MEDIA_ROOT, '/media/')['thumb'], tailles['thumb'])
+
+    def test_signal_saves_derivatives(self):
+        with mock.patch('products.images.get_executor', return_value=InlineExecutor()), \
+                mock.patch('products.images.connections'), \
+                self.captureOnCommitCallbacks(execute=True):
+            creative = Creative.objects.create(produit=self.produit, type_creative="photo", url='/media/products/source.jpg')
+        creative.refresh_from_db()
+        self.assertEqual(creative.derives['source'], '/media/products/source.jpg')
+        self.assertEqual(set(creative.derives['tailles']), set(settings.IMAGE_DERIVATIVES))
+
+        # API : les dérivées en srcset , sans le JSON brut
+        data = APIClient().get(f'/api/products/creatives/{creative.pk}/').data
+        self.assertNotIn('derives', data)
+        self.assertEqual(data['srcset']['webp'].count('w, '), 2)
+
+    def test_remote_image_ignored(self):
+        with mock.patch('products.images.get_executor') as get_executor, self.captureOnCommitCallbacks(execute=True):
+            Creative.objects.create(produit=self.produit, type_creative="photo", url="https://cdn.example.com/a.jpg")
+        get_executor.assert_not_called()
+
+    def test_url_changed(self):
+        """Image du média remplacée : les dérivées de l'ancienne image ne sont plus servies"""
+        creative = Creative.objects.create(
+            produit=self.produit, type_creative="photo", url='/media/products/source.jpg',
+            derives={'source': '/media/products/source.jpg', 'tailles': render_derivatives(
+                self.source, {'thumb': 160}, settings.MEDIA_ROOT, '/media/'
+            )},
+        )
+        url = f'/api/products/creatives/{creative.pk}/'
+        self.assertIn('webp', APIClient().get(url).data['srcset'])
+        with mock.patch('products.images.get_executor') as get_executor, self.captureOnCommitCallbacks(execute=True):
+            Creative.objects.filter(pk=creative.pk).update(url="https://cdn.example.com/a.jpg")
+            Creative.objects.get(pk=creative.pk).save()
+        # image distante : pas de nouvelles dérivées
+        get_executor.assert_not_called()
+        self.assertEqual(APIClient().get(url).data['srcset'], {})
+
+    def test_pool_spawn(self):
+        """Le pool n'est pas créé par fork du processus web"""
+        executor = process_pool(1)
+        self.addCleanup(executor.shutdown)
+        self.assertEqual(executor._mp_context.get_start_method(), 'spawn')
+
+
+class BoughtTogetherTests(TestCase):
+    """Produits souvent achetés ensemble (products.recommendations) : co-occurrence par paquets de commandes et API"""
+
+    def setUp(self):
+        cache.clear()
+        categorie = Categories.objects.create(nom="Homme")
+        self.a, self.b, self.c, self.d = (create_produit(index, categorie) for index in range(4))
+        client = Client.objects.create(user=User.objects.create_user('acheteur'), nom="Nom", prenom="Prénom")
+        # A+B dans deux commandes (dont une ligne en double) , A+C dans une , D jamais avec un autre produit
+        for produits in ((self.a, self.b, self.c), (self.a, self.b, self.b), (self.d,)):
+            commande = Commande.objects.create(client=client)
+            for produit in produits:
+                LigneCommande.objects.create(commande=commande, produit=produit, quantite=1, prix_unitaire=produit.prix)
+
+    def neighbours(self):
+        return {
+            (row.produit_id, row.rang): (row.associe_id, row.nb_commandes)
+            for row in AchatAssocie.objects.all()
+        }
+
+    def test_build(self):
+        self.assertEqual(build_bought_together(top_n=5), 6)
+        expected = {
+            (self.a.pk, 1): (self.b.pk, 2), (self.a.pk, 2): (self.c.pk, 1),
+            (self.b.pk, 1): (self.a.pk, 2), (self.b.pk, 2): (self.c.pk, 1),
+            (self.c.pk, 1): (self.a.pk, 1), (self.c.pk, 2): (self.b.pk, 1),
+        }
+        self.assertEqual(self.neighbours(), expected)
+        # même résultat avec une commande par paquet
+        build_bought_together(top_n=5, chunk_size=1)
+        self.assertEqual(self.neighbours(), expected)
+
+    def test_top_and_min_commandes(self):
+        build_bought_together(top_n=1)
+        self.assertEqual(self.neighbours()[(self.c.pk, 1)], (self.a.pk, 1))
+        self.assertEqual(AchatAssocie.objects.count(), 3)
+        build_bought_together(top_n=5, min_commandes=2)
+        self.assertEqual(self.neighbours(), {(self.a.pk, 1): (self.b.pk, 2), (self.b.pk, 1): (self.a.pk, 2)})
+
+    def test_api(self):
+        api = APIClient()
+        self.assertEqual(api.get(f'/api/products/produits/{self.a.pk}/bought-together/').data, [])
+        build_bought_together(top_n=5)
+        data = api.get(f'/api/products/produits/{self.a.pk}/bought-together/').data
+        self.assertEqual([(row['id'], row['nb_commandes']) for row in data], [(self.b.pk, 2), (self.c.pk, 1)])
+        self.assertEqual(data[0]['prix_effectif'], '90.00')
+
+    def test_unknown_produit(self):
+        api = APIClient()
+        self.assertEqual(api.get('/api/products/produits/999999/bought-together/').status_code, 404)
+        self.assertEqual(api.get('/api/products/produits/abc/bought-together/').status_code, 404)
+
+
+@skipUnless(connection.vendor == 'postgresql', "Agrégats PostgreSQL (ArrayAgg)")
+class SimilarTests(TestCase):
+    """Index des produits similaires (products.similarity) : file des produits modifiés , worker et API"""
+
+    def setUp(self):
+        self.homme = Categories.objects.create(nom="Homme")
+        self.produits = [
+            Produit.objects.create(
+                nom=f"Produit {index}", prix=Decimal('100.00'), origine="Maroc",
+                type_de_semelle=semelle, matieres_premieres={'dessus': matiere},
+            )
+            for index, (semelle, matiere) in enumerate((
+                ("Cuir", "cuir"), ("Cuir", "cuir"), ("Cuir", "daim"), ("Gomme", "toile"),
+            ))
+        ]
+
+    def similaires(self):
+        return {
+            (row.produit_id, row.rang): row.similaire_id
+            for row in ProduitSimilaire.objects.all()
+        }
+
+    def test_queue_deduplicated(self):
+        """Les écritures d'une transaction mettent le produit en file une fois , sans calcul dans la requête"""
+        SimilaireEnAttente.objects.all().delete()
+        produit = self.produits[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            for origine in ("Fès", "Rabat"):
+                produit.origine = origine
+                produit.save()
+            ProduitCategorie.objects.create(produit=produit, categorie=self.homme)
+        self.assertEqual(list(SimilaireEnAttente.objects.values_list('pk', flat=True)), [produit.pk])
+        self.assertFalse(ProduitSimilaire.objects.exists())
+
+    def test_drain(self):
+        self.assertEqual(drain_similar(), 4)
+        self.assertFalse(SimilaireEnAttente.objects.exists())
+        first, second, third, fourth = (produit.pk for produit in self.produits)
+        self.assertEqual(self.similaires()[(first, 1)], second)
+        self.assertEqual(self.similaires()[(third, 1)], first)
+        # même index qu'une reconstruction complète
+        drained = self.similaires()
+        build_similar()
+        self.assertEqual(self.similaires(), drained)
+
+    def test_drain_batches(self):
+        """Calcul par paquets d'une ligne : même résultat"""
+        with mock.patch('products.similarity.BATCH_SIZE', 1):
+            self.assertEqual(drain_similar(batch_size=2) + drain_similar(batch_size=2), 4)
+        batched = self.similaires()
+        build_similar()
+        self.assertEqual(batched, self.similaires())
+
+    def test_drain_failure_requeues(self):
+        with mock.patch('products.similarity.refresh_similar', side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            drain_similar()
+        self.assertEqual(SimilaireEnAttente.objects.count(), 4)
+
+    def test_api(self):
+        drain_similar()
+        data = APIClient().get(f'/api/products/produits/{self.produits[0].pk}/similar/').data
+        self.assertEqual(data[0]['id'], self.produits[1].pk)
+        self.assertGreater(data[0]['score'], data[-1]['score'])
+
+    def test_unknown_produit(self):
+        api = APIClient()
+        self.assertEqual(api.get('/api/products/produits/999999/similar/').status_code, 404)
+        self.assertEqual(api.get('/api/products/produits/abc/similar/').status_code, 404)
+
+
+@skipUnless(connection.vendor == 'postgresql', "Requêtes jsonb PostgreSQL")
+class MatieresTests(TestCase):
+    """Filtre ?matiere= et index des matières (products.materials)"""
+
+    def setUp(self):
+        self.api = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.botte = Produit.objects.create(
+                nom="Botte", prix=Decimal('100.00'), matieres_premieres={'dessus': "cuir", 'semelle': "caoutchouc"}
+            )
+            self.sandale = Produit.objects.create(nom="Sandale", prix=Decimal('100.00'), matieres_premieres={'semelle': "cuir"})
+            self.basket = Produit.objects.create(nom="Basket", prix=Decimal('100.00'), matieres_premieres={'dessus': 'cuir "nappa"'})
+
+    def noms(self, query):
+        response = self.api.get(f'/api/products/produits/?{query}&ordering=nom')
+        self.assertEqual(response.status_code, 200)
+        return [produit['nom'] for produit in response.data['results']]
+
+    def comptes(self):
+        return {(row.partie, row.nom): row.nb_produits for row in Matiere.objects.all()}
+
+    def test_filter(self):
+        # n'importe quelle partie (chemin JSON) contre une partie donnée (containment)
+        self.assertEqual(self.noms('matiere=cuir'), ["Botte", "Sandale"])
+        self.assertEqual(self.noms('matiere=dessus:cuir'), ["Botte"])
+        self.assertEqual(self.noms('matiere=semelle:cuir'), ["Sandale"])
+        # toutes les matières demandées , valeur échappée dans le chemin JSON
+        self.assertEqual(self.noms('matiere=cuir&matiere=semelle:caoutchouc'), ["Botte"])
+        self.assertEqual(self.noms('matiere=cuir%20%22nappa%22'), ["Basket"])
+
+    def test_filter_requires_postgresql(self):
+        with mock.patch.object(connection, 'vendor', 'sqlite'):
+            response = self.api.get('/api/products/produits/?matiere=cuir')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('matiere', response.data)
+
+    def test_recounts(self):
+        self.assertEqual(self.comptes(), {
+            ('', "cuir"): 2, ('dessus', "cuir"): 1, ('semelle', "cuir"): 1,
+            ('', "caoutchouc"): 1, ('semelle', "caoutchouc"): 1,
+            ('', 'cuir "nappa"'): 1, ('dessus', 'cuir "nappa"'): 1,
+        })
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sandale.matieres_premieres = {'semelle': "lin"}
+            self.sandale.save()
+            self.basket.delete()
+        comptes = self.comptes()
+        self.assertEqual(comptes[('', "cuir")], 1)
+        self.assertNotIn(('semelle', "cuir"), comptes)
+        self.assertEqual(comptes[('semelle', "lin")], 1)
+        self.assertNotIn(('', 'cuir "nappa"'), comptes)
+
+        data = self.api.get('/api/products/produits/matieres/').data
+        cuir = next(entry for entry in data if entry['nom'] == "cuir")
+        self.assertEqual(cuir, {'nom': "cuir", 'nb_produits': 1, 'parties': {'dessus': 1}})
+
+
+@skipUnless(connection.vendor == 'postgresql', "UPDATE ... FROM PostgreSQL")
+class BulkUpdateTests(TestCase):
+    """Modifications en masse (products.bulk) : opérations , filtre requis , journal et permission"""
+    URL = '/api/products/produits/bulk-update/'
+
+    def setUp(self):
+        self.api = APIClient()
+        self.admin = User.objects.create_user('admin', is_staff=True)
+        self.api.force_authenticate(self.admin)
+        self.homme, self.femme = Categories.objects.create(nom="Homme"), Categories.objects.create(nom="Femme")
+        self.a, self.b = create_produit(0, self.homme), create_produit(1, self.homme)
+        self.c = create_produit(2, self.femme)
+        Produit.objects.filter(pk=self.c.pk).update(origine="Espagne")
+
+    def post(self, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.api.post(self.URL, data, format='json')
+
+    def prix(self):
+        return dict(Produit.objects.values_list('pk', 'prix'))
+
+    def test_prix(self):
+        response = self.post({'filtre': {'categories': [self.homme.pk]}, 'operation': 'prix', 'valeur': "75.50"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['nb_produits'], 2)
+        self.assertEqual(self.prix(), {self.a.pk: Decimal('75.50'), self.b.pk: Decimal('75.50'), self.c.pk: Decimal('100.00')})
+
+        modification = ModificationMasse.objects.get(pk=response.data['modification'])
+        self.assertEqual(modification.utilisateur, self.admin)
+        self.assertEqual(modification.filtre, {'categories': [self.homme.pk]})
+        self.assertEqual(modification.operation, {'type': 'prix', 'champ': None, 'valeur': '75.50'})
+        self.assertEqual(modification.nb_produits, 2)
+        # vignettes recalculées après validation
+        self.assertEqual(ProduitCard.objects.get(produit=self.a).prix, Decimal('75.50'))
+
+    def test_pourcentage(self):
+        response = self.post({'filtre': {'origine': "Maroc", 'ids': [self.a.pk, self.c.pk]}, 'operation': 'pourcentage', 'valeur': "-12.5"})
+        self.assertEqual(response.data['nb_produits'], 1)
+        self.assertEqual(self.prix(), {self.a.pk: Decimal('87.50'), self.b.pk: Decimal('100.00'), self.c.pk: Decimal('100.00')})
+
+    def test_attribut(self):
+        SimilaireEnAttente.objects.all().delete()
+        response = self.post({'filtre': {'origine': "Espagne"}, 'operation': 'attribut', 'champ': 'type_de_semelle', 'valeur': "Gomme"})
+        self.assertEqual(response.data['nb_produits'], 1)
+        self.assertEqual(
+            list(Produit.objects.filter(type_de_semelle="Gomme").values_list('pk', flat=True)), [self.c.pk]
+        )
+        # les voisins des produits modifiés sont mis en file
+        self.assertEqual(list(SimilaireEnAttente.objects.values_list('pk', flat=True)), [self.c.pk])
+
+    def test_invalid(self):
+        for data in (
+            {'filtre': {}, 'operation': 'prix', 'valeur': "10"},  # filtre vide : tout le catalogue
+            {'filtre': {'ids': [self.a.pk]}, 'operation': 'attribut', 'valeur': "Gomme"},  # champ requis
+            {'filtre': {'ids': [self.a.pk]}, 'operation': 'prix', 'valeur': "-1"},
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(self.post(data).status_code, 400)
+        self.assertFalse(ModificationMasse.objects.exists())
+        self.assertEqual(set(self.prix().values()), {Decimal('100.00')})
+
+    def test_pourcentage_overflow(self):
+        """Un prix qui déborderait de DECIMAL(10, 2) : 400 , aucun produit modifié ni journalisé"""
+        Produit.objects.filter(pk=self.a.pk).update(prix=Decimal('50000000.00'))
+        response = self.post({'filtre': {'categories': [self.homme.pk]}, 'operation': 'pourcentage', 'valeur': "999.99"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('valeur', response.data)
+        self.assertEqual(self.prix()[self.b.pk], Decimal('100.00'))
+        self.assertFalse(ModificationMasse.objects.exists())
+
+    def test_staff_only(self):
+        data = {'filtre': {'ids': [self.a.pk]}, 'operation': 'prix', 'valeur': "1"}
+        self.api.force_authenticate(None)
+        self.assertIn(self.post(data).status_code, (401, 403))
+        self.api.force_authenticate(User.objects.create_user('client'))
+        self.assertEqual(self.post(data).status_code, 403)
+        self.assertFalse(ModificationMasse.objects.exists())
+
+
+@override_settings(CHANGES_FEED_LAG=0)
+class ChangesFeedTests(TestCase):
+    """Flux des modifications (products.changes) : curseur par clé , horizon , suppressions et curseurs invalides"""
+    URL = '/api/products/changes/'
+
+    def setUp(self):
+        self.api = APIClient()
+        self.produits = [
+            Produit.objects.create(nom=f"Produit {index}", prix=Decimal('100.00')) for index in range(3)
+        ]
+        # même date pour les trois : l'id départage
+        Produit.objects.update(date_maj=timezone.now() - timedelta(seconds=5))
+
+    def get(self, since=None, limit=None):
+        params = {key: value for key, value in (('since', since), ('limit', limit)) if value is not None}
+        return self.api.get(self.URL, params)
+
+    def ids(self, response):
+        return [produit['id'] for produit in response.data['produits']]
+
+    def test_keyset(self):
+        first = self.get(limit=2)
+        self.assertEqual(self.ids(first), [produit.pk for produit in self.produits[:2]])
+        self.assertFalse(first.data['complet'])
+        second = self.get(first.data['next'], limit=2)
+        self.assertEqual(self.ids(second), [self.produits[2].pk])
+        self.assertTrue(second.data['complet'])
+        # rien de nouveau , puis seulement le produit modifié
+        self.assertEqual(self.ids(self.get(second.data['next'])), [])
+        Produit.objects.filter(pk=self.produits[0].pk).update(date_maj=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.ids(self.get(second.data['next'])), [self.produits[0].pk])
+
+    def test_lag_horizon(self):
+        Produit.objects.filter(pk=self.produits[0].pk).update(date_maj=timezone.now())
+        with override_settings(CHANGES_FEED_LAG=60):
+            self.assertEqual(self.ids(self.get()), [])
+        self.assertEqual(len(self.ids(self.get())), 3)
+
+    def test_open_transaction_horizon(self):
+        """Une transaction d'écriture en cours depuis plus longtemps que le délai retient l'horizon"""
+        with mock.patch('products.changes.oldest_write_transaction', return_value=timezone.now() - timedelta(seconds=10)):
+            self.assertEqual(self.ids(self.get()), [])
+
+    def test_tombstones(self):
+        cursor = self.get().data['next']
+        pk = self.produits[1].pk
+        self.produits[1].delete()
+        Suppression.objects.update(date_suppression=timezone.now() - timedelta(seconds=1))
+        suppressions = self.get(cursor).data['suppressions']
+        self.assertEqual([(row['modele'], row['objet_id']) for row in suppressions], [('produit', pk)])
+
+    def test_expired_cursor(self):
+        cursor = encode_cursor({'positions': {}, 'date': timezone.now() - timedelta(days=settings.CHANGES_RETENTION_DAYS + 1)})
+        self.assertEqual(self.get(cursor).status_code, 410)
+
+    def test_tampered_cursor(self):
+        cursor = self.get().data['next']
+        self.assertEqual(self.get(cursor[:-2] + ('AA' if cursor[-2:] != 'AA' else 'BB')).status_code, 404)
@@ -8,7 +8,6 @@ Script pour insérer des produits dans la base de données Yoozak
 import os
 import sys
 import random
-import json
 import requests
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -145,7 +144,7 @@ def create_sample_produits():
             "prix": 129.99,
             "description": "Chaussure de course iconique avec une unité Air visible.",
             "type_de_semelle": "Caoutchouc",
-            "matieres_premieres": json.dumps({"dessus": "cuir", "semelle": "caoutchouc", "intérieur": "textile"}),
+            "matieres_premieres": {"dessus": "cuir", "semelle": "caoutchouc", "intérieur": "textile"},
             "origine": "Vietnam",
             "categories": ["Sport", "Femme"],
             "sous_categorie": "Baskets"
@@ -155,7 +154,7 @@ def create_sample_produits():
             "prix": 99.99,
             "description": "Chaussure de skateboard avec embout en coquille.",
             "type_de_semelle": "Caoutchouc",
-            "matieres_premieres": json.dumps({"dessus": "cuir", "semelle": "caoutchouc", "intérieur": "textile"}),
+            "matieres_premieres": {"dessus": "cuir", "semelle": "caoutchouc", "intérieur": "textile"},
             "origine": "Chine",
             "categories": ["Sport", "Homme"],
             "sous_categorie": "Baskets"
@@ -165,7 +164,7 @@ def create_sample_produits():
             "prix": 595.00,
             "description": "Escarpins élégants à talons hauts avec semelle rouge signature.",
             "type_de_semelle": "Cuir",
-            "matieres_premieres": json.dumps({"dessus": "cuir verni", "semelle": "cuir", "intérieur": "cuir"}),
+            "matieres_premieres": {"dessus": "cuir verni", "semelle": "cuir", "intérieur": "cuir"},
             "origine": "Italie",
             "categories": ["Femme", "Luxe"],
             "sous_categorie": "Escarpins"
@@ -175,7 +174,7 @@ def create_sample_produits():
             "prix": 179.99,
             "description": "Bottes robustes et imperméables.",
             "type_de_semelle": "Caoutchouc",
-            "matieres_premieres": json.dumps({"dessus": "nubuck", "semelle": "caoutchouc", "intérieur": "textile"}),
+            "matieres_premieres": {"dessus": "nubuck", "semelle": "caoutchouc", "intérieur": "textile"},
             "origine": "République Dominicaine",
             "categories": ["Homme"],
             "sous_categorie": "Bottes"
@@ -185,7 +184,7 @@ def create_sample_produits():
             "prix": 89.99,
             "description": "Sandales confortables avec semelle de liège.",
             "type_de_semelle": "Liège",
-            "matieres_premieres": json.dumps({"dessus": "cuir suédé", "semelle": "liège", "intérieur": "liège"}),
+            "matieres_premieres": {"dessus": "cuir suédé", "semelle": "liège", "intérieur": "liège"},
             "origine": "Allemagne",
             "categories": ["Homme", "Femme"],
             "sous_categorie": "Sandales"
@@ -195,7 +194,7 @@ def create_sample_produits():
             "prix": 425.00,
             "description": "Mocassins de luxe avec picots en caoutchouc.",
             "type_de_semelle": "Caoutchouc",
-            "matieres_premieres": json.dumps({"dessus": "cuir premium", "semelle": "caoutchouc", "intérieur": "cuir"}),
+            "matieres_premieres": {"dessus": "cuir premium", "semelle": "caoutchouc", "intérieur": "cuir"},
             "origine": "Italie",
             "categories": ["Homme", "Luxe"],
             "sous_categorie": "Mocassins"
@@ -205,7 +204,7 @@ def create_sample_produits():
             "prix": 69.99,
             "description": "Baskets en toile emblématiques.",
             "type_de_semelle": "Caoutchouc",
-            "matieres_premieres": json.dumps({"dessus": "toile", "semelle": "caoutchouc", "intérieur": "textile"}),
+            "matieres_premieres": {"dessus": "toile", "semelle": "caoutchouc", "intérieur": "textile"},
             "origine": "Vietnam",
             "categories": ["Homme", "Femme", "Enfant"],
             "sous_categorie": "Baskets"
@@ -215,7 +214,7 @@ def create_sample_produits():
             "prix": 650.00,
             "description": "Escarpins pointus avec un talon fin.",
             "type_de_semelle": "Cuir",
-            "matieres_premieres": json.dumps({"dessus": "daim", "semelle": "cuir", "intérieur": "cuir"}),
+            "matieres_premieres": {"dessus": "daim", "semelle": "cuir", "intérieur": "cuir"},
             "origine": "Italie",
             "categories": ["Femme", "Luxe"],
             "sous_categorie": "Escarpins"